@@ -1,5 +1,12 @@
+import os
+import sys
 from strands import Agent
 from strands_tools import calculator, current_time, python_repl # 참고: https://github.com/strands-agents/tools
 
-agent = Agent(tools=[calculator, current_time, python_repl]) # tools
+# 공용 모듈(shared/) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.mock_model import create_model
+
+# MOCK_MODEL 환경 변수를 지정하면 Bedrock 대신 오프라인 모의 모델 사용
+agent = Agent(model=create_model(), tools=[calculator, current_time, python_repl]) # tools
 response = agent("80 / 4 * 5 의 제곱근은?") # prompt
@@ -0,0 +1,56 @@
+import io
+import time
+import asyncio
+import argparse
+import contextlib
+from tools.bash_tool import handle_bash_tool, handle_bash_tool_async
+from tools.python_repl_tool import handle_python_repl_tool_async
+
+def run_sync(cmds):
+    start = time.perf_counter()
+    for cmd in cmds:
+        handle_bash_tool(cmd)
+    return time.perf_counter() - start
+
+async def run_async(cmds, code):
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(handle_bash_tool_async(cmd) for cmd in cmds),
+        *(handle_python_repl_tool_async(code) for _ in cmds),
+    )
+    return time.perf_counter() - start
+
+async def run_cancel(seconds):
+    # 오래 걸리는 명령을 실행한 뒤 취소 → 자식 프로세스가 바로 종료되는지 확인
+    task = asyncio.create_task(handle_bash_tool_async(f"sleep {seconds * 100}"))
+    await asyncio.sleep(seconds)
+    start = time.perf_counter()
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.5)
+
+    args = parser.parse_args()
+
+    cmds = [f"sleep {args.latency}"] * args.calls
+    code = f"import time; time.sleep({args.latency})"
+
+    # 도구가 출력하는 로그는 숨기고 측정값만 표시
+    with contextlib.redirect_stdout(io.StringIO()):
+        sync_elapsed = run_sync(cmds)
+        async_elapsed = asyncio.run(run_async(cmds, code))
+        cancel_elapsed = asyncio.run(run_cancel(args.latency))
+
+    print(f"{args.calls}개 호출, 호출당 지연 {args.latency}s")
+    print("============================================================")
+    print(f"sync  bash_tool (순차 실행)             : {sync_elapsed:6.2f}s  (합계 ≈ {args.calls * args.latency:.2f}s)")
+    print(f"async bash_tool + python_repl_tool (x{args.calls * 2}) : {async_elapsed:6.2f}s  (최댓값 ≈ {args.latency:.2f}s)")
+    print(f"취소 후 자식 프로세스 종료까지              : {cancel_elapsed * 1000:6.1f}ms")
@@ -0,0 +1,56 @@
+import os
+import time
+import argparse
+import tempfile
+import statistics
+from tools.streaming import stream_process
+from tools.bash_session import BashSessionManager
+
+# 에이전트의 전형적인 다단계 작업: 작업 폴더로 이동 → 환경 변수 설정 → 명령 실행
+SETUP = "cd {workdir} && export APP_ENV=test"
+STEP = "ls > /dev/null && echo $APP_ENV"
+
+def bench_subprocess(workdir, calls):
+    # 매 호출이 새 셸이므로 cd/export 를 명령마다 다시 실행해야 함
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        result = stream_process(f"{SETUP.format(workdir=workdir)} && {STEP}", source="bench", shell=True)
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert result["stdout"].text().strip() == "test"
+    return latencies
+
+def bench_session(workdir, calls):
+    # 세션 셸은 상태를 유지하므로 설정은 한 번만
+    sessions = BashSessionManager()
+    sessions.run(SETUP.format(workdir=workdir), session_id="bench")
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        result = sessions.run(STEP, session_id="bench")
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert result["stdout"].text().strip() == "test"
+    sessions.shutdown()
+    return latencies
+
+def report(mode, latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(
+        f"{mode:<12} mean={statistics.mean(latencies):7.2f}ms  "
+        f"p50={statistics.median(latencies):7.2f}ms  p95={p95:7.2f}ms"
+    )
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=50)
+
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    print(f"bash_tool 호출 지연 시간 ({args.calls}회 호출)")
+    print("============================================================")
+    report("subprocess", bench_subprocess(workdir, args.calls))
+    report("session", bench_session(workdir, args.calls))
+    os.rmdir(workdir)
@@ -0,0 +1,82 @@
+import os
+import time
+import argparse
+import tempfile
+import threading
+import statistics
+from strands import Agent
+from strands.models import BedrockModel
+from strands.agent.conversation_manager import NullConversationManager
+from strands.types.session import SessionMessage
+from tools.conversation_store import ConversationStore
+
+# 사용자 질문과 도구 호출/결과가 섞인 일반적인 대화 한 턴 (메시지 4개)
+def turn(i):
+    return [
+        {"role": "user", "content": [{"text": f"질문 {i}: 지난 분기 매출을 지역별로 정리해줘 " + "x" * 200}]},
+        {"role": "assistant", "content": [{"toolUse": {"toolUseId": f"t{i}", "name": "python_repl_tool", "input": {"code": "print(1)"}}}]},
+        {"role": "user", "content": [{"toolResult": {"toolUseId": f"t{i}", "status": "success", "content": [{"text": "y" * 500}]}}]},
+        {"role": "assistant", "content": [{"text": f"답변 {i}: " + "z" * 400}]},
+    ]
+
+def fill(store, session_id, messages):
+    manager = store.session_manager(session_id)
+    Agent(model=BedrockModel(), session_manager=manager, conversation_manager=NullConversationManager(), callback_handler=None)
+    for i in range(0, messages, 4):
+        for j, message in enumerate(turn(i // 4)):
+            store.create_message(session_id, "default", SessionMessage.from_message(message, i + j))
+
+def restore(store, session_id, model):
+    # AgentPool 처럼 모델 클라이언트는 공유하고 대화만 복원
+    start = time.perf_counter()
+    agent = Agent(
+        model=model,
+        session_manager=store.session_manager(session_id),
+        conversation_manager=NullConversationManager(),
+        callback_handler=None,
+    )
+    return (time.perf_counter() - start) * 1000, len(agent.messages)
+
+def concurrent_appends(store, writers, appends):
+    def write(i):
+        for j in range(appends):
+            store.append_history(f"writer-{i}", {"role": "user", "content": f"메시지 {j}"})
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(writers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--appends", type=int, default=500)
+
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ConversationStore(os.path.join(tmp, "conversations.sqlite"))
+        fill(store, "bench", args.messages)
+
+        print(f"메시지 {args.messages}개 세션 복원 ({args.repeat}회)")
+        print("============================================================")
+        model = BedrockModel()
+        timings = []
+        for _ in range(args.repeat):
+            # 재시작 직후처럼 매번 새 저장소(새 연결)로 복원
+            elapsed, count = restore(ConversationStore(store.path), "bench", model)
+            timings.append(elapsed)
+        print(f"복원 첫 회={timings[0]:7.1f}ms  p50={statistics.median(timings):7.1f}ms  최대={max(timings):7.1f}ms  (메시지 {count}개)")
+
+        elapsed = concurrent_appends(store, args.writers, args.appends)
+        total = args.writers * args.appends
+        print(f"동시 쓰기 {args.writers}개 스레드 x {args.appends}회: {elapsed:.2f}s ({total / elapsed:,.0f} appends/s)")
+        start = time.perf_counter()
+        page = store.history("writer-0", limit=50)
+        print(f"히스토리 최근 50개 페이지 읽기: {(time.perf_counter() - start) * 1000:.2f}ms (전체 {store.history_count('writer-0')}개 중 {len(page)}개)")
@@ -0,0 +1,59 @@
+import os
+import time
+import argparse
+import statistics
+from tools.python_repl_tool import PythonREPL
+
+# 데이터 분석 세션에서 흔히 보이는 호출 패턴: 매 호출마다 라이브러리를 import 한 뒤 간단한 계산
+DEFAULT_CODE = """
+import json, statistics
+try:
+    import pandas as pd
+    df = pd.DataFrame({"x": range(1000)})
+    print(df["x"].sum())
+except ImportError:
+    print(sum(range(1000)))
+"""
+
+def bench(mode, code, calls):
+    repl = PythonREPL(mode=mode)
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        output = repl.run(code, session_id="bench")
+        latencies.append((time.perf_counter() - start) * 1000)
+        if output.startswith(("Error:", "Exception:")):
+            raise RuntimeError(f"{mode} mode failed: {output}")
+    if repl.pool is not None:
+        repl.pool.shutdown()
+    if repl.zygote is not None:
+        repl.zygote.shutdown()
+    return latencies
+
+def report(mode, latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(
+        f"{mode:<12} first={latencies[0]:8.1f}ms  "
+        f"mean={statistics.mean(latencies):8.1f}ms  "
+        f"p50={statistics.median(latencies):8.1f}ms  p95={p95:8.1f}ms"
+    )
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--code", type=str, default=DEFAULT_CODE)
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        default=["subprocess", "pool", "zygote"] if hasattr(os, "fork") else ["subprocess", "pool"]
+    )
+
+    args = parser.parse_args()
+
+    print(f"python_repl_tool 호출 지연 시간 ({args.calls}회 호출)")
+    print("============================================================")
+    for mode in args.modes:
+        report(mode, bench(mode, args.code, args.calls))
+    print("\n* zygote 모드의 first 값은 사전 로딩(preload) 완료를 기다린 시간을 포함합니다.")
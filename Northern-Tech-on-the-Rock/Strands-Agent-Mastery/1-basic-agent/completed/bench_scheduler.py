@@ -0,0 +1,49 @@
+import time
+import argparse
+import threading
+import statistics
+from tools.scheduler import ExecutionScheduler
+from tools.streaming import stream_process
+
+# 한 세션이 도구 호출을 대량으로 쏟아낼 때, 다른 세션의 호출이 얼마나 기다리는지 비교
+def run(policy, slots, heavy_calls, light_calls, latency):
+    scheduler = ExecutionScheduler(max_concurrent=slots, policy=policy)
+    waits = {"heavy": [], "light": []}
+
+    def call(session_id):
+        queued = time.perf_counter()
+        with scheduler.slot(session_id, "bench"):
+            waits[session_id].append((time.perf_counter() - queued) * 1000)
+            stream_process(["sleep", str(latency)], source="bench")
+
+    threads = [threading.Thread(target=call, args=("heavy",)) for _ in range(heavy_calls)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    # 가벼운 세션은 대량 호출이 이미 대기열에 쌓인 뒤에 도착
+    light = [threading.Thread(target=call, args=("light",)) for _ in range(light_calls)]
+    for thread in light:
+        thread.start()
+    for thread in threads + light:
+        thread.join()
+    return waits, scheduler.stats()
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--slots", type=int, default=2)
+    parser.add_argument("--heavy-calls", type=int, default=20)
+    parser.add_argument("--light-calls", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.2)
+
+    args = parser.parse_args()
+
+    print(f"동시 실행 {args.slots}개, heavy 세션 {args.heavy_calls}회 + light 세션 {args.light_calls}회 (호출당 {args.latency}s)")
+    print("============================================================")
+    for policy in ExecutionScheduler.POLICIES:
+        waits, stats = run(policy, args.slots, args.heavy_calls, args.light_calls, args.latency)
+        print(
+            f"{policy:<5} light 대기 평균={statistics.mean(waits['light']):7.1f}ms  "
+            f"heavy 대기 평균={statistics.mean(waits['heavy']):7.1f}ms  "
+            f"전체 p95 대기={stats['queue_wait_ms']['p95']:7.1f}ms  실행 p50={stats['run_ms']['p50']:6.1f}ms"
+        )
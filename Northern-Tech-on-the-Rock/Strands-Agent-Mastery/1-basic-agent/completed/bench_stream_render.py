@@ -0,0 +1,98 @@
+import json
+import random
+import argparse
+from tools.rendering import DeltaRenderer
+
+# 녹화 파일이 없을 때 쓰는 응답: 문단, 목록, 코드 블록이 섞인 긴 마크다운
+PARAGRAPH = "스트리밍 응답은 토큰 단위로 도착하므로 화면 갱신 비용이 누적됩니다. Each token used to re-send the whole answer to the browser."
+CODE = "```python\nimport pandas as pd\ndf = pd.read_csv('sales.csv')\nprint(df.groupby('region')['amount'].sum())\n```"
+
+def synthetic_events(tokens, interval, seed=0):
+    rng = random.Random(seed)
+    blocks = []
+    while sum(len(b) for b in blocks) < tokens * 4:
+        kind = rng.random()
+        if kind < 0.6:
+            blocks.append(" ".join([PARAGRAPH] * rng.randint(1, 3)))
+        elif kind < 0.85:
+            blocks.append("\n".join(f"- 항목 {i}: {PARAGRAPH[:40]}" for i in range(rng.randint(2, 5))))
+        else:
+            blocks.append(CODE)
+    text = "\n\n".join(blocks)
+    events, t, i = [], 0.0, 0
+    while i < len(text):
+        size = rng.randint(1, 7)
+        events.append({"t": t, "data": text[i:i + size]})
+        t += rng.expovariate(1 / interval)
+        i += size
+    return events
+
+def load_events(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def split_streams(events):
+    # 녹화 파일에는 여러 응답이 이어져 있을 수 있음 (시간이 되돌아가면 새 응답)
+    streams, current, last = [], [], None
+    for event in events:
+        if last is not None and event["t"] < last:
+            streams.append(current)
+            current = []
+        current.append(event)
+        last = event["t"]
+    if current:
+        streams.append(current)
+    return streams
+
+def replay_naive(events, interval):
+    # 기존 방식: 토큰마다 누적 텍스트 전체를 다시 전송
+    text, calls, sent = "", 0, 0
+    for event in events:
+        text += event["data"]
+        calls += 1
+        sent += len(text.encode("utf-8"))
+    return {"render_calls": calls, "bytes_sent": sent}
+
+def replay_throttled(events, interval):
+    # 프레임 단위로 모으기만 하고 매번 전체 텍스트를 전송
+    text, calls, sent, last = "", 0, 0, None
+    for i, event in enumerate(events):
+        text += event["data"]
+        if last is None or event["t"] - last >= interval or i == len(events) - 1:
+            calls += 1
+            sent += len(text.encode("utf-8"))
+            last = event["t"]
+    return {"render_calls": calls, "bytes_sent": sent}
+
+def replay_delta(events, interval):
+    clock = {"now": 0.0}
+    renderer = DeltaRenderer(append=lambda text: None, update=lambda text: None,
+                             interval=interval, clock=lambda: clock["now"])
+    for event in events:
+        clock["now"] = event["t"]
+        renderer.write(event["data"])
+    renderer.close()
+    return renderer.stats()
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=str, default=None, help="STREAM_RECORD_FILE 로 녹화한 JSONL 파일")
+    parser.add_argument("--tokens", type=int, default=3000, help="녹화 파일이 없을 때 만들 토큰 수")
+    parser.add_argument("--token-interval", type=float, default=0.02, help="합성 스트림의 평균 토큰 간격(초)")
+    parser.add_argument("--frame-interval", type=float, default=0.05)
+
+    args = parser.parse_args()
+
+    events = load_events(args.events) if args.events else synthetic_events(args.tokens, args.token_interval)
+    streams = split_streams(events)
+    chars = sum(len(e["data"]) for e in events)
+    print(f"이벤트 {len(events)}개, 응답 {len(streams)}개, {chars}자 (프레임 간격 {args.frame_interval * 1000:.0f}ms)")
+    print("============================================================")
+    for name, replay in (("naive", replay_naive), ("throttled", replay_throttled), ("delta", replay_delta)):
+        calls = sent = 0
+        for stream in streams:
+            stats = replay(stream, args.frame_interval)
+            calls += stats["render_calls"]
+            sent += stats["bytes_sent"]
+        print(f"{name:<10} 렌더 호출={calls:7d}회  전송={sent / 1024:10.1f}KB  문자당={sent / max(1, chars):8.1f}B")
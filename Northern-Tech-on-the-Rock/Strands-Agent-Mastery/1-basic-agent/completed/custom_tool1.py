@@ -1,8 +1,17 @@
 from strands import Agent, tool
 from strands_tools import calculator
+from tools.decorators import memoize
+import os
+import sys
 import random
 
+# 공용 모듈(shared/) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.mock_model import create_model
+
+# 같은 도시/기간의 날씨는 10분 동안 캐시 (재시작 후에도 디스크 캐시에서 바로 응답)
 @tool
+@memoize(ttl=600, disk=True)
 def weather_forecast(city: str, days: int = 3) -> str:
     weather_options = ["Sunny", "Cloudy", "Rainy", "Snowy", "Windy", "Foggy"]
     selected_weather = random.choice(weather_options)
@@ -12,7 +21,9 @@ def weather_forecast(city: str, days: int = 3) -> str:
     print("="*10)
     return selected_weather
 
+# MODEL_CACHE 환경 변수를 지정하면 같은 요청(모델 설정, 시스템 프롬프트, 도구, 메시지)의 응답을 디스크 캐시에서 재생
 agent = Agent(
+    model=create_model(),
     tools=[weather_forecast, calculator]
     )
 
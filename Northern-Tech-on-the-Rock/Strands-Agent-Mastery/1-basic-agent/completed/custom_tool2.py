@@ -1,8 +1,10 @@
 from strands import Agent
-from tools import python_repl_tool, bash_tool
+from tools import python_repl_tool, bash_tool, artifact_tool
+# 비동기(asyncio) 버전을 쓰려면 아래 주석을 해제하세요 (동시에 여러 도구 호출 시 스레드를 점유하지 않음)
+# from tools.async_tools import python_repl_tool, bash_tool
 
 agent = Agent(
-    tools=[bash_tool, python_repl_tool]
+    tools=[bash_tool, python_repl_tool, artifact_tool] # artifact_tool: 너무 긴 도구 출력을 나눠 읽기
     )
 
 if __name__ == "__main__":
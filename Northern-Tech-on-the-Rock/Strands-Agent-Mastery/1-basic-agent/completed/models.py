@@ -1,14 +1,27 @@
+import os
+import sys
 from strands import Agent
-from strands.models import BedrockModel
 from strands_tools import calculator
 
-bedrock_model = BedrockModel(
-    model_id="us.anthropic.claude-sonnet-4-20250514-v1:0",
-    additional_request_fields={
-        "anthropic_beta": [ "interleaved-thinking-2025-05-14" ],
-        "thinking": { "type": "enabled", "budget_tokens": 8000 },
-    }
-)
+# 공용 모듈(shared/) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.mock_model import create_model
+from shared.model_router import RoutingModel, thinking_cascade
+
+# MOCK_MODEL 환경 변수를 지정하면 Bedrock 대신 오프라인 모의 모델 사용
+# MODEL_ROUTER=1 (선택): 요청마다 복잡도를 추정해 빠른 모델(Haiku) -> Sonnet 4 -> Sonnet 4 + thinking 순으로
+# 필요한 만큼만 사용 (간단한 계산은 thinking 없이 바로 답하고, 답이 불확실하면 다음 단계로 승격).
+# 이 예제는 thinking(REASONING) 출력을 보여주는 것이 목적이므로 기본값은 항상 thinking 을 쓰는 단일 모델
+if os.getenv("MODEL_ROUTER", "0") == "1":
+    bedrock_model = thinking_cascade("us.anthropic.claude-sonnet-4-20250514-v1:0", budget_tokens=8000)
+else:
+    bedrock_model = create_model(
+        model_id="us.anthropic.claude-sonnet-4-20250514-v1:0",
+        additional_request_fields={
+            "anthropic_beta": [ "interleaved-thinking-2025-05-14" ],
+            "thinking": { "type": "enabled", "budget_tokens": 8000 },
+        }
+    )
 
 agent = Agent(
     model=bedrock_model,
@@ -24,7 +37,12 @@ if __name__ == "__main__":
     print("=========================================")
     print("=========================================\n")
 
-    last_msg = agent.messages[-1]
+    # 대화 기록(agent.messages)은 대화 관리자가 줄이거나 요약할 수 있으므로 응답 메시지는 결과에서 읽음
+    last_msg = response.message
+    if isinstance(bedrock_model, RoutingModel) and not any('reasoningContent' in c for c in last_msg['content']):
+        # 라우터가 thinking 없는 경로를 골랐으면 REASONING 블록이 없음
+        print("\n ==== REASONING ==== \n")
+        print("(MODEL_ROUTER=1: thinking 없는 경로가 답변함)")
     for content in last_msg['content']:
         if 'reasoningContent' in content:
             print("\n ==== REASONING ==== \n")
@@ -32,3 +50,9 @@ if __name__ == "__main__":
         elif 'text' in content:
             print("\n ==== RESPONSE ==== \n")
             print(content['text'])
+
+    # 경로(route)별 호출 수, 승격 횟수, 지연 시간, 토큰: 복잡도 임계값(ROUTER_FAST_MAX 등) 조정에 사용
+    if isinstance(bedrock_model, RoutingModel):
+        print("\n ==== ROUTES ==== \n")
+        for name, stats in bedrock_model.stats().items():
+            print(f"{name}: {stats}")
@@ -1,8 +1,35 @@
 import streamlit as st
-from strands import Agent
-from strands_tools import calculator, current_time, use_aws, python_repl
+from strands_tools import calculator, current_time, use_aws
+from tools import python_repl_tool, artifact_tool
+from tools.rendering import DeltaRenderer, EventRecorder
+from tools.event_loop import BackgroundLoop
+from tools.agent_pool import AgentPool, SessionBusy
+from tools.conversation_manager import TokenBudgetConversationManager, close_interrupted_turn
+import os
 import json
-import asyncio
+import math
+import time
+import uuid
+import contextlib
+import sys
+
+# 공용 모듈(shared/) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.mock_model import create_model
+from shared.rate_limiter import limiter
+
+# 실시간 도구 출력 박스에 유지할 최대 글자 수
+LIVE_OUTPUT_CHARS = 4000
+# 매 rerun 마다 전부 그리는 최근 메시지 수 (그 이전 메시지는 "이전 대화" 페이지로 접어 둠)
+RECENT_MESSAGES = 20
+# "이전 대화" 한 페이지에 보여줄 메시지 수
+HISTORY_PAGE = 20
+# 같은 대화를 연 다른 탭의 턴이 끝나기를 기다리는 최대 시간(초)
+TURN_WAIT_SECONDS = 120
+# 도구 실행 중 이벤트가 없을 때 경과 시간을 갱신하는 간격(초): 이 때 중지 버튼 클릭을 확인
+HEARTBEAT_INTERVAL = 0.5
+# 설정하면 스트리밍 토큰을 기록 (bench_stream_render.py --events 로 재생)
+STREAM_RECORD_FILE = os.getenv("STREAM_RECORD_FILE")
 
 # 페이지 설정
 st.set_page_config(
@@ -14,155 +41,312 @@ st.set_page_config(
 # 제목
 st.title("🤖 Strands Agent 챗봇")
 
-# Agent 초기화 (세션 상태에 저장)
-if "agent" not in st.session_state:
-    st.session_state.agent = Agent(tools=[calculator, current_time, use_aws, python_repl])
+# 프로세스 전체에서 하나의 이벤트 루프를 유지: 턴마다 asyncio.run 으로 루프를 새로 만들지 않으므로
+# 루프에 묶인 모델 연결, MCP 세션 등을 다음 턴에서도 재사용
+@st.cache_resource
+def get_event_loop():
+    return BackgroundLoop()
+
+# 모든 브라우저 세션이 공유하는 Agent 풀: 모델 클라이언트와 도구는 하나만 만들고,
+# 세션별 대화는 메모리 예산(AGENT_POOL_MEMORY_MB)을 넘으면 오래 쉰 세션부터 디스크로 내렸다가 다음 메시지에서 복원
+# 대화는 메시지마다 SQLite(CONVERSATION_DB)에 추가 저장되므로 서버를 재시작해도 이어서 대화 가능
+# 대화 기록이 토큰 예산(CONTEXT_MAX_TOKENS)을 넘으면 오래된 도구 결과를 줄이고, 그래도 크면 이전 턴을 요약
+@st.cache_resource
+def get_agent_pool():
+    return AgentPool(
+        tools=[calculator, current_time, use_aws, python_repl_tool, artifact_tool],
+        # MOCK_MODEL 환경 변수를 지정하면 Bedrock 대신 오프라인 모의 모델 사용 (네트워크 없이 UI/오케스트레이션 측정)
+        # 사용자가 기다리는 대화이므로 같은 프로세스의 배치 작업보다 먼저 모델 요청 한도(MODEL_RPM/MODEL_TPM)를 받음
+        model=create_model(priority="interactive"),
+        conversation_manager_factory=TokenBudgetConversationManager,
+    )
 
-# 채팅 히스토리 초기화
-if "messages" not in st.session_state:
-    st.session_state.messages = []
+# 세션 ID는 URL(?sid=...)에 보관: 새로고침이나 서버 재시작 후에도 같은 대화로 재접속
+if "sid" not in st.query_params:
+    st.query_params["sid"] = uuid.uuid4().hex
+session_id = st.query_params["sid"]
+agent_pool = get_agent_pool()
+store = agent_pool.store
 
-# 채팅 히스토리 표시
-for message in st.session_state.messages:
+# 채팅 히스토리 (화면 표시용)도 대화와 같은 저장소에 추가 저장
+def add_history(message):
+    store.append_history(session_id, message)
+
+# 메시지 하나 표시 (마크다운 변환은 브라우저에서 하므로 서버에서 캐시할 것이 없음:
+# rerun 비용은 그리는 메시지 수로 줄임)
+def render_message(message):
     with st.chat_message(message["role"]):
-        if message["role"] == "user":
-            st.markdown(message["content"])
-        else:
-            # 생각 과정 표시
-            if message.get("thinking_steps"):
-                with st.expander("🧠 생각 과정 보기", expanded=False):
-                    for step in message["thinking_steps"]:
-                        st.markdown(step)
-            # 최종 응답 표시
-            st.markdown(message["content"])
+        # 생각 과정 표시 (여러 단계를 요소 하나로 합쳐서 그림)
+        thinking = "\n\n".join(message.get("thinking_steps") or [])
+        if thinking:
+            with st.expander("🧠 생각 과정 보기", expanded=False):
+                st.markdown(thinking)
+        # 최종 응답 표시
+        st.markdown(message["content"])
+
+# 채팅 히스토리 표시: 최근 RECENT_MESSAGES 개만 전부 그리고, 그 이전은 요청할 때 한 페이지씩만 불러와 그림
+if st.session_state.get("history_sid") != session_id:
+    st.session_state.history_sid = session_id
+    st.session_state.history_page = None
+recent = store.history(session_id, limit=RECENT_MESSAGES)
+older = store.history_count(session_id) - len(recent) if len(recent) == RECENT_MESSAGES else 0
+if older:
+    pages = math.ceil(older / HISTORY_PAGE)
+    page = st.session_state.history_page
+    if page is None:
+        if st.button(f"⬆️ 이전 대화 {older}개 보기"):
+            st.session_state.history_page = 0
+            st.rerun()
+    else:
+        with st.container(border=True):
+            left, middle, right, close = st.columns([1, 2, 1, 1])
+            if left.button("⬅️ 더 이전", disabled=page >= pages - 1):
+                st.session_state.history_page = page + 1
+                st.rerun()
+            middle.caption(f"이전 대화 {pages - page}/{pages} 페이지")
+            if right.button("다음 ➡️", disabled=page == 0):
+                st.session_state.history_page = page - 1
+                st.rerun()
+            if close.button("접기"):
+                st.session_state.history_page = None
+                st.rerun()
+            for _, message in store.history(
+                session_id, limit=HISTORY_PAGE, before=recent[0][0], offset=page * HISTORY_PAGE
+            ):
+                render_message(message)
+for _, message in recent:
+    render_message(message)
+
+# 응답이 끝날 때까지 이 세션의 Agent 를 빌려 사용 (사용 중에는 디스크로 내려가지 않음)
+# 같은 URL 을 연 여러 탭이 한 Agent 로 동시에 턴을 실행하지 않도록, 다른 탭의 턴이 끝날 때까지 대기열에서 기다림
+@contextlib.contextmanager
+def lease_session():
+    notice = st.empty()
+    if agent_pool.busy(session_id):
+        notice.info("⏳ 다른 탭에서 이 대화의 답변을 생성하고 있습니다. 끝나면 이어서 답변합니다.")
+    try:
+        with agent_pool.session(session_id, timeout=TURN_WAIT_SECONDS) as agent:
+            notice.empty()
+            yield agent
+    except SessionBusy:
+        notice.warning("다른 탭의 답변이 끝나지 않아 메시지를 보내지 못했습니다. 잠시 후 다시 보내주세요.")
+        st.stop()
 
 # 사용자 입력
 if prompt := st.chat_input("메시지를 입력하세요..."):
-    # 사용자 메시지 추가 및 표시
-    st.session_state.messages.append({"role": "user", "content": prompt})
-    with st.chat_message("user"):
-        st.markdown(prompt)
-
-    # Assistant 응답 생성
-    with st.chat_message("assistant"):
-        # 메인 컨테이너 생성
-        main_container = st.container()
-
-        try:
-            # 비동기 함수 정의
-            async def run_agent():
-                final_response = ""
-                current_text = ""
-                tool_info = {}
-                current_text_box = None
-
-                # Agent 스트림 실행
-                agent_stream = st.session_state.agent.stream_async(prompt)
-
-                async for event in agent_stream:
-                    # 텍스트 스트리밍
-                    if "data" in event:
-                        text = event["data"]
-                        current_text += text
-
-                        # 현재 텍스트 박스가 없으면 새로 생성
-                        if current_text_box is None:
-                            with main_container:
-                                current_text_box = st.empty()
-
-                        # 텍스트 박스에 현재 텍스트 표시
-                        current_text_box.info(current_text)
-
-                    # 도구 호출 정보
-                    elif "current_tool_use" in event:
-                        # 현재 텍스트가 있으면 박스 마무리
-                        if current_text:
-                            current_text_box = None
-                            current_text = ""
-
-                        current_tool_use = event["current_tool_use"]
-                        tool_name = current_tool_use.get("name", "")
-                        tool_input = current_tool_use.get("input", {})
-                        tool_use_id = current_tool_use.get("toolUseId", "")
-
-                        # 도구 정보 저장
-                        if tool_use_id not in tool_info:
-                            tool_info[tool_use_id] = {
-                                "name": tool_name,
-                                "input": tool_input,
-                                "result": None
-                            }
-
-                            # 실시간으로 도구 호출 표시
-                            with main_container:
-                                if tool_input:
-                                    st.warning(f"🔧 **도구 호출:** `{tool_name}`\n\n**입력:**\n```json\n{json.dumps(tool_input, indent=2, ensure_ascii=False)}\n```")
-                                else:
-                                    st.warning(f"🔧 **도구 호출:** `{tool_name}`")
-
-                    # 도구 결과
-                    elif "message" in event:
-                        message = event["message"]
-                        if "content" in message:
-                            content = message["content"]
-                            if content and "toolResult" in content[0]:
-                                tool_result = content[0]["toolResult"]
-                                tool_use_id = tool_result["toolUseId"]
-                                tool_content = tool_result["content"]
-                                result_text = tool_content[0].get("text", "") if tool_content else ""
-
-                                # 도구 결과 저장 및 표시
-                                if tool_use_id in tool_info:
-                                    tool_info[tool_use_id]["result"] = result_text
-
-                                    with main_container:
-                                        st.success(f"✅ **도구 결과:** {result_text[:200]}...")
-
-                    # 최종 결과
-                    elif "result" in event:
-                        # 현재 텍스트가 있으면 박스 마무리
-                        if current_text:
-                            current_text_box = None
-
-                        final = event["result"]
-                        message = final.message
-                        if message:
-                            content = message.get("content", [])
-                            if content:
-                                final_response = content[0].get("text", "")
-
-                return final_response, tool_info
-
-            # 비동기 함수 실행
-            final_response, tool_info = asyncio.run(run_agent())
-
-            # 최종 응답 표시 (일반 텍스트로)
-            with main_container:
-                st.markdown("---")
-                st.markdown(final_response)
-
-            # 메시지 저장 (reasoning 정보 포함)
-            reasoning_text = ""
-            if tool_info:
-                reasoning_text = "### 🔧 사용된 도구\n\n"
-                for tool_id, info in tool_info.items():
-                    reasoning_text += f"**도구명:** `{info['name']}`\n\n"
-                    reasoning_text += f"**입력:** `{json.dumps(info['input'], ensure_ascii=False)}`\n\n"
-                    if info['result']:
-                        reasoning_text += f"**결과:** {info['result'][:200]}...\n\n"
-                    reasoning_text += "---\n\n"
-
-            st.session_state.messages.append({
-                "role": "assistant",
-                "content": final_response,
-                "thinking_steps": [reasoning_text] if reasoning_text else None
-            })
-
-        except Exception as e:
-            import traceback
-            error_message = f"오류가 발생했습니다: {str(e)}\n\n```\n{traceback.format_exc()}\n```"
-            st.error(error_message)
-            st.session_state.messages.append({"role": "assistant", "content": f"오류: {str(e)}"})
+    with lease_session() as agent:
+        # 사용자 메시지 추가 및 표시
+        add_history({"role": "user", "content": prompt})
+        with st.chat_message("user"):
+            st.markdown(prompt)
+
+        # Assistant 응답 생성
+        with st.chat_message("assistant"):
+            # 생성 중지 버튼: 클릭하면 Streamlit 이 스크립트를 다시 실행하면서 현재 실행을 중단시키고,
+            # 스트림 취소와 함께 실행 중인 도구의 자식 프로세스도 종료됨
+            stop_slot = st.empty()
+            stop_slot.button("⏹️ 생성 중지", key="stop_generation")
+            status = st.empty()
+
+            # 메인 컨테이너 생성
+            main_container = st.container()
+
+            try:
+                live_output = {"box": None, "text": ""}
+
+                # 도구 출력 표시 함수 (마지막 LIVE_OUTPUT_CHARS 글자만 유지)
+                def show_tool_output(output_event):
+                    if live_output["box"] is None:
+                        with main_container:
+                            live_output["box"] = st.empty()
+                    live_output["text"] = (live_output["text"] + output_event["text"])[-LIVE_OUTPUT_CHARS:]
+                    live_output["box"].code(live_output["text"])
+
+                # 스트리밍 텍스트 박스 생성: 완성된 문단은 한 번만 추가하고, 작성 중인 문단만 프레임 단위로 갱신
+                def new_text_renderer():
+                    with main_container:
+                        box = st.container(border=True)
+                    with box:
+                        body = st.container()
+                        tail = st.empty()
+                    return DeltaRenderer(append=body.markdown, update=tail.markdown)
+
+                # 사용된 도구 정보를 대화 기록에 저장할 reasoning 텍스트로 정리
+                def tool_steps(tool_info):
+                    if not tool_info:
+                        return None
+                    reasoning_text = "### 🔧 사용된 도구\n\n"
+                    for tool_id, info in tool_info.items():
+                        reasoning_text += f"**도구명:** `{info['name']}`\n\n"
+                        reasoning_text += f"**입력:** `{json.dumps(info['input'], ensure_ascii=False)}`\n\n"
+                        if info['result']:
+                            reasoning_text += f"**결과:** {info['result'][:200]}...\n\n"
+                        reasoning_text += "---\n\n"
+                    return [reasoning_text]
+
+                # Agent 실행: 스트림은 백그라운드 이벤트 루프에서 돌고, 이벤트는 큐를 통해 이 스레드에서 표시
+                def run_agent():
+                    final_response = ""
+                    tool_info = {}
+                    # 아직 메시지로 확정되지 않은 이번 응답의 텍스트 (중지 시 잘린 응답으로 저장)
+                    partial = []
+                    renderer = None
+                    recorder = EventRecorder(STREAM_RECORD_FILE) if STREAM_RECORD_FILE else None
+                    started = time.monotonic()
+
+                    # Agent 스트림 실행 (도구 실행 중 출력(stdout/stderr)도 같은 큐로 도착)
+                    events = get_event_loop().stream(
+                        lambda: agent.stream_async(prompt, invocation_state={"session_id": session_id}),
+                        heartbeat=HEARTBEAT_INTERVAL,
+                    )
+                    try:
+                        # 중단되면 closing 이 스트림을 취소하고 끝날 때까지 기다린 뒤 아래 except 로 넘어감
+                        with contextlib.closing(events):
+                            for kind, event in events:
+                                # 경과 시간 표시 (긴 도구 실행 중에도 Streamlit 이 중지 버튼 클릭을 확인할 수 있도록)
+                                if kind == "tick":
+                                    status.caption(f"⏳ 실행 중... {time.monotonic() - started:.0f}초")
+
+                                # 도구 실행 중 출력을 실시간으로 표시
+                                elif kind == "output":
+                                    show_tool_output(event)
+
+                                # 텍스트 스트리밍
+                                elif "data" in event:
+                                    text = event["data"]
+                                    partial.append(text)
+                                    if recorder is not None:
+                                        recorder.record(text)
+
+                                    # 현재 텍스트 박스가 없으면 새로 생성
+                                    if renderer is None:
+                                        renderer = new_text_renderer()
+
+                                    # 토큰을 모아 두었다가 프레임 간격(기본 50ms)마다 변경분만 표시
+                                    renderer.write(text)
+
+                                # 도구 호출 정보
+                                elif "current_tool_use" in event:
+                                    # 현재 텍스트가 있으면 남은 토큰을 표시하고 박스 마무리
+                                    if renderer is not None:
+                                        renderer.close()
+                                        renderer = None
+
+                                    current_tool_use = event["current_tool_use"]
+                                    tool_name = current_tool_use.get("name", "")
+                                    tool_input = current_tool_use.get("input", {})
+                                    tool_use_id = current_tool_use.get("toolUseId", "")
+
+                                    # 도구 정보 저장
+                                    if tool_use_id not in tool_info:
+                                        # 새 도구 호출이면 실시간 출력 박스도 새로 시작
+                                        live_output["box"] = None
+                                        live_output["text"] = ""
+
+                                        tool_info[tool_use_id] = {
+                                            "name": tool_name,
+                                            "input": tool_input,
+                                            "result": None
+                                        }
+
+                                        # 실시간으로 도구 호출 표시
+                                        with main_container:
+                                            if tool_input:
+                                                st.warning(f"🔧 **도구 호출:** `{tool_name}`\n\n**입력:**\n```json\n{json.dumps(tool_input, indent=2, ensure_ascii=False)}\n```")
+                                            else:
+                                                st.warning(f"🔧 **도구 호출:** `{tool_name}`")
+
+                                # 도구 결과
+                                elif "message" in event:
+                                    message = event["message"]
+                                    partial.clear()
+                                    if "content" in message:
+                                        content = message["content"]
+                                        if content and "toolResult" in content[0]:
+                                            tool_result = content[0]["toolResult"]
+                                            tool_use_id = tool_result["toolUseId"]
+                                            tool_content = tool_result["content"]
+                                            result_text = tool_content[0].get("text", "") if tool_content else ""
+
+                                            # 도구 결과 저장 및 표시
+                                            if tool_use_id in tool_info:
+                                                tool_info[tool_use_id]["result"] = result_text
+
+                                                with main_container:
+                                                    st.success(f"✅ **도구 결과:** {result_text[:200]}...")
+
+                                # 최종 결과
+                                elif "result" in event:
+                                    # 현재 텍스트가 있으면 남은 토큰을 표시하고 박스 마무리
+                                    if renderer is not None:
+                                        renderer.close()
+                                        renderer = None
+
+                                    final = event["result"]
+                                    message = final.message
+                                    if message:
+                                        content = message.get("content", [])
+                                        if content:
+                                            final_response = content[0].get("text", "")
+                    except BaseException as e:
+                        # 중지 버튼(또는 새 입력)으로 중단됐거나 오류로 끝난 턴: 다음 턴에서도 대화 기록이 유효하도록
+                        # 답이 없는 도구 호출에 결과를 채우고 지금까지의 텍스트를 잘린 응답으로 추가
+                        # (Streamlit 의 중단은 Exception 이 아닌 BaseException: 그 경우만 사용자가 중지한 것으로 기록)
+                        partial_text = "".join(partial)
+                        close_interrupted_turn(agent, partial_text, error=e if isinstance(e, Exception) else None)
+                        if not isinstance(e, Exception):
+                            # Streamlit 이 스크립트를 중단한 경우라 화면에는 더 그릴 수 없으므로 기록에만 남김
+                            add_history({
+                                "role": "assistant",
+                                "content": f"{partial_text}\n\n_⏹️ 생성이 중지되었습니다._",
+                                "thinking_steps": tool_steps(tool_info),
+                            })
+                        raise
+                    finally:
+                        if renderer is not None:
+                            renderer.close()
+                        if recorder is not None:
+                            recorder.close()
+
+                    return final_response, tool_info
+
+                # 지난 턴에 백그라운드로 요청한 요약이 끝났으면 이번 턴부터 사용 (기다리지 않음)
+                if isinstance(agent.conversation_manager, TokenBudgetConversationManager):
+                    agent.conversation_manager.refresh_digest(agent)
+
+                final_response, tool_info = run_agent()
+                stop_slot.empty()
+                status.empty()
+
+                # 최종 응답 표시 (일반 텍스트로)
+                with main_container:
+                    st.markdown("---")
+                    st.markdown(final_response)
+
+                    # 이번 턴에 대화 기록을 압축했다면 절약한 토큰 표시
+                    conversation_manager = agent.conversation_manager
+                    if isinstance(conversation_manager, TokenBudgetConversationManager) and conversation_manager.reports:
+                        report = conversation_manager.reports[-1]
+                        if report["compacted"]:
+                            st.caption(
+                                f"🗜️ 대화 기록 압축: {report['tokens_before']:,} → {report['tokens_after']:,} 토큰 "
+                                f"(이후 모델 호출마다 약 {report['saved_per_call']:,} 토큰 절약)"
+                            )
+
+                # 메시지 저장 (reasoning 정보 포함)
+                add_history({
+                    "role": "assistant",
+                    "content": final_response,
+                    "thinking_steps": tool_steps(tool_info)
+                })
+
+            except Exception as e:
+                stop_slot.empty()
+                status.empty()
+                import traceback
+                error_message = f"오류가 발생했습니다: {str(e)}\n\n```\n{traceback.format_exc()}\n```"
+                st.error(error_message)
+                add_history({"role": "assistant", "content": f"오류: {str(e)}"})
 
 # 사이드바에 추가 정보
 with st.sidebar:
@@ -172,7 +356,8 @@ with st.sidebar:
     - 🧮 Calculator: 수학 계산
     - ⏰ Current Time: 현재 시간
     - ☁️ AWS: AWS 작업
-    - 🐍 Python REPL: 파이썬 코드 실행
+    - 🐍 Python REPL: 파이썬 코드 실행 (실행 중 출력 실시간 표시)
+    - 📦 Artifact: 긴 실행 결과를 나눠서 읽기/검색
 
     **예시 질문:**
     - "80을 4로 나눈 값은?"
@@ -180,6 +365,15 @@ with st.sidebar:
     - "10의 제곱근을 계산해줘"
     """)
 
+    # 프로세스 전체 모델 요청 한도 대기열 (shared/rate_limiter.py)
+    limiter_stats = limiter.stats()
+    st.caption(
+        f"모델 요청 대기: {sum(limiter_stats['queued'].values())}건 · "
+        f"대화 대기 p95 {limiter_stats['queue_wait_ms']['interactive'].get('p95', 0):.0f}ms · "
+        f"스로틀링 {limiter_stats['throttled']}회"
+    )
+
     if st.button("대화 초기화"):
-        st.session_state.messages = []
+        agent_pool.delete(session_id)
+        st.query_params["sid"] = uuid.uuid4().hex
         st.rerun()
@@ -0,0 +1,271 @@
+import os
+import json
+import time
+import logging
+import threading
+import contextlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from strands import Agent
+from strands.hooks import MessageAddedEvent
+from strands.session import SessionManager
+from strands.agent.conversation_manager import ConversationManager
+
+from tools.conversation_store import ConversationStore
+
+# Simple logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Conversation state of all sessions kept in memory, in MiB (0 = unlimited)
+MEMORY_BUDGET_MB = float(os.getenv("AGENT_POOL_MEMORY_MB", "256"))
+
+
+def _json_default(value: Any) -> Any:
+    # Images / documents are raw bytes in the messages; count their size
+    if isinstance(value, (bytes, bytearray)):
+        return "x" * len(value)
+    return str(value)
+
+
+def _serialized_size(value: Any) -> int:
+    return len(json.dumps(value, default=_json_default))
+
+
+def estimate_size(agent: Agent) -> int:
+    """Approximate memory held by one conversation: the serialized size of its messages and state."""
+    return _serialized_size({"messages": agent.messages, "state": agent.state.get()})
+
+
+class _Entry:
+    """
+    A pooled agent and its size. Serializing a long conversation on every lease is
+    expensive, so messages are counted as they are added; messages the conversation
+    manager later shrinks or drops are only subtracted by a full measurement, which
+    runs when the pool is over its budget (the count can only overestimate).
+    """
+
+    def __init__(self, session_id: str, agent: Agent, session_manager: SessionManager):
+        self.session_id = session_id
+        self.agent = agent
+        self.session_manager = session_manager
+        self.messages_size = _serialized_size(agent.messages)
+        self.state_size = _serialized_size(agent.state.get())
+        self.measured = True
+        self.leases = 0
+        self.last_used = time.monotonic()
+        # Held for a whole lease: one Agent must not run two turns at once
+        self.turn = threading.Lock()
+        agent.hooks.add_callback(MessageAddedEvent, self._message_added)
+
+    @property
+    def size(self) -> int:
+        return self.messages_size + self.state_size
+
+    def _message_added(self, event: MessageAddedEvent) -> None:
+        self.messages_size += _serialized_size(event.message)
+        self.measured = False
+
+    def measure(self) -> None:
+        self.messages_size = _serialized_size(self.agent.messages)
+        self.measured = True
+
+
+class SessionBusy(Exception):
+    """Another lease of the session (e.g. a turn in a second browser tab) did not end in time."""
+
+
+class AgentPool:
+    """
+    Server-side agents for many chat sessions under one memory budget.
+
+    The expensive, immutable pieces are created once and shared by every session:
+    the model client (one boto3 client instead of one per browser tab) and the
+    tool objects. Per session only the conversation (``agent.messages`` and
+    ``agent.state``) is kept.
+
+    Every message is persisted through a Strands session manager as it is added
+    (a ``ConversationStore`` by default), so evicting a session costs nothing but
+    dropping the in-memory agent. When the total conversation size exceeds
+    ``memory_budget_mb``, the least recently used idle sessions are evicted; the
+    next ``session()`` call for an evicted id rehydrates the agent from storage.
+
+    A session is leased by one caller at a time: two browser tabs on the same
+    session would otherwise run ``stream_async`` on one ``Agent`` concurrently and
+    interleave its messages (Strands does not guard against that).
+
+    Usage::
+
+        pool = AgentPool(tools=[calculator, python_repl_tool])
+        with pool.session(session_id) as agent:
+            agent("Hello", invocation_state={"session_id": session_id})
+    """
+
+    def __init__(
+        self,
+        tools: Optional[List[Any]] = None,
+        model: Any = None,
+        system_prompt: Optional[str] = None,
+        memory_budget_mb: float = MEMORY_BUDGET_MB,
+        store: Optional[ConversationStore] = None,
+        session_manager_factory: Optional[Callable[[str], SessionManager]] = None,
+        conversation_manager_factory: Optional[Callable[[], ConversationManager]] = None,
+        **agent_kwargs: Any,
+    ):
+        if model is None or isinstance(model, str):
+            from strands.models import BedrockModel
+
+            model = BedrockModel(model_id=model) if model else BedrockModel()
+        self.model = model
+        self.tools = list(tools or [])
+        self.system_prompt = system_prompt
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.store = store or ConversationStore()
+        self.session_manager_factory = session_manager_factory or self.store.session_manager
+        # Conversation managers keep per-conversation state, so every agent gets its own
+        self.conversation_manager_factory = conversation_manager_factory
+        self.agent_kwargs = {"callback_handler": None, **agent_kwargs}
+        self.hydrations = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _create(self, session_id: str) -> _Entry:
+        session_manager = self.session_manager_factory(session_id)
+        agent = Agent(
+            model=self.model,
+            tools=self.tools,
+            system_prompt=self.system_prompt,
+            session_manager=session_manager,
+            conversation_manager=self.conversation_manager_factory() if self.conversation_manager_factory else None,
+            **self.agent_kwargs,
+        )
+        return _Entry(session_id, agent, session_manager)
+
+    @contextlib.contextmanager
+    def session(self, session_id: str, timeout: Optional[float] = None) -> Iterator[Agent]:
+        """
+        Lease the agent of ``session_id`` (created or rehydrated on demand).
+
+        Leases of one session are exclusive: a second one waits up to ``timeout``
+        seconds (None = until the first ends) and then raises ``SessionBusy``.
+        A leased session is never evicted. When the block exits, its state is
+        saved and the pool is trimmed to the budget (messages added during the
+        lease are already counted; see ``_Entry``). If the counted sizes exceed
+        the budget, this session and every idle one not measured since its
+        last lease are measured first.
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                entry.leases += 1
+                self._entries.move_to_end(session_id)
+        if entry is None:
+            # Build the agent outside the lock; reading a long conversation from disk takes a while
+            created = self._create(session_id)
+            with self._lock:
+                entry = self._entries.get(session_id)
+                if entry is None:
+                    entry = self._entries[session_id] = created
+                    if created.agent.messages or created.agent.state.get():
+                        self.hydrations += 1
+                entry.leases += 1
+                self._entries.move_to_end(session_id)
+
+        # Waiting counts as a lease, so the entry is not evicted meanwhile
+        if not entry.turn.acquire(timeout=-1 if timeout is None else timeout):
+            with self._lock:
+                entry.leases -= 1
+            raise SessionBusy(f"Session '{session_id}' is in use")
+        try:
+            yield entry.agent
+        finally:
+            try:
+                # Persist state changed outside of an agent invocation (e.g. UI history)
+                try:
+                    entry.session_manager.sync_agent(entry.agent)
+                except Exception as e:
+                    logger.error(f"Failed to save session '{session_id}': {e}")
+                # State is small and may change without a message (e.g. UI history); measure it
+                entry.state_size = _serialized_size(entry.agent.state.get())
+                if self._over_budget():
+                    # Correct the estimates before they evict other sessions
+                    if not entry.measured:
+                        entry.measure()
+                    self._measure_idle()
+            finally:
+                entry.turn.release()
+            with self._lock:
+                entry.leases -= 1
+                entry.last_used = time.monotonic()
+                self._trim()
+
+    def busy(self, session_id: str) -> bool:
+        """Whether a lease of ``session_id`` is running right now."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+        return entry is not None and entry.turn.locked()
+
+    def _over_budget(self) -> bool:
+        with self._lock:
+            return 0 < self.memory_budget < sum(e.size for e in self._entries.values())
+
+    def _measure_idle(self) -> None:
+        """Measure idle sessions whose counted size may be stale, so ``_trim`` evicts by real sizes."""
+        with self._lock:
+            stale = [e for e in self._entries.values() if not e.leases and not e.measured]
+        for entry in stale:
+            # A session leased meanwhile is measured when that lease ends
+            if entry.turn.acquire(blocking=False):
+                try:
+                    entry.measure()
+                finally:
+                    entry.turn.release()
+
+    def _trim(self) -> None:
+        """Evict least recently used idle sessions until the budget is met. Caller holds the lock."""
+        if self.memory_budget <= 0:
+            return
+        total = sum(e.size for e in self._entries.values())
+        for session_id, entry in list(self._entries.items()):
+            if total <= self.memory_budget:
+                break
+            if entry.leases:
+                continue
+            del self._entries[session_id]
+            total -= entry.size
+            self.evictions += 1
+            logger.info(f"Evicted idle session '{session_id}' ({entry.size / 1024:.0f} KiB) to storage")
+
+    def evict(self, session_id: str) -> bool:
+        """Drop one idle session from memory (it stays in storage)."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None or entry.leases:
+                return False
+            del self._entries[session_id]
+            self.evictions += 1
+            return True
+
+    def delete(self, session_id: str) -> None:
+        """Forget a session completely, in memory and in storage."""
+        with self._lock:
+            self._entries.pop(session_id, None)
+        repository = getattr(self.session_manager_factory(session_id), "session_repository", None)
+        if repository is not None and hasattr(repository, "delete_session"):
+            try:
+                repository.delete_session(session_id)
+            except Exception as e:
+                logger.error(f"Failed to delete session '{session_id}': {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions_in_memory": len(self._entries),
+                "leased": sum(1 for e in self._entries.values() if e.leases),
+                "memory_bytes": sum(e.size for e in self._entries.values()),
+                "memory_budget_bytes": self.memory_budget,
+                "hydrations": self.hydrations,
+                "evictions": self.evictions,
+            }
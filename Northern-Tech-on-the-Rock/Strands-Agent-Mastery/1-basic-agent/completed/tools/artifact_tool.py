@@ -0,0 +1,102 @@
+import logging
+from typing import Any, Annotated
+from strands.types.tools import ToolResult, ToolUse
+from tools.decorators import log_io
+from tools.artifacts import get_store
+from tools.session import session_key
+from tools.streaming import bound_text
+
+# Simple logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+MAX_LINES = 500
+
+TOOL_SPEC = {
+    "name": "artifact_tool",
+    "description": "Use this to read large tool outputs that were stored as artifacts. Either page through an artifact by line number or search it with a regular expression.",
+    "inputSchema": {
+        "json": {
+            "type": "object",
+            "properties": {
+                "artifact_id": {
+                    "type": "string",
+                    "description": "The artifact id shown in the tool output summary."
+                },
+                "action": {
+                    "type": "string",
+                    "enum": ["page", "grep"],
+                    "description": "'page' returns a range of lines, 'grep' returns the lines matching `pattern`."
+                },
+                "offset": {
+                    "type": "integer",
+                    "description": "page: 0-based line to start from (default 0)."
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": f"page: number of lines to return (default 100, max {MAX_LINES})."
+                },
+                "pattern": {
+                    "type": "string",
+                    "description": "grep: regular expression to search for."
+                },
+                "context": {
+                    "type": "integer",
+                    "description": "grep: number of lines to show around each match (default 0)."
+                }
+            },
+            "required": ["artifact_id", "action"]
+        }
+    }
+}
+
+@log_io
+def handle_artifact_tool(
+    artifact_id: Annotated[str, "The artifact id shown in the tool output summary."],
+    action: Annotated[str, "'page' or 'grep'"],
+    session_id: str = "default",
+    offset: int = 0,
+    limit: int = 100,
+    pattern: str = "",
+    context: int = 0,
+):
+    """Use this to page through or grep a stored tool output."""
+    store = get_store(session_id)
+    try:
+        if action == "page":
+            text = store.read_lines(artifact_id, offset=max(0, offset), limit=min(max(1, limit), MAX_LINES))
+        elif action == "grep":
+            if not pattern:
+                return "Error reading artifact: 'pattern' is required for grep"
+            text = store.grep(artifact_id, pattern, context=min(max(0, context), 20))
+        else:
+            return f"Error reading artifact: unknown action '{action}'"
+    except FileNotFoundError:
+        return f"Error reading artifact: no artifact '{artifact_id}' in this session"
+    except Exception as e:
+        logger.error(f"Error reading artifact {artifact_id}: {str(e)}")
+        return f"Error reading artifact: {str(e)}"
+
+    # Long lines could still make a page huge
+    return bound_text(text)
+
+# Function name must match tool name
+def artifact_tool(tool: ToolUse, **kwargs: Any) -> ToolResult:
+    tool_use_id = tool["toolUseId"]
+    tool_input = tool["input"]
+
+    result = handle_artifact_tool(
+        tool_input["artifact_id"],
+        tool_input["action"],
+        session_id=session_key(kwargs),
+        offset=int(tool_input.get("offset", 0)),
+        limit=int(tool_input.get("limit", 100)),
+        pattern=tool_input.get("pattern", ""),
+        context=int(tool_input.get("context", 0)),
+    )
+
+    return {
+        "toolUseId": tool_use_id,
+        "status": "error" if result.startswith("Error reading artifact") else "success",
+        "content": [{"text": result}]
+    }
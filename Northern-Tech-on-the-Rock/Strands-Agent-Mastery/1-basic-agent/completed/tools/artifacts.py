@@ -0,0 +1,230 @@
+import os
+import re
+import time
+import hashlib
+import contextlib
+import tempfile
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+from tools.session import session_dir
+from tools.streaming import BoundedBuffer, bound_text
+
+# Outputs larger than this many bytes are stored as an artifact instead of being
+# returned to the model in full (0 disables spilling)
+SPILL_THRESHOLD = int(os.getenv("TOOL_ARTIFACT_THRESHOLD", "4096"))
+
+# How much of a spilled output is shown inline in the tool result
+SUMMARY_LINES = 15
+SUMMARY_LINE_CHARS = 200
+
+# Retention of each session's store, applied whenever an artifact is stored:
+# artifacts older than this many seconds are deleted, then the oldest ones until
+# the store is under this many bytes (0 = no limit)
+MAX_AGE = float(os.getenv("TOOL_ARTIFACT_MAX_AGE", str(24 * 3600)))
+MAX_BYTES = int(os.getenv("TOOL_ARTIFACT_MAX_BYTES", str(256 * 1024 * 1024)))
+
+ID_LENGTH = 16
+
+
+class ArtifactWriter:
+    """Streams bytes into a temporary file while hashing them; ``commit`` moves it to its content address."""
+
+    def __init__(self, store: "ArtifactStore"):
+        self.store = store
+        self.size = 0
+        self.lines = 0
+        self._last_byte = b""
+        self._hash = hashlib.sha256()
+        os.makedirs(store.root, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(dir=store.root, suffix=".partial")
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        self._file.write(chunk)
+        self._hash.update(chunk)
+        self.size += len(chunk)
+        self.lines += chunk.count(b"\n")
+        self._last_byte = chunk[-1:]
+
+    def commit(self) -> Dict[str, int]:
+        """Finish writing and return ``{"id", "size", "lines"}`` of the stored artifact."""
+        self._file.close()
+        artifact_id = self._hash.hexdigest()[:ID_LENGTH]
+        path = self.store.path(artifact_id)
+        if os.path.exists(path):
+            # Same content was stored before; it counts as new for the retention
+            os.remove(self._tmp_path)
+            os.utime(path)
+        else:
+            os.replace(self._tmp_path, path)
+        self.store.prune(keep=os.path.basename(path))
+        lines = self.lines + (1 if self._last_byte not in (b"", b"\n") else 0)
+        return {"id": artifact_id, "size": self.size, "lines": lines}
+
+    def discard(self) -> None:
+        """Delete the temporary file; does nothing once committed or discarded."""
+        if self._file.closed:
+            return
+        self._file.close()
+        os.remove(self._tmp_path)
+
+
+class ArtifactStore:
+    """
+    Content-addressed store for oversized tool outputs, kept under the session directory.
+
+    Artifacts are plain UTF-8 text files named after the first characters of
+    their SHA-256, so storing the same output twice costs nothing. The store is
+    bounded by ``max_age`` (seconds) and ``max_bytes``, oldest first.
+    """
+
+    def __init__(self, root: str, threshold: int = SPILL_THRESHOLD, max_age: float = MAX_AGE, max_bytes: int = MAX_BYTES):
+        self.root = root
+        self.threshold = threshold
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+
+    def path(self, artifact_id: str) -> str:
+        if not re.fullmatch(r"[0-9a-f]{%d}" % ID_LENGTH, artifact_id):
+            raise ValueError(f"Invalid artifact id '{artifact_id}'")
+        return os.path.join(self.root, f"{artifact_id}.txt")
+
+    def prune(self, keep: Optional[str] = None) -> None:
+        """
+        Delete expired artifacts (and temporary files left by a crashed process),
+        then the oldest artifacts while the store is over ``max_bytes``. ``keep``
+        (the file name of the artifact just stored) is never deleted.
+        """
+        now = time.time()
+        files = []
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                with contextlib.suppress(FileNotFoundError):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.name))
+        files.sort()
+        total = sum(size for _, size, name in files if name.endswith(".txt"))
+        for mtime, size, name in files:
+            expired = self.max_age > 0 and now - mtime > self.max_age
+            if name.endswith(".partial"):
+                remove = expired
+            else:
+                remove = name != keep and (expired or 0 < self.max_bytes < total)
+            if remove:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(os.path.join(self.root, name))
+                if name.endswith(".txt"):
+                    total -= size
+
+    def writer(self) -> Optional[ArtifactWriter]:
+        """A writer to tee a stream into, or None when spilling is disabled."""
+        return ArtifactWriter(self) if self.threshold > 0 else None
+
+    def put(self, text: str) -> Dict[str, int]:
+        writer = ArtifactWriter(self)
+        writer.write(text.encode("utf-8"))
+        return writer.commit()
+
+    def spill(self, buffer: BoundedBuffer, writer: Optional[ArtifactWriter]) -> str:
+        """
+        Turn a streamed output into tool-result text.
+
+        Small (or empty) outputs are returned as-is; larger ones are committed as
+        an artifact and replaced by a compact summary. Only spill the streams that
+        end up in the result: the caller discards the other writers.
+        """
+        if writer is None:
+            return buffer.text()
+        if buffer.total <= self.threshold:
+            writer.discard()
+            return buffer.text()
+        artifact = writer.commit()
+        return summarize(artifact, buffer.head_text(), buffer.tail_text())
+
+    def spill_text(self, text: str) -> str:
+        """Same as ``spill`` for output that is already in memory."""
+        if self.threshold <= 0:
+            return bound_text(text)
+        if len(text.encode("utf-8")) <= self.threshold:
+            return text
+        return summarize(self.put(text), text, text)
+
+    def read_lines(self, artifact_id: str, offset: int = 0, limit: int = 100) -> str:
+        """Return ``limit`` lines starting at line ``offset`` (0-based), prefixed with line numbers."""
+        selected = []
+        total = 0
+        with open(self.path(artifact_id), encoding="utf-8", errors="replace") as f:
+            for number, line in enumerate(f):
+                total = number + 1
+                if offset <= number < offset + limit:
+                    selected.append(f"{number + 1:>6}: {line.rstrip(chr(10))}")
+        header = f"[artifact {artifact_id}: lines {offset + 1}-{offset + len(selected)} of {total}]"
+        return "\n".join([header, *selected])
+
+    def grep(self, artifact_id: str, pattern: str, context: int = 0, max_matches: int = 50) -> str:
+        """Return lines matching the regular expression ``pattern`` with ``context`` lines around them."""
+        regex = re.compile(pattern)
+        before = deque(maxlen=context)
+        output = []
+        matches = 0
+        after = 0
+        last_shown = None
+        with open(self.path(artifact_id), encoding="utf-8", errors="replace") as f:
+            for number, line in enumerate(f, start=1):
+                line = line.rstrip("\n")
+                is_match = regex.search(line) is not None
+                if is_match:
+                    matches += 1
+                if is_match and matches <= max_matches:
+                    for n, previous in before:
+                        if last_shown is not None and n > last_shown + 1:
+                            output.append("    --")
+                        output.append(f"{n:>6}: {previous}")
+                        last_shown = n
+                    before.clear()
+                    if last_shown is not None and number > last_shown + 1:
+                        output.append("    --")
+                    output.append(f"{number:>6}: {line}")
+                    last_shown = number
+                    after = context
+                elif after > 0:
+                    output.append(f"{number:>6}: {line}")
+                    last_shown = number
+                    after -= 1
+                elif context:
+                    before.append((number, line))
+
+        header = f"[artifact {artifact_id}: {matches} matching lines"
+        header += f", showing first {max_matches}]" if matches > max_matches else "]"
+        return "\n".join([header, *output])
+
+
+def summarize(artifact: Dict[str, int], head: str, tail: str) -> str:
+    """Compact stand-in for a large output: size, line count, a few head/tail lines and the artifact id."""
+    def clip(lines):
+        return "\n".join(line[:SUMMARY_LINE_CHARS] for line in lines)
+
+    head_lines = head.splitlines()[:SUMMARY_LINES]
+    tail_lines = tail.splitlines()[-SUMMARY_LINES:]
+    return (
+        f"[Output too large: {artifact['size']:,} bytes, {artifact['lines']:,} lines. "
+        f"Stored as artifact '{artifact['id']}'; use artifact_tool to page through or grep it.]\n"
+        f"--- first {len(head_lines)} lines ---\n{clip(head_lines)}\n"
+        f"--- last {len(tail_lines)} lines ---\n{clip(tail_lines)}\n"
+    )
+
+
+_stores: Dict[str, ArtifactStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(session_id: str) -> ArtifactStore:
+    """The artifact store of one session."""
+    with _stores_lock:
+        if session_id not in _stores:
+            _stores[session_id] = ArtifactStore(os.path.join(session_dir(session_id), "artifacts"))
+        return _stores[session_id]
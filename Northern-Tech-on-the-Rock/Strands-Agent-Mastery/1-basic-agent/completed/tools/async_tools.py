@@ -0,0 +1,55 @@
+"""
+asyncio-native versions of `bash_tool` and `python_repl_tool`.
+
+The tools have the same names, descriptions and inputs as the module-based tools,
+so they can be swapped in without changing prompts:
+
+    from tools import bash_tool, python_repl_tool              # sync (a thread per running tool)
+    from tools.async_tools import bash_tool, python_repl_tool  # async (no blocked threads)
+
+Child processes are started with `asyncio.create_subprocess_*`, so several tool
+uses in one turn (or several Streamlit sessions in one process) run concurrently
+on the event loop. Cancelling the agent stream kills the running children.
+"""
+from typing import Any, Dict
+from strands import tool
+from strands.types.tools import ToolContext
+
+from tools import bash_tool as sync_bash_tool
+from tools import python_repl_tool as sync_python_repl_tool
+from tools.bash_tool import handle_bash_tool_async
+from tools.python_repl_tool import handle_python_repl_tool_async
+from tools.session import session_key
+
+
+def _session_id(tool_context: ToolContext) -> str:
+    invocation_state = getattr(tool_context, "invocation_state", None) or {"agent": tool_context.agent}
+    return session_key(invocation_state)
+
+
+def _result(text: str, failed: bool) -> Dict[str, Any]:
+    return {"status": "error" if failed else "success", "content": [{"text": text}]}
+
+
+@tool(name="bash_tool", description=sync_bash_tool.TOOL_SPEC["description"], context=True)
+async def bash_tool(cmd: str, tool_context: ToolContext) -> Dict[str, Any]:
+    """
+    Use this to execute bash command and do necessary operations.
+
+    Args:
+        cmd: The bash command to be executed.
+    """
+    result = await handle_bash_tool_async(cmd, session_id=_session_id(tool_context))
+    return _result(result, sync_bash_tool.is_error(result))
+
+
+@tool(name="python_repl_tool", description=sync_python_repl_tool.TOOL_SPEC["description"], context=True)
+async def python_repl_tool(code: str, tool_context: ToolContext) -> Dict[str, Any]:
+    """
+    Use this to execute python code and do data analysis or calculation.
+
+    Args:
+        code: The python code to execute to do further analysis or calculation.
+    """
+    result = await handle_python_repl_tool_async(code, session_id=_session_id(tool_context))
+    return _result(result, sync_python_repl_tool.is_error(result))
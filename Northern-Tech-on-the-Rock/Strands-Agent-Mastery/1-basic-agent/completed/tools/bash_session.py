@@ -0,0 +1,352 @@
+import os
+import time
+import uuid
+import queue
+import shlex
+import atexit
+import codecs
+import signal
+import logging
+import threading
+import subprocess
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from tools.streaming import BoundedBuffer, OutputEvent, current_listener
+
+# Simple logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Seconds a command gets to exit after SIGINT before the whole shell is restarted
+INTERRUPT_GRACE = 3.0
+LINE_BYTES = 65536
+
+
+class SessionLost(Exception):
+    """The shell exited while the command was queued behind another one."""
+
+
+class BashSession:
+    """
+    A long-lived ``bash`` process that keeps ``cd`` / ``export`` / venv state between commands.
+
+    Each command is sent over stdin as ``eval '<cmd>' < /dev/null`` followed by a
+    ``printf`` of a unique sentinel on stdout (with the exit code and ``$PWD``) and on
+    stderr, so output boundaries and exit codes are recovered exactly. The command's
+    own stdin is ``/dev/null`` so it cannot read the protocol.
+
+    On timeout the process group gets SIGINT; the shell traps it and survives, so
+    only the command stops. If the command ignores SIGINT the shell is killed.
+    """
+
+    def __init__(self, session_id: str, cwd: Optional[str] = None, popen_kwargs: Optional[Dict[str, Any]] = None):
+        self.session_id = session_id
+        self.cwd = cwd or os.getcwd()
+        self.calls = 0
+        self.users = 0
+        self.last_used = time.monotonic()
+        self._lock = threading.Lock()
+        self._events: Optional["queue.Queue[str]"] = None
+        self.proc = subprocess.Popen(
+            ["bash", "--noprofile", "--norc"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=self.cwd,
+            # Own process group, so signals on timeout reach everything the commands started
+            start_new_session=True,
+            **(popen_kwargs or {}),
+        )
+        # The shell survives SIGINT; commands it starts get the default handler back
+        self._send("trap ':' INT\n")
+        logger.info(f"Started bash session pid={self.proc.pid} for session '{session_id}'")
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def _send(self, text: str) -> None:
+        self.proc.stdin.write(text.encode("utf-8"))
+        self.proc.stdin.flush()
+
+    def run(self, cmd: str, timeout: Optional[float] = None, sinks: Optional[Dict[str, Any]] = None,
+            source: str = "bash_tool", notice: str = "") -> Dict[str, Any]:
+        """
+        Run one command in this shell; concurrent calls are serialized.
+
+        Output is streamed to the current ``output_listener`` and bounded like
+        ``stream_process``. ``notice`` is written at the start of stdout.
+
+        Returns:
+            dict with ``returncode``, ``stdout`` / ``stderr`` (``BoundedBuffer``),
+            ``timed_out`` and ``cwd`` (the shell's working directory afterwards)
+        """
+        listener = current_listener()
+        sinks = sinks or {}
+        with self._lock:
+            # The previous command may have killed the shell while this one was waiting
+            if not self.alive():
+                raise SessionLost(f"bash session '{self.session_id}' exited")
+            self.calls += 1
+            stdout, stderr = BoundedBuffer(), BoundedBuffer()
+            if notice:
+                self._write(notice, stdout, sinks.get("stdout"))
+
+            marker = f"__STRANDS_{uuid.uuid4().hex}__"
+            status: Dict[str, Any] = {}
+            self._events = events = queue.Queue()
+            for stream, buffer, result in (("stdout", stdout, status), ("stderr", stderr, None)):
+                threading.Thread(
+                    target=self._pump,
+                    args=(getattr(self.proc, stream), buffer, marker, source, stream, listener, sinks.get(stream), result, events),
+                    daemon=True,
+                ).start()
+
+            try:
+                self._send(
+                    f"eval {shlex.quote(cmd)} < /dev/null\n"
+                    "__strands_rc=$?\n"
+                    f"printf '\\n{marker} %d %s\\n' \"$__strands_rc\" \"$PWD\"\n"
+                    f"printf '\\n{marker}\\n' >&2\n"
+                )
+            except (BrokenPipeError, OSError):
+                # The shell is gone; the readers see EOF and finish on their own
+                pass
+
+            pending, reason = self._wait(events, 2, timeout)
+            timed_out = pending > 0
+            if timed_out:
+                what = f"timed out after {timeout} seconds" if reason == "timeout" else "was cancelled"
+                self._write(f"\nCommand {what}; {self._interrupt(events, pending)}\n", stderr, sinks.get("stderr"))
+            self._events = None
+
+            if "returncode" in status:
+                returncode = status["returncode"]
+                self.cwd = status["cwd"]
+            elif timed_out and self.alive():
+                returncode = 130
+            else:
+                # EOF without a sentinel: the command ran `exit` or the shell was killed
+                returncode = self.proc.wait()
+                if not timed_out:
+                    self._write(f"\nThe shell session exited with code {returncode}.\n", stderr, sinks.get("stderr"))
+
+            self.last_used = time.monotonic()
+            return {"returncode": returncode, "stdout": stdout, "stderr": stderr, "timed_out": timed_out, "cwd": self.cwd}
+
+    @staticmethod
+    def _write(text: str, buffer: BoundedBuffer, sink: Optional[Any]) -> None:
+        data = text.encode("utf-8")
+        buffer.write(data)
+        if sink is not None:
+            sink.write(data)
+
+    @staticmethod
+    def _pump(pipe, buffer: BoundedBuffer, marker: str, source: str, stream: str,
+              listener: Optional[Callable[[OutputEvent], None]], sink: Optional[Any],
+              status: Optional[Dict[str, Any]], events: "queue.Queue[str]") -> None:
+        """
+        Copy one stream up to the sentinel line; the newline printed before the sentinel is dropped.
+
+        Always reads on to the sentinel, even when the sink or listener fails, so the
+        sentinel cannot leak into the next command's output.
+        """
+        sentinel = marker.encode("utf-8")
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        held = b""
+        try:
+            while True:
+                line = pipe.readline(LINE_BYTES)
+                if not line:
+                    break
+                if line.startswith(sentinel):
+                    if status is not None:
+                        returncode, _, cwd = line[len(sentinel):].decode("utf-8", errors="replace").strip("\n").lstrip(" ").partition(" ")
+                        status.update(returncode=int(returncode), cwd=cwd)
+                    break
+                chunk, held = held + line, b""
+                if chunk.endswith(b"\n"):
+                    chunk, held = chunk[:-1], b"\n"
+                if not chunk:
+                    continue
+                buffer.write(chunk)
+                if sink is not None:
+                    try:
+                        sink.write(chunk)
+                    except (OSError, ValueError) as e:
+                        logger.debug(f"Dropping {stream} sink of bash session: {e}")
+                        sink = None
+                if listener is not None:
+                    text = decoder.decode(chunk)
+                    if text:
+                        try:
+                            listener({"source": source, "stream": stream, "text": text})
+                        except Exception as e:
+                            logger.debug(f"Dropping {stream} listener of bash session: {e}")
+                            listener = None
+        except (OSError, ValueError):
+            # The pipe was closed (the shell was killed)
+            pass
+        finally:
+            events.put("done")
+
+    @staticmethod
+    def _wait(events: "queue.Queue[str]", pending: int, timeout: Optional[float]) -> Tuple[int, Optional[str]]:
+        """Wait for ``pending`` readers to finish; returns the number still running and why we stopped waiting."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while pending:
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            try:
+                if remaining is not None and remaining <= 0:
+                    raise queue.Empty
+                event = events.get(timeout=remaining)
+            except queue.Empty:
+                return pending, "timeout"
+            if event == "cancel":
+                return pending, "cancel"
+            pending -= 1
+        return 0, None
+
+    def _interrupt(self, events: "queue.Queue[str]", pending: int) -> str:
+        try:
+            os.killpg(self.proc.pid, signal.SIGINT)
+        except (ProcessLookupError, PermissionError):
+            pass
+        pending, _ = self._wait(events, pending, INTERRUPT_GRACE)
+        if not pending:
+            return "it was interrupted and the shell session was kept."
+        logger.info(f"Command in bash session '{self.session_id}' ignored SIGINT; killing the shell")
+        self.kill()
+        self._wait(events, pending, INTERRUPT_GRACE)
+        return "it did not stop on SIGINT, so the shell was killed (cd/export state is lost)."
+
+    def cancel(self) -> None:
+        """Interrupt the running command from another thread (e.g. when an asyncio task is cancelled)."""
+        events = self._events
+        if events is not None:
+            events.put("cancel")
+
+    def kill(self) -> None:
+        if self.alive():
+            try:
+                os.killpg(self.proc.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                self.proc.kill()
+        self.proc.wait()
+
+
+class BashSessionManager:
+    """
+    ``BashSession`` per session id.
+
+    - At most ``max_sessions`` shells are alive; the least recently used idle one is
+      closed to make room for a new session.
+    - Shells idle for longer than ``idle_timeout`` seconds are closed.
+    - A shell that exited (``exit`` in a command, killed on timeout, ...) is replaced
+      on the next call and the caller is told that the shell state was reset.
+    - ``popen_kwargs`` are passed to every shell's ``Popen`` (e.g. resource limits).
+    """
+
+    def __init__(self, max_sessions: int = 8, idle_timeout: float = 900.0, popen_kwargs: Optional[Dict[str, Any]] = None):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.popen_kwargs = popen_kwargs
+        self._sessions: "OrderedDict[str, BashSession]" = OrderedDict()
+        self._lost_sessions = set()
+        self._lock = threading.Lock()
+        atexit.register(self.shutdown)
+
+    def run(self, cmd: str, session_id: str = "default", timeout: Optional[float] = None,
+            sinks: Optional[Dict[str, Any]] = None, source: str = "bash_tool") -> Dict[str, Any]:
+        """Run a command in the shell of ``session_id`` (see ``BashSession.run``)."""
+        self.evict_idle()
+        while True:
+            session, notice = self._acquire(session_id)
+            try:
+                return session.run(cmd, timeout=timeout, sinks=sinks, source=source, notice=notice)
+            except SessionLost:
+                # Killed by the command queued before this one; _acquire starts a new shell and says so
+                continue
+            finally:
+                with self._lock:
+                    session.users -= 1
+
+    def _acquire(self, session_id: str) -> Tuple[BashSession, str]:
+        notice = ""
+        closed = []
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and not session.alive():
+                self._sessions.pop(session_id)
+                self._lost_sessions.add(session_id)
+                session = None
+            if session is None:
+                while len(self._sessions) >= self.max_sessions:
+                    idle = next((sid for sid, s in self._sessions.items() if not s.users), None)
+                    if idle is None:
+                        break
+                    logger.info(f"Closing bash session '{idle}' (too many sessions)")
+                    closed.append(self._sessions.pop(idle))
+                if session_id in self._lost_sessions:
+                    self._lost_sessions.discard(session_id)
+                    notice = "[Previous shell exited, so the shell state was reset: started a new session, earlier cd/export state is gone.]\n"
+                session = BashSession(session_id, popen_kwargs=self.popen_kwargs)
+                self._sessions[session_id] = session
+            session.users += 1
+            self._sessions.move_to_end(session_id)
+        for old in closed:
+            old.kill()
+        return session, notice
+
+    def cwd(self, session_id: str) -> str:
+        """Working directory of a session's shell (the process cwd if it has none yet)."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+        return session.cwd if session is not None else os.getcwd()
+
+    def cancel(self, session_id: str) -> None:
+        """Interrupt the command running in a session; the shell is kept if it stops on SIGINT."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is not None:
+            session.cancel()
+
+    def evict_idle(self) -> int:
+        """Close shells that have been idle for longer than ``idle_timeout``."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                s for s in self._sessions.values()
+                if not s.users and now - s.last_used > self.idle_timeout
+            ]
+            for session in expired:
+                logger.info(f"Closing idle bash session '{session.session_id}'")
+                self._sessions.pop(session.session_id)
+        for session in expired:
+            session.kill()
+        return len(expired)
+
+    def reset(self, session_id: str) -> None:
+        """Close the shell (and all state) of one session."""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            session.kill()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "shells": {
+                    sid: {"pid": s.proc.pid, "calls": s.calls, "cwd": s.cwd, "busy": bool(s.users)}
+                    for sid, s in self._sessions.items()
+                },
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.kill()
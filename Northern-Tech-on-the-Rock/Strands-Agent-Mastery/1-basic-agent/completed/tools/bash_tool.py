@@ -1,9 +1,16 @@
 import os
+import re
+import asyncio
 import logging
-import subprocess
+import shlex
 from typing import Any, Annotated
 from strands.types.tools import ToolResult, ToolUse
-from tools.decorators import log_io
+from tools.decorators import log_io, memoize
+from tools.artifacts import get_store
+from tools.session import session_key
+from tools.streaming import on_cancel, stream_process, stream_process_async
+from tools.bash_session import BashSessionManager
+from tools.scheduler import scheduler, limits
 
 # Observability
 from opentelemetry import trace
@@ -12,6 +19,12 @@ from opentelemetry import trace
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Created once at import; its spans nest under Strands' "execute_tool bash_tool" span
+tracer = trace.get_tracer(
+    instrumenting_module_name=os.getenv("TRACER_MODULE_NAME", "insight_extractor_agent"),
+    instrumenting_library_version=os.getenv("TRACER_LIBRARY_VERSION", "1.0.0")
+)
+
 TOOL_SPEC = {
     "name": "bash_tool",
     "description": "Use this to execute bash command and do necessary operations.",
@@ -29,6 +42,38 @@ TOOL_SPEC = {
     }
 }
 
+# BASH_TOOL_MODE=session keeps one bash process per session, so `cd`, `export` and
+# activated venvs carry over between calls; "subprocess" starts a new shell per call.
+MODE = os.getenv("BASH_TOOL_MODE", "subprocess")
+if MODE not in ("subprocess", "session"):
+    raise ValueError(f"Unknown BASH_TOOL_MODE '{MODE}', expected 'subprocess' or 'session'")
+# Seconds before a command in a session shell is interrupted (the shell itself is kept)
+SESSION_TIMEOUT = float(os.getenv("BASH_TOOL_TIMEOUT", "600"))
+sessions = BashSessionManager(
+    max_sessions=int(os.getenv("BASH_TOOL_MAX_SESSIONS", "8")),
+    idle_timeout=float(os.getenv("BASH_TOOL_IDLE_TIMEOUT", "900")),
+    # RLIMIT_CPU is per process, so every command in the shell gets its own budget
+    popen_kwargs=limits.popen_kwargs(),
+) if MODE == "session" else None
+if MODE == "session":
+    TOOL_SPEC["description"] += " Commands run in a persistent shell: the working directory, exported variables and activated virtualenvs carry over between calls."
+
+# Opt-in cache for read-only commands (BASH_TOOL_CACHE=1). Entries expire after
+# BASH_TOOL_CACHE_TTL seconds since the files they read may change.
+CACHE_ENABLED = os.getenv("BASH_TOOL_CACHE", "0") == "1"
+CACHE_TTL = float(os.getenv("BASH_TOOL_CACHE_TTL", "60"))
+
+# Commands that only read state; a pipeline is cacheable if every stage starts with one of these
+READ_ONLY_COMMANDS = {
+    "cat", "head", "tail", "wc", "ls", "grep", "egrep", "fgrep", "find", "stat", "file",
+    "du", "df", "pwd", "uname", "whoami", "which", "sort", "uniq", "cut", "tr", "nl",
+    "md5sum", "sha256sum", "jq", "tree", "echo",
+}
+# Redirection, command chaining (including newlines) and substitution make a command unsafe to cache
+_UNSAFE = re.compile(r"[;&<>`\n\r]|\$\(|\|\|")
+# find actions that run commands or write files
+FIND_WRITES = {"-delete", "-exec", "-execdir", "-ok", "-okdir", "-fprint", "-fprint0", "-fprintf", "-fls"}
+
 class Colors:
     GREEN = '\033[92m'
     BLUE = '\033[94m'
@@ -36,46 +81,168 @@ class Colors:
     RED = '\033[91m'
     END = '\033[0m'
 
+def _print_header(cmd):
+    print()  # Add newline before log
+    print(f"{Colors.GREEN}===== Executing Bash command ====={Colors.END}")
+    print(f"{Colors.BLUE}{cmd}{Colors.END}")
+    logger.info(f"\n{Colors.GREEN}Executing Bash: {cmd}{Colors.END}")
+
+def _format_result(cmd, result, store, writers):
+    """Turn a finished `stream_process` result into the tool's text output."""
+    # Streams left unspilled (stderr of a successful command) are discarded by the caller
+    stdout = store.spill(result["stdout"], writers["stdout"])
+
+    if result["returncode"] != 0:
+        stderr = store.spill(result["stderr"], writers["stderr"])
+        # If command fails, return error information
+        error_message = f"Command failed with exit code {result['returncode']}.\nStdout: {stdout}\nStderr: {stderr}"
+        logger.error(f"{Colors.RED}Command failed: {result['returncode']}{Colors.END}")
+
+        return error_message
+
+    # Return stdout as the result
+    results = "||".join([cmd, stdout])
+
+    print(f"{Colors.YELLOW}Output:{Colors.END}")
+    print(stdout)
+    print(f"{Colors.GREEN}===== Command execution successful ====={Colors.END}")
+
+    return results + "\n"
+
+def _error_message(e):
+    # Catch any other exceptions
+    logger.error(f"{Colors.RED}Error: {str(e)}{Colors.END}")
+    return f"Error executing command: {str(e)}"
+
+def _discard(writers):
+    for writer in writers.values():
+        if writer is not None:
+            writer.discard()
+
+def is_read_only(cmd: str) -> bool:
+    """True for simple read-only commands/pipelines such as ``ls -la data | head``."""
+    if _UNSAFE.search(cmd):
+        return False
+    for stage in cmd.split("|"):
+        try:
+            words = shlex.split(stage)
+        except ValueError:
+            return False
+        if not words or words[0] not in READ_ONLY_COMMANDS or _writes_files(words):
+            return False
+    return True
+
+def _writes_files(words):
+    """Options that make an otherwise read-only command write files (conservative: may reject harmless uses)."""
+    command, args = words[0], words[1:]
+    short = [w[1:] for w in args if w.startswith("-") and not w.startswith("--")]
+    if command == "find":
+        return any(w in FIND_WRITES for w in args)
+    if command == "sort":
+        # -o FILE / -uo FILE / --output=FILE
+        return any(w.startswith("--output") for w in args) or any("o" in w for w in short)
+    if command == "tree":
+        # -o FILE, and -R which writes 00Tree.html into every directory
+        return any(w.startswith(("o", "R")) for w in short)
+    if command == "uniq":
+        # `uniq INPUT OUTPUT` writes OUTPUT
+        return len([w for w in args if not w.startswith("-")]) > 1
+    if command == "file":
+        # -C compiles a magic file into the current directory
+        return "--compile" in args or any("C" in w for w in short)
+    return False
+
+def _cacheable(result: str) -> bool:
+    # Failures may be transient, and spilled outputs point at a session's artifact store
+    return not is_error(result) and "Stored as artifact" not in result
+
+def _run(cmd, session_id="default", cwd=None):
+    # ``cwd`` is only part of the cache key: the same command reads other files elsewhere
+    writers = {}
+    try:
+        # Execute the command, streaming output and keeping only its head/tail;
+        # the complete output goes to the session's artifact store
+        store = get_store(session_id)
+        writers = {"stdout": store.writer(), "stderr": store.writer()}
+        # Wait for a free execution slot (shared with python_repl_tool)
+        with scheduler.slot(session_id, "bash_tool"):
+            if sessions is not None:
+                # A cancelled generation interrupts the command running in the shell
+                with on_cancel(lambda: sessions.cancel(session_id)):
+                    result = sessions.run(cmd, session_id=session_id, timeout=SESSION_TIMEOUT, sinks=writers)
+            else:
+                result = stream_process(cmd, source="bash_tool", shell=True, sinks=writers, popen_kwargs=limits.popen_kwargs())
+        return _format_result(cmd, result, store, writers)
+
+    except Exception as e:
+        return _error_message(e)
+    finally:
+        # Outputs that were not stored as artifacts, or a run that failed part-way
+        _discard(writers)
+
+async def _run_async(cmd, session_id="default", cwd=None):
+    store = get_store(session_id)
+    writers = {"stdout": store.writer(), "stderr": store.writer()}
+    work = None
+    deferred = False
+    try:
+        async with scheduler.slot_async(session_id, "bash_tool"):
+            if sessions is not None:
+                work = asyncio.ensure_future(asyncio.to_thread(sessions.run, cmd, session_id, SESSION_TIMEOUT, writers))
+                result = await asyncio.shield(work)
+            else:
+                result = await stream_process_async(cmd, source="bash_tool", shell=True, sinks=writers, popen_kwargs=limits.popen_kwargs())
+        return _format_result(cmd, result, store, writers)
+
+    except asyncio.CancelledError:
+        if work is not None and not work.done():
+            # Interrupts the command; the worker thread still reads up to the sentinel
+            # into the writers, so they are only discarded once it has returned
+            sessions.cancel(session_id)
+            work.add_done_callback(lambda _: _discard(writers))
+            deferred = True
+        raise
+
+    except Exception as e:
+        return _error_message(e)
+    finally:
+        if not deferred:
+            _discard(writers)
+
+def _cwd(session_id):
+    # Directory relative paths in a command resolve against
+    return sessions.cwd(session_id) if sessions is not None else os.getcwd()
+
+# Both variants share one cache (and its disk rows) under the name "bash_tool"
+_run_cached = memoize(ttl=CACHE_TTL, disk=True, name="bash_tool", should_cache=_cacheable)(_run)
+_run_async_cached = memoize(ttl=CACHE_TTL, disk=True, name="bash_tool", should_cache=_cacheable)(_run_async)
+
 @log_io
-def handle_bash_tool(cmd: Annotated[str, "The bash command to be executed."]):
+def handle_bash_tool(cmd: Annotated[str, "The bash command to be executed."], session_id: str = "default"):
     """Use this to execute bash command and do necessary operations."""
 
-    tracer = trace.get_tracer(
-        instrumenting_module_name=os.getenv("TRACER_MODULE_NAME", "insight_extractor_agent"),
-        instrumenting_library_version=os.getenv("TRACER_LIBRARY_VERSION", "1.0.0")
-    )
-    with tracer.start_as_current_span("bash_tool") as span:
-        print()  # Add newline before log
-        print(f"{Colors.GREEN}===== Executing Bash command ====={Colors.END}")
-        print(f"{Colors.BLUE}{cmd}{Colors.END}")
-        logger.info(f"\n{Colors.GREEN}Executing Bash: {cmd}{Colors.END}")
-        try:
-            # Execute the command and capture output
-            result = subprocess.run(
-                cmd, shell=True, check=True, text=True, capture_output=True
-            )
-            # Return stdout as the result
-            results = "||".join([cmd, result.stdout])
-
-            print(f"{Colors.YELLOW}Output:{Colors.END}")
-            print(result.stdout)
-            print(f"{Colors.GREEN}===== Command execution successful ====={Colors.END}")
-
-            return results + "\n"
-            
-        except subprocess.CalledProcessError as e:
-            # If command fails, return error information
-            error_message = f"Command failed with exit code {e.returncode}.\nStdout: {e.stdout}\nStderr: {e.stderr}"
-            logger.error(f"{Colors.RED}Command failed: {e.returncode}{Colors.END}")
-
-            return error_message
-        
-        except Exception as e:
-            # Catch any other exceptions
-            error_message = f"Error executing command: {str(e)}"
-            logger.error(f"{Colors.RED}Error: {str(e)}{Colors.END}")
-
-            return error_message
+    with tracer.start_as_current_span("bash_tool", attributes={"bash.mode": MODE}) as span:
+        _print_header(cmd)
+        if CACHE_ENABLED and is_read_only(cmd):
+            return _run_cached(cmd, session_id=session_id, cwd=_cwd(session_id))
+        return _run(cmd, session_id)
+
+@log_io(name="bash_tool")
+async def handle_bash_tool_async(cmd: Annotated[str, "The bash command to be executed."], session_id: str = "default"):
+    """
+    asyncio variant of `handle_bash_tool`: no thread is blocked while the command runs,
+    and cancelling the awaiting task kills the command.
+    """
+
+    with tracer.start_as_current_span("bash_tool", attributes={"bash.mode": MODE}) as span:
+        _print_header(cmd)
+        if CACHE_ENABLED and is_read_only(cmd):
+            return await _run_async_cached(cmd, session_id=session_id, cwd=_cwd(session_id))
+        return await _run_async(cmd, session_id)
+
+def is_error(result: str) -> bool:
+    """Check if execution failed based on the result string."""
+    return "Command failed" in result or "Error executing command" in result
 
 # Function name must match tool name
 def bash_tool(tool: ToolUse, **_kwargs: Any) -> ToolResult:
@@ -83,10 +250,10 @@ def bash_tool(tool: ToolUse, **_kwargs: Any) -> ToolResult:
     cmd = tool["input"]["cmd"]
     
     # Use the existing handle_bash_tool function
-    result = handle_bash_tool(cmd)
+    result = handle_bash_tool(cmd, session_id=session_key(_kwargs))
     
     # Check if execution was successful based on the result string
-    if "Command failed" in result or "Error executing command" in result:
+    if is_error(result):
         return {
             "toolUseId": tool_use_id,
             "status": "error",
@@ -0,0 +1,441 @@
+import os
+import json
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from strands.agent.conversation_manager import ConversationManager, NullConversationManager
+from strands.types.content import Message, Messages
+from strands.types.exceptions import ContextWindowOverflowException
+from strands.types.session import SessionMessage
+
+if TYPE_CHECKING:
+    from strands import Agent
+
+# Simple logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Estimated tokens of the conversation history above which it is compacted
+MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "24000"))
+# Compaction stops once the history is below this fraction of MAX_TOKENS, so it
+# does not run again on the very next turn
+TARGET_RATIO = 0.7
+# Rough size of one token; good enough to decide when to compact
+CHARS_PER_TOKEN = 4
+# Images and documents are billed by size/pages, not characters
+MEDIA_TOKENS = 1600
+# Characters of an elided tool result kept as a preview (the first line holds
+# e.g. the artifact id of a spilled output)
+PREVIEW_CHARS = 300
+# Turn reports kept for ``report()``
+HISTORY = 100
+# Largest extractive digest (used when summarizing fails), as a fraction of
+# MAX_TOKENS; older lines are dropped first
+DIGEST_RATIO = 0.2
+
+DIGEST_HEADER = "[Summary of the earlier conversation]"
+DIGEST_TRIMMED = "- (earlier parts of the conversation omitted)"
+# Closes an answer the user stopped, so the model knows it was cut off
+CANCELLED_NOTE = "[Stopped by the user]"
+CANCELLED_RESULT = "Tool call cancelled by the user before it finished."
+ERROR_NOTE = "[Interrupted by an error: {error}]"
+ERROR_RESULT = "Tool call did not finish because the turn failed: {error}"
+DIGEST_ACK = "Understood. I will use this summary of our earlier conversation."
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and an AI assistant \
+that uses tools. Update the summary with the new part of the conversation.
+
+- Write concise bullet points in the third person; do not address the user.
+- Keep the user's goals, questions, decisions and preferences.
+- Keep facts, numbers, file names, artifact ids and code the assistant produced or found with tools.
+- Drop small talk and intermediate steps that no longer matter.
+- Reply with the updated summary only."""
+
+
+def _block_tokens(block: Dict[str, Any]) -> int:
+    if "text" in block:
+        return len(block["text"]) // CHARS_PER_TOKEN
+    if "image" in block or "document" in block or "video" in block:
+        return MEDIA_TOKENS
+    if "toolResult" in block:
+        return 8 + sum(_block_tokens(item) for item in block["toolResult"].get("content", []))
+    if "json" in block:
+        return len(json.dumps(block["json"], default=str)) // CHARS_PER_TOKEN
+    return len(json.dumps(block, default=lambda value: "x" * len(value) if isinstance(value, bytes) else str(value))) // CHARS_PER_TOKEN
+
+
+def message_tokens(message: Message) -> int:
+    return 4 + sum(_block_tokens(block) for block in message.get("content", []))
+
+
+def estimate_tokens(messages: Messages) -> int:
+    """Approximate number of input tokens the messages cost on every model call."""
+    return sum(message_tokens(message) for message in messages)
+
+
+def _result_text(result: Dict[str, Any]) -> str:
+    parts = []
+    for item in result.get("content", []):
+        if "text" in item:
+            parts.append(item["text"])
+        elif "json" in item:
+            parts.append(json.dumps(item["json"], ensure_ascii=False, default=str))
+    return "\n".join(parts)
+
+
+def _is_turn_start(message: Message) -> bool:
+    """A user message that starts a new turn (not a tool result answering a tool use)."""
+    return message["role"] == "user" and not any("toolResult" in block for block in message["content"])
+
+
+def transcript(messages: Messages, tool_chars: int = 500) -> str:
+    """Plain-text rendering of messages (tool calls and results clipped) for the summarizer."""
+    lines = []
+    for message in messages:
+        speaker = "User" if message["role"] == "user" else "Assistant"
+        for block in message["content"]:
+            if "text" in block:
+                lines.append(f"{speaker}: {block['text']}")
+            elif "toolUse" in block:
+                tool_input = json.dumps(block["toolUse"].get("input"), ensure_ascii=False, default=str)
+                lines.append(f"Assistant called tool {block['toolUse']['name']}: {tool_input[:tool_chars]}")
+            elif "toolResult" in block:
+                result = block["toolResult"]
+                lines.append(f"Tool result ({result.get('status', 'success')}): {_result_text(result)[:tool_chars]}")
+    return "\n".join(lines)
+
+
+def close_interrupted_turn(agent: "Agent", partial_text: str = "", error: Optional[BaseException] = None) -> List[Message]:
+    """
+    Make the history consistent again after an invocation was cancelled or failed midway.
+
+    An interrupted turn can end with the user's prompt (or tool results) and no
+    answer, or with tool uses that never got results; the next model call would
+    reject either. This appends an error result for every pending tool use and an
+    assistant message with the text streamed so far plus a note: ``CANCELLED_NOTE``
+    when the user stopped the turn (``error`` is None), ``ERROR_NOTE`` otherwise,
+    so the model does not think the user cut off an answer that actually failed.
+    Messages are added with ``agent._append_message`` so a session manager
+    persists them like any other message.
+
+    Returns:
+        the messages that were added (none if the turn had already finished)
+    """
+    messages = agent.messages
+    if not messages:
+        return []
+    if error is None:
+        note, result_text = CANCELLED_NOTE, CANCELLED_RESULT
+    else:
+        reason = f"{type(error).__name__}: {error}"[:PREVIEW_CHARS]
+        note, result_text = ERROR_NOTE.format(error=reason), ERROR_RESULT.format(error=reason)
+    added: List[Message] = []
+    last = messages[-1]
+    if last["role"] == "assistant":
+        pending = [block["toolUse"]["toolUseId"] for block in last["content"] if "toolUse" in block]
+        if not pending:
+            return []
+        added.append({
+            "role": "user",
+            "content": [
+                {"toolResult": {"toolUseId": tool_use_id, "status": "error", "content": [{"text": result_text}]}}
+                for tool_use_id in pending
+            ],
+        })
+    text = partial_text.strip()
+    added.append({"role": "assistant", "content": [{"text": f"{text}\n\n{note}" if text else note}]})
+    for message in added:
+        agent._append_message(message)
+    return added
+
+
+class TokenBudgetConversationManager(ConversationManager):
+    """
+    Keep the conversation history under a token budget.
+
+    After every invocation, if the estimated history exceeds ``max_tokens``, it is
+    compacted down to ``target_ratio * max_tokens`` in two steps:
+
+    1. Old tool results (outside the last ``preserve_recent_messages`` messages)
+       are replaced by a short stub, oldest first. The toolUse / toolResult blocks
+       and their ids stay, so every tool use still has its result. With a
+       repository-backed session manager the stubbed messages are written back,
+       so a restored session comes back compacted too.
+    2. If that is not enough, the oldest whole turns are folded into a rolling
+       digest: one user message with the summary plus a short assistant
+       acknowledgement, so roles keep alternating. The folded turns are first
+       replaced by an extractive digest, capped at ``digest_ratio * max_tokens``
+       so repeated folds cannot grow it past the budget.
+
+    Both hooks run on the agent's event loop (in the chatbot, the loop shared by
+    every session), so they never call a model. The summary is written in a
+    background thread by ``summarization_agent`` (default: a tool-less agent on
+    the same model), updated, not rewritten from scratch, each time more turns
+    are folded in; ``refresh_digest()`` swaps it in for the extractive digest
+    once it is ready, at the latest when the next turn is compacted.
+
+    ``report()`` returns, per turn, the estimated history size before and after
+    compaction and the tokens every following model call saves.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = MAX_TOKENS,
+        target_ratio: float = TARGET_RATIO,
+        preserve_recent_messages: int = 6,
+        summarization_agent: Optional["Agent"] = None,
+        digest_ratio: float = DIGEST_RATIO,
+    ):
+        super().__init__()
+        self.max_tokens = max_tokens
+        self.target_ratio = target_ratio
+        self.digest_ratio = digest_ratio
+        self.preserve_recent_messages = preserve_recent_messages
+        self.summarization_agent = summarization_agent
+        self.digest: Optional[str] = None
+        self.turns = 0
+        self.saved_tokens = 0
+        self.reports: "deque[Dict[str, int]]" = deque(maxlen=HISTORY)
+        # (digest the summary will replace, summary or None if summarizing failed)
+        self._pending: Optional[Tuple[str, "Future[Optional[str]]"]] = None
+
+    # Session persistence: the digest is not part of the stored messages
+
+    def restore_from_session(self, state: Dict[str, Any]) -> Optional[List[Message]]:
+        super().restore_from_session(state)
+        self.digest = state.get("digest")
+        self.saved_tokens = state.get("saved_tokens", 0)
+        return self._digest_messages() if self.digest else None
+
+    def get_state(self) -> Dict[str, Any]:
+        return {"digest": self.digest, "saved_tokens": self.saved_tokens, **super().get_state()}
+
+    def _digest_messages(self) -> List[Message]:
+        return [
+            {"role": "user", "content": [{"text": f"{DIGEST_HEADER}\n{self.digest}"}]},
+            {"role": "assistant", "content": [{"text": DIGEST_ACK}]},
+        ]
+
+    def _digest_length(self, messages: Messages) -> int:
+        """Number of leading messages that are the digest pair."""
+        if self.digest and len(messages) >= 2 and messages[0]["content"][:1] and \
+                messages[0]["content"][0].get("text", "").startswith(DIGEST_HEADER):
+            return 2
+        return 0
+
+    # ConversationManager
+
+    def apply_management(self, agent: "Agent", **kwargs: Any) -> None:
+        self.turns += 1
+        self.refresh_digest(agent)
+        before = estimate_tokens(agent.messages)
+        stubbed = summarized = 0
+        if before > self.max_tokens:
+            target = int(self.max_tokens * self.target_ratio)
+            stubbed = self._stub_tool_results(agent, target, self.preserve_recent_messages)
+            if estimate_tokens(agent.messages) > target:
+                summarized = self._fold_into_digest(agent, target)
+        after = estimate_tokens(agent.messages)
+        self.saved_tokens += before - after
+        report = {
+            "turn": self.turns,
+            "tokens_before": before,
+            "tokens_after": after,
+            "compacted": before - after,
+            "saved_per_call": self.saved_tokens,
+            "stubbed_results": stubbed,
+            "summarized_messages": summarized,
+        }
+        self.reports.append(report)
+        if before != after:
+            logger.info(
+                f"Compacted conversation: {before} -> {after} tokens "
+                f"({stubbed} tool results stubbed, {summarized} messages summarized); "
+                f"each model call now sends ~{self.saved_tokens} fewer tokens"
+            )
+
+    def reduce_context(self, agent: "Agent", e: Optional[Exception] = None, **kwargs: Any) -> None:
+        """The model rejected the request as too long: compact aggressively to half the budget."""
+        self.refresh_digest(agent)
+        before = estimate_tokens(agent.messages)
+        target = self.max_tokens // 2
+        self._stub_tool_results(agent, target, preserve=1)
+        if estimate_tokens(agent.messages) > target:
+            self._fold_into_digest(agent, target, preserve=2)
+        after = estimate_tokens(agent.messages)
+        if after >= before:
+            raise ContextWindowOverflowException("Unable to reduce the conversation any further") from e
+        self.saved_tokens += before - after
+
+    def report(self) -> List[Dict[str, int]]:
+        """Per-turn compaction reports, oldest first."""
+        return list(self.reports)
+
+    def refresh_digest(self, agent: "Agent") -> bool:
+        """
+        Replace the extractive digest with the model-written summary if the
+        background summarizer has finished; never waits for it.
+
+        Call it from the thread that runs the agent's turns (the hooks call it too).
+
+        Returns:
+            True if the digest was replaced
+        """
+        if self._pending is None or not self._pending[1].done():
+            return False
+        placeholder, future = self._pending
+        self._pending = None
+        summary = future.result()
+        if not summary or self.digest != placeholder:
+            return False
+        self.digest = summary
+        if self._digest_length(agent.messages):
+            before = message_tokens(agent.messages[0])
+            agent.messages[0] = self._digest_messages()[0]
+            self.saved_tokens += before - message_tokens(agent.messages[0])
+        return True
+
+    # Step 1: stub old tool results
+
+    def _stub_tool_results(self, agent: "Agent", target: int, preserve: int) -> int:
+        messages = agent.messages
+        total = estimate_tokens(messages)
+        stubbed = 0
+        changed = []
+        for index, message in enumerate(messages[:max(0, len(messages) - preserve)]):
+            if total <= target:
+                break
+            for block in message["content"]:
+                result = block.get("toolResult")
+                if result is None:
+                    continue
+                tokens = _block_tokens(block)
+                text = _result_text(result)
+                preview = text[:PREVIEW_CHARS].split("\n--- ")[0].rstrip()
+                if len(text) > len(preview):
+                    preview += " ..."
+                stub = {
+                    "toolUseId": result["toolUseId"],
+                    "status": result.get("status", "success"),
+                    "content": [{"text": f"[Earlier tool output elided to save context (~{tokens} tokens). Preview: {preview}]"}],
+                }
+                saved = tokens - _block_tokens({"toolResult": stub})
+                if saved <= 0:
+                    continue
+                block["toolResult"] = stub
+                total -= saved
+                stubbed += 1
+                if not changed or changed[-1] != index:
+                    changed.append(index)
+        self._persist_messages(agent, changed)
+        return stubbed
+
+    def _persist_messages(self, agent: "Agent", indexes: List[int]) -> None:
+        """Write changed messages back to the agent's session repository, if it has one."""
+        session_manager = getattr(agent, "_session_manager", None)
+        repository = getattr(session_manager, "session_repository", None)
+        if repository is None or not indexes:
+            return
+        # Stored messages are numbered from 0 and the digest pair is not stored
+        offset = self.removed_message_count - self._digest_length(agent.messages)
+        for index in indexes:
+            session_message = SessionMessage.from_message(agent.messages[index], offset + index)
+            try:
+                repository.update_message(session_manager.session_id, agent.agent_id, session_message)
+            except Exception as e:
+                logger.warning(f"Could not persist compacted message {offset + index}: {e}")
+
+    # Step 2: fold the oldest turns into the digest
+
+    def _fold_into_digest(self, agent: "Agent", target: int, preserve: Optional[int] = None) -> int:
+        messages = agent.messages
+        preserve = self.preserve_recent_messages if preserve is None else preserve
+        start = self._digest_length(messages)
+        # Reserve room for the digest itself (roughly what it costs now, at least 500 tokens)
+        reserve = max(500, len(self.digest or "") // CHARS_PER_TOKEN + 100)
+
+        # Cut at the first turn start after which the rest fits the target; never
+        # split a toolUse from its toolResult and keep the most recent messages
+        cut = None
+        remaining = estimate_tokens(messages[start:])
+        for index in range(start + 1, max(start + 1, len(messages) - preserve + 1)):
+            remaining -= message_tokens(messages[index - 1])
+            if index < len(messages) and _is_turn_start(messages[index]):
+                cut = index
+                if remaining + reserve <= target:
+                    break
+        if cut is None:
+            return 0
+
+        folded = messages[start:cut]
+        previous = self.digest
+        self.digest = self._extractive_digest(folded)
+        messages[:] = self._digest_messages() + messages[cut:]
+        # Only messages that came from the user / model count, not the digest pair
+        self.removed_message_count += len(folded)
+        self._summarize_later(agent, previous, folded)
+        return len(folded)
+
+    def _summarize_later(self, agent: "Agent", previous: Optional[str], folded: Messages) -> None:
+        """Start summarizing ``folded`` into ``previous`` in a background thread."""
+        pending = self._pending
+        future: "Future[Optional[str]]" = Future()
+
+        def run() -> None:
+            digest = previous
+            if pending is not None:
+                # The summary of the previous fold is not in yet: build on it once it is
+                digest = pending[1].result() or previous
+            future.set_result(self._summarize(agent, digest, folded))
+
+        self._pending = (self.digest, future)
+        threading.Thread(target=run, name="summarize", daemon=True).start()
+
+    def _summarize(self, agent: "Agent", digest: Optional[str], messages: Messages) -> Optional[str]:
+        """Blocking model call; only runs in the background thread."""
+        prompt = (
+            f"Current summary:\n{digest or '(none yet)'}\n\n"
+            f"New part of the conversation:\n{transcript(messages)}"
+        )
+        try:
+            if self.summarization_agent is not None:
+                summarizer = self.summarization_agent
+                summarizer.messages = []
+            else:
+                from strands import Agent
+
+                summarizer = Agent(
+                    model=agent.model,
+                    system_prompt=SUMMARY_PROMPT,
+                    callback_handler=None,
+                    conversation_manager=NullConversationManager(),
+                )
+            summary = str(summarizer(prompt)).strip()
+            if summary:
+                return summary
+        except Exception as e:
+            logger.warning(f"Summarizing the conversation failed, keeping the extractive digest: {e}")
+        return None
+
+    def _extractive_digest(self, messages: Messages) -> str:
+        lines = [line for line in (self.digest or "").splitlines() if line != DIGEST_TRIMMED]
+        for message in messages:
+            for block in message["content"]:
+                if "text" in block and block["text"].strip():
+                    who = "User asked" if message["role"] == "user" else "Assistant answered"
+                    lines.append(f"- {who}: {block['text'].strip()[:200]}")
+                elif "toolUse" in block:
+                    lines.append(f"- Assistant used tool {block['toolUse']['name']}")
+        # Keep the most recent lines that fit the budget
+        budget = int(self.max_tokens * self.digest_ratio * CHARS_PER_TOKEN) - len(DIGEST_TRIMMED) - 1
+        kept: List[str] = []
+        for line in reversed(lines):
+            budget -= len(line) + 1
+            if budget < 0:
+                kept.append(DIGEST_TRIMMED)
+                break
+            kept.append(line)
+        return "\n".join(reversed(kept))
@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import tempfile
+import threading
+import dataclasses
+from typing import Any, Dict, List, Optional, Tuple
+
+from strands.session import RepositorySessionManager
+from strands.session.session_repository import SessionRepository
+from strands.types.exceptions import SessionException
+from strands.types.session import Session, SessionAgent, SessionMessage
+
+# Simple logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# One database for all sessions; survives restarts and redeploys when put on a persistent volume
+CONVERSATION_DB = os.getenv("CONVERSATION_DB", os.path.join(tempfile.gettempdir(), "strands", "conversations.sqlite"))
+# Milliseconds a writer waits for another writer's transaction before failing
+BUSY_TIMEOUT_MS = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS agents (
+    session_id TEXT NOT NULL,
+    agent_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (session_id, agent_id)
+);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    agent_id TEXT NOT NULL,
+    message_id INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (session_id, agent_id, message_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS chat_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chat_history_session ON chat_history (session_id, id);
+"""
+
+
+# SessionMessage.from_dict inspects the constructor signature for every key, which
+# dominates restoring a long conversation; the field names are looked up once instead
+_MESSAGE_FIELDS = frozenset(f.name for f in dataclasses.fields(SessionMessage))
+
+
+def _session_message(data: str) -> SessionMessage:
+    return SessionMessage(**{k: v for k, v in json.loads(data).items() if k in _MESSAGE_FIELDS})
+
+
+class ConversationStore(SessionRepository):
+    """
+    Durable, append-only conversation storage in one SQLite database (WAL mode).
+
+    It serves two purposes:
+
+    - A Strands ``SessionRepository``: every message the agent adds becomes one
+      inserted row, so ``agent.messages`` survives restarts. Use
+      ``session_manager(session_id)`` as the agent's ``session_manager``.
+    - The chat history shown in the UI (``append_history`` / ``history``), read
+      in pages from the newest entry backwards, so reconnecting to a long session
+      only loads what is on screen.
+
+    Each thread gets its own connection. In WAL mode readers never block writers
+    and vice versa; concurrent writers (Streamlit runs every session in its own
+    thread, possibly in several processes) queue on SQLite's write lock for up to
+    ``BUSY_TIMEOUT_MS``. Rows are only ever inserted, except when a guardrail
+    redacts a message.
+    """
+
+    def __init__(self, path: str = CONVERSATION_DB):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # With WAL, NORMAL only syncs at checkpoints: a power loss can drop the last
+            # commits but never corrupts the database
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+        return conn
+
+    def session_manager(self, session_id: str) -> RepositorySessionManager:
+        """A Strands session manager that persists one session in this store."""
+        return RepositorySessionManager(session_id=session_id, session_repository=self)
+
+    # SessionRepository
+
+    def create_session(self, session: Session, **kwargs: Any) -> Session:
+        try:
+            self._connect().execute(
+                "INSERT INTO sessions (session_id, data) VALUES (?, ?)",
+                (session.session_id, json.dumps(session.to_dict())),
+            )
+        except sqlite3.IntegrityError as e:
+            raise SessionException(f"Session {session.session_id} already exists") from e
+        return session
+
+    def read_session(self, session_id: str, **kwargs: Any) -> Optional[Session]:
+        row = self._connect().execute("SELECT data FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return Session.from_dict(json.loads(row[0])) if row else None
+
+    def delete_session(self, session_id: str, **kwargs: Any) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            deleted = conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount
+            for table in ("agents", "messages", "chat_history"):
+                conn.execute(f"DELETE FROM {table} WHERE session_id = ?", (session_id,))
+        if not deleted:
+            raise SessionException(f"Session {session_id} does not exist")
+
+    def create_agent(self, session_id: str, session_agent: SessionAgent, **kwargs: Any) -> None:
+        self._connect().execute(
+            "INSERT OR REPLACE INTO agents (session_id, agent_id, data) VALUES (?, ?, ?)",
+            (session_id, session_agent.agent_id, json.dumps(session_agent.to_dict())),
+        )
+
+    def read_agent(self, session_id: str, agent_id: str, **kwargs: Any) -> Optional[SessionAgent]:
+        row = self._connect().execute(
+            "SELECT data FROM agents WHERE session_id = ? AND agent_id = ?", (session_id, agent_id)
+        ).fetchone()
+        return SessionAgent.from_dict(json.loads(row[0])) if row else None
+
+    def update_agent(self, session_id: str, session_agent: SessionAgent, **kwargs: Any) -> None:
+        previous = self.read_agent(session_id, session_agent.agent_id)
+        if previous is None:
+            raise SessionException(f"Agent {session_agent.agent_id} in session {session_id} does not exist")
+        session_agent.created_at = previous.created_at
+        self._connect().execute(
+            "UPDATE agents SET data = ? WHERE session_id = ? AND agent_id = ?",
+            (json.dumps(session_agent.to_dict()), session_id, session_agent.agent_id),
+        )
+
+    def create_message(self, session_id: str, agent_id: str, session_message: SessionMessage, **kwargs: Any) -> None:
+        self._connect().execute(
+            "INSERT OR REPLACE INTO messages (session_id, agent_id, message_id, data) VALUES (?, ?, ?, ?)",
+            (session_id, agent_id, session_message.message_id, json.dumps(session_message.to_dict())),
+        )
+
+    def read_message(self, session_id: str, agent_id: str, message_id: int, **kwargs: Any) -> Optional[SessionMessage]:
+        row = self._connect().execute(
+            "SELECT data FROM messages WHERE session_id = ? AND agent_id = ? AND message_id = ?",
+            (session_id, agent_id, message_id),
+        ).fetchone()
+        return _session_message(row[0]) if row else None
+
+    def update_message(self, session_id: str, agent_id: str, session_message: SessionMessage, **kwargs: Any) -> None:
+        previous = self.read_message(session_id, agent_id, session_message.message_id)
+        if previous is None:
+            raise SessionException(f"Message {session_message.message_id} does not exist")
+        session_message.created_at = previous.created_at
+        self._connect().execute(
+            "UPDATE messages SET data = ? WHERE session_id = ? AND agent_id = ? AND message_id = ?",
+            (json.dumps(session_message.to_dict()), session_id, agent_id, session_message.message_id),
+        )
+
+    def list_messages(
+        self, session_id: str, agent_id: str, limit: Optional[int] = None, offset: int = 0, **kwargs: Any
+    ) -> List[SessionMessage]:
+        rows = self._connect().execute(
+            "SELECT data FROM messages WHERE session_id = ? AND agent_id = ? "
+            "ORDER BY message_id LIMIT ? OFFSET ?",
+            (session_id, agent_id, -1 if limit is None else limit, offset),
+        ).fetchall()
+        return [_session_message(row[0]) for row in rows]
+
+    # UI chat history
+
+    def append_history(self, session_id: str, entry: Dict[str, Any]) -> int:
+        """Append one chat entry (``{"role", "content", ...}``); returns its id."""
+        return self._connect().execute(
+            "INSERT INTO chat_history (session_id, data, created) VALUES (?, ?, ?)",
+            (session_id, json.dumps(entry, ensure_ascii=False), time.time()),
+        ).lastrowid
+
+    def history(
+        self, session_id: str, limit: int = 50, before: Optional[int] = None, offset: int = 0
+    ) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        One page of chat history, oldest first: the ``limit`` newest entries, or
+        the ``limit`` entries right before id ``before`` (to page backwards),
+        skipping the ``offset`` newest of those.
+
+        Returns:
+            list of ``(id, entry)``
+        """
+        rows = self._connect().execute(
+            "SELECT id, data FROM chat_history WHERE session_id = ? AND id < ? ORDER BY id DESC LIMIT ? OFFSET ?",
+            (session_id, before if before is not None else 2 ** 63 - 1, limit, offset),
+        ).fetchall()
+        return [(row[0], json.loads(row[1])) for row in reversed(rows)]
+
+    def history_count(self, session_id: str) -> int:
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM chat_history WHERE session_id = ?", (session_id,)
+        ).fetchone()[0]
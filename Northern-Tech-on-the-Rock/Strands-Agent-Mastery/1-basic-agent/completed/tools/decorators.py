@@ -1,6 +1,16 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import inspect
 import logging
+import sqlite3
+import tempfile
 import functools
-from typing import Any, Callable, Type, TypeVar
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Type, TypeVar, Union
 
 # Simple logger setup
 logger = logging.getLogger(__name__)
@@ -8,31 +18,202 @@ logger.setLevel(logging.INFO)
 
 T = TypeVar("T")
 
+# Set TOOL_CACHE_ENABLED=0 to turn every @memoize cache off (e.g. while debugging a tool)
+CACHE_ENABLED = os.getenv("TOOL_CACHE_ENABLED", "1") != "0"
+# SQLite file shared by all caches created with ``disk=True``
+CACHE_PATH = os.getenv("TOOL_CACHE_PATH", os.path.join(tempfile.gettempdir(), "strands", "tool_cache.sqlite"))
+
+# Arguments that identify the caller rather than the request; never part of a cache key
+DEFAULT_IGNORE = ("tool_context", "agent", "session_id")
+
+_MISSING = object()
+
+# Set TOOL_METRICS_ENABLED=0 to leave @log_io functions unwrapped (no measurement at all)
+METRICS_ENABLED = os.getenv("TOOL_METRICS_ENABLED", "1") != "0"
+# Number of recent calls per tool the latency percentiles are computed from
+METRICS_HISTORY = 1000
+# Results starting with one of these are counted as failed calls
+ERROR_PREFIXES = ("Error", "Command failed", "Failed to execute", "Exception")
+
 class Colors:
     BLUE = '\033[94m'
     RED = '\033[91m'
     END = '\033[0m'
 
-def log_io(func: Callable) -> Callable:
+def _size(value: Any) -> int:
+    """Approximate size in bytes; only text and bytes are measured, so it never has to serialize objects."""
+    if isinstance(value, str):
+        return len(value.encode("utf-8", errors="replace"))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict) and "content" in value:
+        # ToolResult-like dict
+        return sum(_size(block.get("text", "")) for block in value["content"] if isinstance(block, dict))
+    return 0
+
+
+def _failed(result: Any) -> bool:
+    """Default error check for tool results (the handlers report failures as text)."""
+    if isinstance(result, str):
+        return result.startswith(ERROR_PREFIXES)
+    if isinstance(result, dict):
+        return result.get("status") == "error"
+    return False
+
+
+class ToolMetrics:
+    """
+    Per-tool call counts, wall times, input/output sizes and errors.
+
+    Kept in process for ``metrics_summary()`` and mirrored to OpenTelemetry
+    instruments (``tool.calls``, ``tool.errors``, ``tool.duration``,
+    ``tool.input.size``, ``tool.output.size``), which are only created on the
+    first call. Without an OpenTelemetry SDK configured those are no-ops.
+    """
+
+    def __init__(self):
+        self._tools: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._instruments: Optional[Dict[str, Any]] = None
+
+    def _otel(self) -> Dict[str, Any]:
+        if self._instruments is None:
+            try:
+                from opentelemetry import metrics
+
+                meter = metrics.get_meter(os.getenv("TRACER_MODULE_NAME", "insight_extractor_agent"))
+                self._instruments = {
+                    "calls": meter.create_counter("tool.calls", unit="1", description="Tool calls"),
+                    "errors": meter.create_counter("tool.errors", unit="1", description="Failed tool calls"),
+                    "duration": meter.create_histogram("tool.duration", unit="ms", description="Tool wall time"),
+                    "input": meter.create_histogram("tool.input.size", unit="By", description="Tool input size"),
+                    "output": meter.create_histogram("tool.output.size", unit="By", description="Tool output size"),
+                }
+            except Exception:
+                # opentelemetry missing or without the metrics API: in-process numbers only
+                self._instruments = {}
+        return self._instruments
+
+    def record(self, tool: str, seconds: float, input_bytes: int, output_bytes: int, error: bool) -> None:
+        with self._lock:
+            stats = self._tools.get(tool)
+            if stats is None:
+                stats = self._tools[tool] = {
+                    "calls": 0, "errors": 0, "seconds": 0.0, "input_bytes": 0, "output_bytes": 0,
+                    "recent": deque(maxlen=METRICS_HISTORY),
+                }
+            stats["calls"] += 1
+            stats["errors"] += error
+            stats["seconds"] += seconds
+            stats["input_bytes"] += input_bytes
+            stats["output_bytes"] += output_bytes
+            stats["recent"].append(seconds)
+
+        instruments = self._otel()
+        if instruments:
+            attributes = {"tool.name": tool, "error": error}
+            instruments["calls"].add(1, attributes)
+            if error:
+                instruments["errors"].add(1, attributes)
+            instruments["duration"].record(seconds * 1000, attributes)
+            instruments["input"].record(input_bytes, attributes)
+            instruments["output"].record(output_bytes, attributes)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            tools = {name: dict(stats, recent=sorted(stats["recent"])) for name, stats in self._tools.items()}
+
+        result = {}
+        for name, stats in tools.items():
+            recent = stats["recent"]
+            pick = lambda q: recent[min(len(recent) - 1, int(len(recent) * q))] * 1000 if recent else 0.0
+            result[name] = {
+                "calls": stats["calls"],
+                "errors": stats["errors"],
+                "error_rate": stats["errors"] / stats["calls"],
+                "mean_ms": stats["seconds"] / stats["calls"] * 1000,
+                "p50_ms": pick(0.5),
+                "p95_ms": pick(0.95),
+                "max_ms": recent[-1] * 1000 if recent else 0.0,
+                "input_bytes": stats["input_bytes"],
+                "output_bytes": stats["output_bytes"],
+            }
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._tools.clear()
+
+
+tool_metrics = ToolMetrics()
+
+
+def metrics_summary() -> Dict[str, Dict[str, Any]]:
+    """Per-tool numbers recorded by ``log_io`` and ``LoggedToolMixin`` in this process."""
+    return tool_metrics.summary()
+
+
+def log_io(func: Optional[Callable] = None, *, name: Optional[str] = None,
+           is_error: Optional[Callable[[Any], bool]] = None) -> Callable:
     """
-    A decorator that logs the input parameters and output of a tool function.
+    A decorator that records call count, wall time, input/output size and errors
+    of a tool function (see ``ToolMetrics``), and logs its input and output at
+    DEBUG level.
+
+    Use it bare (``@log_io``) or with options (``@log_io(name="bash_tool")``).
+    Works for sync and async functions. With ``TOOL_METRICS_ENABLED=0`` the
+    function is returned unwrapped.
 
     Args:
         func: The tool function to be decorated
+        name: Tool name in the metrics (default: function name without ``handle_``)
+        is_error: Predicate on the result that marks failed calls (default: the
+            result text starts with an error prefix, or an exception was raised)
 
     Returns:
         The wrapped function with input/output logging
     """
+    if func is None:
+        return lambda f: log_io(f, name=name, is_error=is_error)
+    if not METRICS_ENABLED:
+        return func
 
-    @functools.wraps(func)
-    def wrapper(*args: Any, **kwargs: Any) -> Any:
-        # Execute the function
-        result = func(*args, **kwargs)
+    tool = name or func.__name__.replace("handle_", "", 1)
+    failed = is_error or _failed
 
-        # Note: Tool results are now handled through Strands SDK message wrapper
-        # No need to put events in queue here
-        
-        return result
+    def finish(started: float, args: Tuple, kwargs: Dict[str, Any], result: Any, error: bool) -> None:
+        input_bytes = sum(_size(arg) for arg in args) + sum(_size(value) for value in kwargs.values())
+        tool_metrics.record(tool, time.perf_counter() - started, input_bytes, _size(result), error)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"{Colors.RED}Tool {tool} called with: {args} {kwargs}{Colors.END}")
+            logger.debug(f"{Colors.BLUE}Tool {tool} returned: {result}{Colors.END}")
+
+    if asyncio.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except BaseException:
+                finish(started, args, kwargs, None, True)
+                raise
+            finish(started, args, kwargs, result, failed(result))
+            return result
+
+    else:
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                # Execute the function
+                result = func(*args, **kwargs)
+            except BaseException:
+                finish(started, args, kwargs, None, True)
+                raise
+            finish(started, args, kwargs, result, failed(result))
+            return result
 
     return wrapper
 
@@ -42,6 +223,9 @@ class LoggedToolMixin:
 
     def _log_operation(self, method_name: str, *args: Any, **kwargs: Any) -> None:
         """Helper method to log tool operations."""
+        # Building the parameter string is the expensive part; skip it unless it is logged
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
         tool_name = self.__class__.__name__.replace("Logged", "")
         params = ", ".join(
             [*(str(arg) for arg in args), *(f"{k}={v}" for k, v in kwargs.items())]
@@ -49,10 +233,22 @@ class LoggedToolMixin:
         logger.debug(f"{Colors.RED}Tool {tool_name}.{method_name} called with: {params}{Colors.END}")
 
     def _run(self, *args: Any, **kwargs: Any) -> Any:
-        """Override _run method to add logging."""
+        """Override _run method to add logging and metrics."""
         self._log_operation("_run", *args, **kwargs)
-        result = super()._run(*args, **kwargs)
-        logger.debug(f"{Colors.BLUE}\nTool {self.__class__.__name__.replace('Logged', '')} returned: {result}{Colors.END}")
+        if not METRICS_ENABLED:
+            return super()._run(*args, **kwargs)
+
+        tool_name = self.__class__.__name__.replace("Logged", "")
+        started = time.perf_counter()
+        input_bytes = sum(_size(arg) for arg in args) + sum(_size(value) for value in kwargs.values())
+        try:
+            result = super()._run(*args, **kwargs)
+        except BaseException:
+            tool_metrics.record(tool_name, time.perf_counter() - started, input_bytes, 0, True)
+            raise
+        tool_metrics.record(tool_name, time.perf_counter() - started, input_bytes, _size(result), _failed(result))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"{Colors.BLUE}\nTool {tool_name} returned: {result}{Colors.END}")
         return result
 
 
@@ -73,3 +269,269 @@ def create_logged_tool(base_tool_class: Type[T]) -> Type[T]:
     # Set a more descriptive name for the class
     LoggedTool.__name__ = f"Logged{base_tool_class.__name__}"
     return LoggedTool
+
+
+class DiskCache:
+    """
+    SQLite tier shared by several ``ToolCache`` instances (one row per tool and key).
+
+    Values are stored as JSON, so only JSON-serializable results reach the disk;
+    anything else stays in memory only.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tool_cache ("
+                "tool TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires REAL, "
+                "PRIMARY KEY (tool, key))"
+            )
+        return self._conn
+
+    def get(self, tool: str, key: str) -> Any:
+        """Return ``(value, expires)`` or ``_MISSING``."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value, expires FROM tool_cache WHERE tool = ? AND key = ?", (tool, key)
+            ).fetchone()
+            if row is None:
+                return _MISSING
+            if row[1] is not None and row[1] < time.time():
+                self._conn.execute("DELETE FROM tool_cache WHERE tool = ? AND key = ?", (tool, key))
+                return _MISSING
+        return json.loads(row[0]), row[1]
+
+    def set(self, tool: str, key: str, value: Any, expires: Optional[float]) -> None:
+        try:
+            data = json.dumps(value)
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO tool_cache (tool, key, value, expires) VALUES (?, ?, ?, ?)",
+                (tool, key, data, expires),
+            )
+
+    def delete(self, tool: str, key: Optional[str] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._connect().execute("DELETE FROM tool_cache WHERE tool = ?", (tool,))
+            else:
+                self._connect().execute("DELETE FROM tool_cache WHERE tool = ? AND key = ?", (tool, key))
+
+
+_disk_caches: Dict[str, DiskCache] = {}
+_caches: Dict[str, "ToolCache"] = {}
+_registry_lock = threading.RLock()
+
+
+def _get_disk_cache(path: str) -> DiskCache:
+    with _registry_lock:
+        if path not in _disk_caches:
+            _disk_caches[path] = DiskCache(path)
+        return _disk_caches[path]
+
+
+class ToolCache:
+    """
+    In-memory LRU with TTL in front of an optional ``DiskCache``.
+
+    Args:
+        name: Cache name; also the namespace of this cache's rows on disk
+        maxsize: Number of entries kept in memory
+        ttl: Seconds an entry stays valid (``None`` = until invalidated)
+        disk: ``True`` for the shared ``TOOL_CACHE_PATH`` file, a path for a
+            custom SQLite file, or ``False`` for memory only
+    """
+
+    def __init__(self, name: str, maxsize: int = 128, ttl: Optional[float] = None, disk: Union[bool, str] = False):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.disk = _get_disk_cache(CACHE_PATH if disk is True else disk) if disk else None
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._entries: "OrderedDict[str, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        """Return the cached value or ``_MISSING``; a disk hit is promoted to memory."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] is None or entry[1] >= time.time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[key]
+
+        row = self.disk.get(self.name, key) if self.disk is not None else _MISSING
+        with self._lock:
+            if row is _MISSING:
+                self.misses += 1
+                return _MISSING
+            self.hits += 1
+            self.disk_hits += 1
+            # Keep the expiry written with the row, not a fresh TTL
+            value, expires = row
+            self._store(key, value, expires)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        expires = time.time() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._store(key, value, expires)
+        if self.disk is not None:
+            self.disk.set(self.name, key, value, expires)
+
+    def _store(self, key: str, value: Any, expires: Optional[float]) -> None:
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drop one key, or every entry of this cache (memory and disk) when ``key`` is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+        if self.disk is not None:
+            self.disk.delete(self.name, key)
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "disk": self.disk.path if self.disk is not None else None,
+            }
+
+
+def get_cache(name: str, maxsize: int = 128, ttl: Optional[float] = None, disk: Union[bool, str] = False) -> ToolCache:
+    """Return the cache called ``name``, creating it on first use (functions sharing a name share entries)."""
+    with _registry_lock:
+        if name not in _caches:
+            _caches[name] = ToolCache(name, maxsize=maxsize, ttl=ttl, disk=disk)
+        return _caches[name]
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit/miss counters of every cache created in this process."""
+    with _registry_lock:
+        caches = list(_caches.values())
+    return {cache.name: cache.info() for cache in caches}
+
+
+def make_cache_key(func: Callable, args: Tuple, kwargs: Dict[str, Any], ignore: Iterable[str] = DEFAULT_IGNORE) -> str:
+    """
+    Canonical hash of a call: arguments are bound to the signature (so positional,
+    keyword and default values of the same call give the same key) and serialized
+    with sorted keys.
+    """
+    try:
+        bound = inspect.signature(func).bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+    except (TypeError, ValueError):
+        arguments = {"args": list(args), "kwargs": kwargs}
+    for name in ignore:
+        arguments.pop(name, None)
+    payload = json.dumps(arguments, sort_keys=True, default=repr, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def memoize(
+    ttl: Optional[float] = None,
+    maxsize: int = 128,
+    disk: Union[bool, str] = False,
+    name: Optional[str] = None,
+    ignore: Iterable[str] = DEFAULT_IGNORE,
+    should_cache: Optional[Callable[[Any], bool]] = None,
+) -> Callable[[Callable], Callable]:
+    """
+    A decorator that caches a tool function's results by a hash of its arguments.
+
+    Put it below ``@tool`` so the tool spec is still built from the original signature::
+
+        @tool
+        @memoize(ttl=600, disk=True)
+        def weather_forecast(city: str, days: int = 3) -> str:
+            ...
+
+    Works for sync and async functions. The wrapped function gets ``cache``,
+    ``cache_info()``, ``cache_clear()`` and ``invalidate(*args, **kwargs)``.
+
+    Args:
+        ttl: Seconds a result stays valid (``None`` = until invalidated)
+        maxsize: Number of results kept in memory
+        disk: Also keep results in SQLite so they survive restarts (see ``ToolCache``)
+        name: Cache name (default: the function's qualified name)
+        ignore: Argument names left out of the key
+        should_cache: Predicate on the result; results for which it is false
+            (e.g. errors) are returned but not stored
+
+    Returns:
+        The decorator
+    """
+
+    def decorator(func: Callable) -> Callable:
+        cache = get_cache(name or f"{func.__module__}.{func.__qualname__}", maxsize=maxsize, ttl=ttl, disk=disk)
+
+        def _store(key: str, result: Any) -> None:
+            if should_cache is None or should_cache(result):
+                cache.set(key, result)
+
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not CACHE_ENABLED:
+                    return await func(*args, **kwargs)
+                key = make_cache_key(func, args, kwargs, ignore)
+                result = cache.get(key)
+                if result is not _MISSING:
+                    logger.debug(f"{Colors.BLUE}Cache hit for {cache.name}{Colors.END}")
+                    return result
+                result = await func(*args, **kwargs)
+                _store(key, result)
+                return result
+
+        else:
+
+            @functools.wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not CACHE_ENABLED:
+                    return func(*args, **kwargs)
+                key = make_cache_key(func, args, kwargs, ignore)
+                result = cache.get(key)
+                if result is not _MISSING:
+                    logger.debug(f"{Colors.BLUE}Cache hit for {cache.name}{Colors.END}")
+                    return result
+                result = func(*args, **kwargs)
+                _store(key, result)
+                return result
+
+        wrapper.cache = cache
+        wrapper.cache_info = cache.info
+        wrapper.cache_clear = lambda: cache.invalidate()
+        wrapper.invalidate = lambda *args, **kwargs: cache.invalidate(make_cache_key(func, args, kwargs, ignore))
+        return wrapper
+
+    return decorator
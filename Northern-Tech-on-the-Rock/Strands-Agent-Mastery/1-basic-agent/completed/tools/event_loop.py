@@ -0,0 +1,125 @@
+import queue
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional, Tuple
+
+from tools.streaming import CancelScope, cancel_scope, output_listener
+
+# Simple logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Seconds a cancelled stream gets to unwind (tool threads to return) before the consumer moves on
+CANCEL_GRACE = 10.0
+
+_DONE = object()
+
+
+class BackgroundLoop:
+    """
+    One long-lived asyncio event loop running in a daemon thread.
+
+    ``asyncio.run`` per request creates and closes a loop every time, and with it
+    every async HTTP connection pool, streaming client or MCP session bound to that
+    loop. Submitting the work to a loop that outlives the request lets those be
+    reused, so only the first request pays for connection setup.
+
+    Synchronous callers (e.g. the Streamlit script thread) either wait for a
+    coroutine with ``run`` or consume an async stream with ``stream``::
+
+        loop = BackgroundLoop()
+        for kind, event in loop.stream(lambda: agent.stream_async(prompt)):
+            ...
+    """
+
+    def __init__(self, name: str = "strands-event-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_forever, name=name, daemon=True)
+        self._thread.start()
+
+    def _run_forever(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Awaitable[Any]) -> concurrent.futures.Future:
+        """Schedule a coroutine on the loop; returns a thread-safe future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and block the calling thread until it finishes."""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def stream(
+        self,
+        make_stream: Callable[[], AsyncIterator[Any]],
+        heartbeat: Optional[float] = None,
+        scope: Optional[CancelScope] = None,
+    ) -> Iterator[Tuple[str, Any]]:
+        """
+        Iterate an async stream on the loop from a synchronous thread.
+
+        ``make_stream`` is called on the loop (so e.g. ``agent.stream_async`` binds to
+        it). Items arrive through a thread-safe queue as ``("event", item)``; output
+        that tools report through ``output_listener`` while the stream runs arrives
+        in the same queue as ``("output", output_event)``, in order. With
+        ``heartbeat``, ``("tick", None)`` is yielded whenever nothing arrived for
+        that many seconds, so the consumer gets a chance to notice it should stop.
+
+        Exceptions raised by the stream are re-raised in the consuming thread. If the
+        consumer stops early (break, exception, Streamlit stopping the script), the
+        stream is cancelled on the loop, ``scope`` is cancelled (killing the child
+        processes of tools running in worker threads) and the call waits up to
+        ``CANCEL_GRACE`` seconds for the stream to unwind, so the caller can safely
+        touch e.g. ``agent.messages`` afterwards.
+        """
+        items: "queue.Queue[Any]" = queue.Queue()
+        scope = scope or CancelScope()
+        started, finished = threading.Event(), threading.Event()
+
+        async def pump():
+            started.set()
+            try:
+                with cancel_scope(scope), output_listener(lambda output_event: items.put(("output", output_event))):
+                    async for item in make_stream():
+                        items.put(("event", item))
+            except Exception as e:
+                items.put(("error", e))
+            finally:
+                items.put(_DONE)
+                finished.set()
+
+        future = self.submit(pump())
+        try:
+            while True:
+                try:
+                    item = items.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ("tick", None)
+                    continue
+                if item is _DONE:
+                    break
+                if item[0] == "error":
+                    raise item[1]
+                yield item
+        finally:
+            if not finished.is_set():
+                scope.cancel()
+                future.cancel()
+                # A stream cancelled before it started never runs its ``finally``
+                if started.is_set() and not finished.wait(CANCEL_GRACE):
+                    logger.warning(f"Cancelled stream did not finish within {CANCEL_GRACE} seconds")
+
+    def close(self) -> None:
+        """Stop the loop and wait for its thread."""
+        if self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
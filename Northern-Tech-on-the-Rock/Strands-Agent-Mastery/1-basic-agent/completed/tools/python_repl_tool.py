@@ -1,9 +1,19 @@
+import os
+import re
 import sys
+import signal
+import asyncio
 import logging
-import subprocess
-from typing import Any, Annotated
+import threading
+from typing import Any, Annotated, Optional
 from strands.types.tools import ToolResult, ToolUse
 from tools.decorators import log_io
+from tools.repl_pool import ReplWorkerPool
+from tools.repl_zygote import ReplZygote
+from tools.session import session_key
+from tools.artifacts import get_store
+from tools.streaming import cancelled, on_cancel, stream_process, stream_process_async
+from tools.scheduler import scheduler, limits
 
 # Simple logger setup
 logger = logging.getLogger(__name__)
@@ -36,45 +46,179 @@ class Colors:
     END = '\033[0m'
 
 class PythonREPL:
-    def __init__(self):
-        pass
+    """
+    Runs python code for the tool.
+
+    Modes (selected with the PYTHON_REPL_MODE environment variable):
+        - "subprocess": a fresh `python -c` interpreter per call (default)
+        - "pool": a long-lived interpreter per session that keeps variables between calls
+        - "zygote": a clean namespace per call, forked from a pre-warmed parent that
+          already imported numpy/pandas/matplotlib/... (Linux / macOS only)
+    """
+
+    MODES = ("subprocess", "pool", "zygote")
+
+    def __init__(self, mode: Optional[str] = None, pool: Optional[ReplWorkerPool] = None, zygote: Optional[ReplZygote] = None):
+        self.mode = mode or os.getenv("PYTHON_REPL_MODE", "subprocess")
+        if self.mode not in self.MODES:
+            raise ValueError(f"Unknown PYTHON_REPL_MODE '{self.mode}', expected one of {self.MODES}")
+        self.pool = pool
+        if self.mode == "pool" and self.pool is None:
+            self.pool = ReplWorkerPool(
+                max_workers=int(os.getenv("PYTHON_REPL_POOL_SIZE", "4")),
+                idle_timeout=float(os.getenv("PYTHON_REPL_IDLE_TIMEOUT", "900")),
+                limits=limits.to_dict(),
+            )
+        self.zygote = zygote
+        if self.mode == "zygote" and self.zygote is None:
+            preload = os.getenv("PYTHON_REPL_PRELOAD")
+            self.zygote = ReplZygote(preload=preload.split(",") if preload is not None else None, limits=limits.to_dict())
+            # Warm up in the background so the first tool call does not pay for the imports
+            threading.Thread(target=self.zygote.start, daemon=True).start()
+
+    def run(self, command, session_id: Optional[str] = None):
+        session_id = session_id or "default"
+        # 실행 슬롯이 생길 때까지 대기 (bash_tool 과 공유하는 동시 실행 제한)
+        with scheduler.slot(session_id, "python_repl_tool"):
+            return self._run(command, session_id)
 
-    def run(self, command):
+    def _run(self, command, session_id):
+        if self.mode == "pool":
+            return self._run_in_pool(command, session_id)
+        if self.mode == "zygote":
+            return self._run_in_zygote(command, session_id)
+        writers = {}
         try:
-            # 입력된 명령어 실행
-            result = subprocess.run(
+            # 입력된 명령어 실행 (출력은 스트리밍되며 앞/뒤 일부만 메모리에 유지, 전체 출력은 artifact 로 저장)
+            store = get_store(session_id)
+            writers = {"stdout": store.writer(), "stderr": store.writer()}
+            result = stream_process(
                 [sys.executable, "-c", command],
-                capture_output=True,
-                text=True,
-                timeout=600  # 타임아웃 설정
+                source="python_repl_tool",
+                timeout=600,  # 타임아웃 설정
+                sinks=writers,
+                popen_kwargs=limits.popen_kwargs()
             )
-            # 결과 반환
-            if result.returncode == 0:
-                return result.stdout
-            else:
-                return f"Error: {result.stderr}"
+            return self._format_stream(result, store, writers)
+        except Exception as e:
+            return f"Exception: {str(e)}"
+        finally:
+            self._discard(writers)
+
+    async def run_async(self, command, session_id: Optional[str] = None):
+        """
+        asyncio variant of `run`. In "subprocess" mode no thread is blocked while the code runs;
+        in every mode, cancelling the awaiting task kills the process executing the code.
+        """
+        session_id = session_id or "default"
+        async with scheduler.slot_async(session_id, "python_repl_tool"):
+            return await self._run_async(command, session_id)
+
+    async def _run_async(self, command, session_id):
+        if self.mode == "pool":
+            try:
+                return await asyncio.to_thread(self._run_in_pool, command, session_id)
+            except asyncio.CancelledError:
+                # Killing the worker unblocks the thread; the session starts over on the next call
+                self.pool.reset(session_id)
+                raise
+        if self.mode == "zygote":
+            pids = []
+            try:
+                return await asyncio.to_thread(self._run_in_zygote, command, session_id, pids.append)
+            except asyncio.CancelledError:
+                for pid in pids:
+                    ReplZygote.kill_child(pid)
+                raise
+
+        store = get_store(session_id)
+        writers = {"stdout": store.writer(), "stderr": store.writer()}
+        try:
+            result = await stream_process_async(
+                [sys.executable, "-c", command],
+                source="python_repl_tool",
+                timeout=600,  # 타임아웃 설정
+                sinks=writers,
+                popen_kwargs=limits.popen_kwargs()
+            )
+            return self._format_stream(result, store, writers)
+        except Exception as e:
+            return f"Exception: {str(e)}"
+        finally:
+            self._discard(writers)
+
+    @staticmethod
+    def _discard(writers):
+        # artifact 로 저장되지 않은 출력의 임시 파일 삭제 (취소되거나 중간에 실패한 경우 포함)
+        for writer in writers.values():
+            if writer is not None:
+                writer.discard()
+
+    @staticmethod
+    def _format_stream(result, store, writers):
+        # 결과 반환 (결과에 들어가는 스트림만 artifact 로 저장)
+        if result["timed_out"]:
+            return "Exception: Execution timed out after 600 seconds"
+        if result["returncode"] == 0:
+            return store.spill(result["stdout"], writers["stdout"])
+        stderr = store.spill(result["stderr"], writers["stderr"])
+        if result["returncode"] < 0 and not stderr.strip():
+            # 시그널로 종료된 경우 (예: SIGXCPU = CPU 시간 제한 초과, SIGKILL = 메모리 부족)
+            return f"Error: Process was killed by {signal.Signals(-result['returncode']).name}"
+        else:
+            return f"Error: {stderr}"
+
+    def _run_in_pool(self, command, session_id):
+        try:
+            # 생성이 중지되면 워커를 종료해 대기 중인 스레드를 깨움 (세션 상태는 초기화됨)
+            with on_cancel(lambda: self.pool.reset(session_id)):
+                result = self.pool.run(command, session_id=session_id, timeout=600)
+        except Exception as e:
+            return f"Exception: {str(e)}"
+        return self._format(result, session_id)
+
+    def _run_in_zygote(self, command, session_id, on_start=None):
+        pids = []
+
+        def started(pid):
+            pids.append(pid)
+            if cancelled():
+                ReplZygote.kill_child(pid)
+            if on_start is not None:
+                on_start(pid)
+
+        try:
+            # 생성이 중지되면 fork 된 자식 프로세스를 종료
+            with on_cancel(lambda: [ReplZygote.kill_child(pid) for pid in pids]):
+                result = self.zygote.run(command, timeout=600, on_start=started)
         except Exception as e:
             return f"Exception: {str(e)}"
+        return self._format(result, session_id)
+
+    @staticmethod
+    def _format(result, session_id):
+        store = get_store(session_id)
+        if result["ok"]:
+            return store.spill_text(result["stdout"])
+        return f"Error: {store.spill_text(result['stderr'])}"
 
 repl = PythonREPL()
 
-@log_io
-def handle_python_repl_tool(code: Annotated[str, "The python code to execute to do further analysis or calculation."]):
-    """
-    Use this to execute python code and do data analysis or calculation. If you want to see the output of a value,
-    you should print it out with `print(...)`. This is visible to the user.
-    """
+if repl.mode == "pool":
+    TOOL_SPEC["description"] += " Variables, imports and loaded data persist between calls, so reuse them instead of reloading."
+
+def _print_header(code):
     print()  # Add newline before log
     print(f"{Colors.GREEN}===== Executing Python code ====={Colors.END}")
     print(f"{Colors.BLUE}{code}{Colors.END}")
     logger.info(f"{Colors.GREEN}===== Executing Python code ====={Colors.END}")
-    try:
-        result = repl.run(code)
-    except BaseException as e:
-        error_msg = f"Failed to execute. Error: {repr(e)}"
-        logger.debug(f"{Colors.RED}Failed to execute. Error: {repr(e)}{Colors.END}")
-        return error_msg
 
+def _failure_message(e):
+    error_msg = f"Failed to execute. Error: {repr(e)}"
+    logger.debug(f"{Colors.RED}Failed to execute. Error: {repr(e)}{Colors.END}")
+    return error_msg
+
+def _success_message(code, result):
     # Truncate code to first 7 lines for context efficiency
     code_lines = code.split('\n')
     if len(code_lines) > 7:
@@ -88,16 +232,54 @@ def handle_python_repl_tool(code: Annotated[str, "The python code to execute to
     logger.info(f"{Colors.GREEN}===== Code execution successful ====={Colors.END}")
     return result_str
 
+# What the REPL returns for failed code ("Error: <stderr>", "Exception: ..."), shown after the code preview
+_FAILED_PAYLOAD = re.compile(r"^Successfully executed:\n\|\|.*?\|\|(?:Error|Exception): ", re.DOTALL)
+
+def is_error(result: str) -> bool:
+    """Check if execution failed based on the result string."""
+    return (
+        "Failed to execute" in result
+        or result.startswith(("Error:", "Exception:"))
+        or _FAILED_PAYLOAD.match(result) is not None
+    )
+
+@log_io(is_error=is_error)
+def handle_python_repl_tool(code: Annotated[str, "The python code to execute to do further analysis or calculation."], session_id: Optional[str] = None):
+    """
+    Use this to execute python code and do data analysis or calculation. If you want to see the output of a value,
+    you should print it out with `print(...)`. This is visible to the user.
+    """
+    _print_header(code)
+    try:
+        result = repl.run(code, session_id=session_id)
+    except BaseException as e:
+        return _failure_message(e)
+
+    return _success_message(code, result)
+
+@log_io(name="python_repl_tool", is_error=is_error)
+async def handle_python_repl_tool_async(code: Annotated[str, "The python code to execute to do further analysis or calculation."], session_id: Optional[str] = None):
+    """asyncio variant of `handle_python_repl_tool`; cancellation kills the running code."""
+    _print_header(code)
+    try:
+        result = await repl.run_async(code, session_id=session_id)
+    except asyncio.CancelledError:
+        raise
+    except BaseException as e:
+        return _failure_message(e)
+
+    return _success_message(code, result)
+
 # Function name must match tool name
 def python_repl_tool(tool: ToolUse, **kwargs: Any) -> ToolResult:
     tool_use_id = tool["toolUseId"]
     code = tool["input"]["code"]
 
     # Use the existing handle_python_repl_tool function
-    result = handle_python_repl_tool(code)
+    result = handle_python_repl_tool(code, session_id=session_key(kwargs))
 
     # Check if execution was successful based on the result string
-    if "Failed to execute" in result:
+    if is_error(result):
         return {
             "toolUseId": tool_use_id,
             "status": "error",
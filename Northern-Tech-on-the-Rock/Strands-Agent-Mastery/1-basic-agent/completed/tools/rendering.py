@@ -0,0 +1,126 @@
+import os
+import re
+import json
+import time
+from typing import Callable, Optional
+
+# Pending tokens are pushed to the UI at most once per FRAME_INTERVAL seconds...
+FRAME_INTERVAL = float(os.getenv("STREAM_FRAME_INTERVAL", "0.05"))
+# ...or as soon as this many characters are waiting
+FRAME_CHARS = int(os.getenv("STREAM_FRAME_CHARS", "400"))
+
+_FENCE = re.compile(r"^ {0,3}(```|~~~)", re.MULTILINE)
+
+
+def _stable_prefix(text: str) -> int:
+    """
+    Length of the longest prefix of ``text`` that ends on a paragraph break outside
+    a fenced code block. Markdown before that point renders the same no matter what
+    is streamed after it, so it can be committed as its own element.
+    """
+    end = text.rfind("\n\n")
+    while end > 0:
+        if len(_FENCE.findall(text, 0, end)) % 2 == 0:
+            return end + 2
+        end = text.rfind("\n\n", 0, end)
+    return 0
+
+
+class DeltaRenderer:
+    """
+    Coalesce streamed tokens into frames and push only what changed.
+
+    Text is split into a committed part and a live tail. Whenever a frame is due
+    (``interval`` seconds since the last one, or ``max_chars`` pending), completed
+    paragraphs are handed to ``append`` exactly once and only the unfinished tail
+    is re-sent through ``update``. Re-rendering the whole answer per token costs
+    O(n²) bytes; here each byte is sent about once, plus the current paragraph.
+
+    Args:
+        append: Called with each committed block (e.g. ``container.markdown``)
+        update: Called with the live tail (e.g. ``st.empty().markdown``)
+        interval: Minimum seconds between frames
+        max_chars: Pending characters that force a frame before ``interval``
+        clock: Time source (the benchmark replays recordings with a virtual clock)
+    """
+
+    def __init__(
+        self,
+        append: Callable[[str], None],
+        update: Callable[[str], None],
+        interval: float = FRAME_INTERVAL,
+        max_chars: int = FRAME_CHARS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.append = append
+        self.update = update
+        self.interval = interval
+        self.max_chars = max_chars
+        self.clock = clock
+        self.text = ""
+        self.tail = ""
+        self.pending = 0
+        self.frames = 0
+        self.render_calls = 0
+        self.bytes_sent = 0
+        self._shown_tail = ""
+        self._last_frame: Optional[float] = None
+
+    def write(self, token: str) -> None:
+        self.text += token
+        self.tail += token
+        self.pending += len(token)
+        now = self.clock()
+        if self._last_frame is None or now - self._last_frame >= self.interval or self.pending >= self.max_chars:
+            self.flush(now)
+
+    def flush(self, now: Optional[float] = None) -> None:
+        """Push a frame now (call before anything else is drawn below the text)."""
+        self.pending = 0
+        self._last_frame = self.clock() if now is None else now
+        cut = _stable_prefix(self.tail)
+        if cut:
+            committed, self.tail = self.tail[:cut].rstrip("\n"), self.tail[cut:]
+            self._send(self.append, committed)
+            self._shown_tail = None
+        if self.tail != self._shown_tail:
+            self._send(self.update, self.tail)
+            self._shown_tail = self.tail
+        self.frames += 1
+
+    def close(self) -> str:
+        """Render whatever is pending and return the full text."""
+        if self.pending or self.tail != self._shown_tail:
+            self.flush()
+        return self.text
+
+    def _send(self, render: Callable[[str], None], text: str) -> None:
+        self.render_calls += 1
+        self.bytes_sent += len(text.encode("utf-8"))
+        render(text)
+
+    def stats(self):
+        return {
+            "chars": len(self.text),
+            "frames": self.frames,
+            "render_calls": self.render_calls,
+            "bytes_sent": self.bytes_sent,
+        }
+
+
+class EventRecorder:
+    """
+    Append ``{"t": seconds since start, "data": token}`` lines for every streamed token,
+    the format ``bench_stream_render.py --events`` replays.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.start = time.monotonic()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def record(self, token: str) -> None:
+        self._file.write(json.dumps({"t": round(time.monotonic() - self.start, 4), "data": token}, ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        self._file.close()
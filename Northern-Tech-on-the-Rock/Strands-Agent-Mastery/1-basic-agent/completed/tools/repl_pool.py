@@ -0,0 +1,228 @@
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+import subprocess
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Simple logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "repl_worker.py")
+
+
+class ReplWorker:
+    """A long-lived Python interpreter that keeps its globals between calls."""
+
+    def __init__(self, session_id: str, limits: Optional[Dict[str, Any]] = None):
+        self.session_id = session_id
+        self.limits = limits
+        self.calls = 0
+        self.busy = False
+        self.last_used = time.monotonic()
+        self._responses: "queue.Queue[Optional[str]]" = queue.Queue()
+        self.proc = subprocess.Popen(
+            [sys.executable, "-u", WORKER_PATH],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+        )
+        # A reader thread turns the blocking pipe into a queue so that run() can time out
+        threading.Thread(target=self._read_responses, daemon=True).start()
+        logger.info(f"Started REPL worker pid={self.proc.pid} for session '{session_id}'")
+
+    def _read_responses(self) -> None:
+        for line in self.proc.stdout:
+            self._responses.put(line)
+        self._responses.put(None)  # EOF: the worker exited
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def run(self, code: str, timeout: float) -> Dict[str, Any]:
+        """
+        Execute code in this worker.
+
+        Raises:
+            TimeoutError: the code did not finish within ``timeout`` seconds
+            RuntimeError: the worker process died while running the code
+        """
+        self.calls += 1
+        try:
+            self.proc.stdin.write(json.dumps({"code": code, "limits": self.limits}) + "\n")
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise RuntimeError(f"REPL worker is not accepting input: {e}") from e
+
+        try:
+            line = self._responses.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"Execution timed out after {timeout} seconds")
+        if line is None:
+            self.proc.wait()
+            raise RuntimeError(f"REPL worker exited with code {self.proc.returncode}")
+        return json.loads(line)
+
+    def kill(self) -> None:
+        if self.alive():
+            self.proc.kill()
+        self.proc.wait()
+
+
+class ReplWorkerPool:
+    """
+    Pool of stateful ``ReplWorker`` processes keyed by session id.
+
+    - At most ``max_workers`` interpreters are alive; the least recently used idle
+      worker is evicted to make room for a new session.
+    - Workers idle for longer than ``idle_timeout`` seconds are shut down.
+    - A worker that crashes or times out is discarded and transparently replaced
+      on the next call; the caller is told that the session state was reset.
+    - ``limits`` (see ``repl_worker.apply_limits``) are applied around every call.
+    """
+
+    def __init__(self, max_workers: int = 4, idle_timeout: float = 900.0, limits: Optional[Dict[str, Any]] = None):
+        self.max_workers = max_workers
+        self.idle_timeout = idle_timeout
+        self.limits = limits
+        self._workers: "OrderedDict[str, ReplWorker]" = OrderedDict()
+        self._lost_sessions = set()
+        self._cond = threading.Condition()
+        self._reaper: Optional[threading.Thread] = None
+        self._closed = False
+        atexit.register(self.shutdown)
+
+    def run(self, code: str, session_id: str = "default", timeout: float = 600) -> Dict[str, Any]:
+        """
+        Execute code in the worker that belongs to ``session_id``.
+
+        Returns:
+            dict with ``ok``, ``stdout`` and ``stderr`` like ``repl_worker.execute``
+        """
+        worker, notice = self._acquire(session_id, timeout)
+        try:
+            result = worker.run(code, timeout)
+        except (TimeoutError, RuntimeError) as e:
+            worker.kill()
+            self._discard(worker)
+            return {"ok": False, "stdout": "", "stderr": f"{notice}{e}. The session state was reset."}
+        finally:
+            self._release(worker)
+
+        if notice:
+            result["stdout"] = notice + result["stdout"]
+        return result
+
+    def _acquire(self, session_id: str, timeout: float):
+        deadline = time.monotonic() + timeout
+        notice = ""
+        with self._cond:
+            self._start_reaper()
+            while True:
+                worker = self._workers.get(session_id)
+                if worker is not None and not worker.alive():
+                    # Crashed between calls (OOM killer, os._exit, ...)
+                    self._workers.pop(session_id)
+                    self._lost_sessions.add(session_id)
+                    worker = None
+                if worker is not None and not worker.busy:
+                    break
+                if worker is None and self._make_room():
+                    if session_id in self._lost_sessions:
+                        self._lost_sessions.discard(session_id)
+                        notice = "[Previous interpreter exited; started a new session, earlier variables are gone.]\n"
+                    worker = ReplWorker(session_id, self.limits)
+                    self._workers[session_id] = worker
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("Timed out waiting for a free REPL worker")
+                self._cond.wait(remaining)
+
+            worker.busy = True
+            self._workers.move_to_end(session_id)
+            return worker, notice
+
+    def _make_room(self) -> bool:
+        """Evict the least recently used idle worker if the pool is full. Caller holds the lock."""
+        if len(self._workers) < self.max_workers:
+            return True
+        for session_id, worker in self._workers.items():
+            if not worker.busy:
+                logger.info(f"Evicting REPL worker for session '{session_id}' (pool is full)")
+                self._workers.pop(session_id)
+                worker.kill()
+                return True
+        return False
+
+    def _release(self, worker: ReplWorker) -> None:
+        with self._cond:
+            worker.busy = False
+            worker.last_used = time.monotonic()
+            self._cond.notify_all()
+
+    def _discard(self, worker: ReplWorker) -> None:
+        with self._cond:
+            if self._workers.get(worker.session_id) is worker:
+                self._workers.pop(worker.session_id)
+
+    def evict_idle(self) -> int:
+        """Shut down workers that have been idle for longer than ``idle_timeout``."""
+        now = time.monotonic()
+        with self._cond:
+            expired = [
+                w for w in self._workers.values()
+                if not w.busy and now - w.last_used > self.idle_timeout
+            ]
+            for worker in expired:
+                logger.info(f"Evicting idle REPL worker for session '{worker.session_id}'")
+                self._workers.pop(worker.session_id)
+            self._cond.notify_all()
+        for worker in expired:
+            worker.kill()
+        return len(expired)
+
+    def _start_reaper(self) -> None:
+        if self._reaper is None and self.idle_timeout > 0:
+            self._reaper = threading.Thread(target=self._reap_forever, daemon=True)
+            self._reaper.start()
+
+    def _reap_forever(self) -> None:
+        interval = max(1.0, self.idle_timeout / 4)
+        while not self._closed:
+            time.sleep(interval)
+            self.evict_idle()
+
+    def reset(self, session_id: str) -> None:
+        """Drop the interpreter (and all state) of one session."""
+        with self._cond:
+            worker = self._workers.pop(session_id, None)
+        if worker is not None:
+            worker.kill()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "workers": len(self._workers),
+                "max_workers": self.max_workers,
+                "sessions": {
+                    sid: {"pid": w.proc.pid, "calls": w.calls, "busy": w.busy}
+                    for sid, w in self._workers.items()
+                },
+            }
+
+    def shutdown(self) -> None:
+        self._closed = True
+        with self._cond:
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for worker in workers:
+            worker.kill()
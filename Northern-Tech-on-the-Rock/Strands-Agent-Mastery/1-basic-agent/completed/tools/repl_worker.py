@@ -0,0 +1,245 @@
+"""
+Worker side of the long-lived Python REPL interpreters.
+
+This file is executed as a standalone script by ``tools.repl_pool``
+(``python repl_worker.py``) and by ``tools.repl_zygote``
+(``python repl_worker.py --zygote <socket>``). It must only depend on the
+standard library so that it starts quickly and never imports the Strands SDK
+into the sandboxed interpreter.
+"""
+import os
+import sys
+import json
+import random
+import signal
+import socket
+import tempfile
+import importlib
+import traceback
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def execute(code, namespace):
+    """
+    Execute ``code`` inside ``namespace`` and capture everything written to fd 1 / fd 2.
+
+    Capturing at the file-descriptor level (instead of swapping ``sys.stdout``)
+    also collects output from C extensions and child processes, which matches
+    what the old ``python -c`` mode returned.
+
+    Returns:
+        dict with ``ok`` (bool), ``stdout`` (str) and ``stderr`` (str)
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        saved_out, saved_err = os.dup(1), os.dup(2)
+        os.dup2(out.fileno(), 1)
+        os.dup2(err.fileno(), 2)
+        ok = True
+        try:
+            exec(compile(code, "<string>", "exec"), namespace)
+        except SystemExit as e:
+            ok = e.code in (None, 0)
+        except BaseException as e:
+            ok = False
+            # Drop this frame so the traceback looks like the one from `python -c`
+            traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved_out, 1)
+            os.dup2(saved_err, 2)
+            os.close(saved_out)
+            os.close(saved_err)
+
+        out.seek(0)
+        err.seek(0)
+        return {
+            "ok": ok,
+            "stdout": out.read().decode("utf-8", errors="replace"),
+            "stderr": err.read().decode("utf-8", errors="replace"),
+        }
+
+
+def apply_limits(limits):
+    """
+    Apply ``{"memory_mb", "cpu_seconds", "nice"}`` to the current process.
+
+    The CPU limit counts from the CPU time already used, so it is a per-call budget
+    in a long-lived worker as well as in a fresh child. Only soft limits are set,
+    so they can be lifted again.
+
+    Returns:
+        a function that restores the previous soft limits (the niceness stays)
+    """
+    if not limits or resource is None:
+        return lambda: None
+
+    previous = []
+
+    def lower(which, value):
+        soft, hard = resource.getrlimit(which)
+        if hard != resource.RLIM_INFINITY:
+            value = min(value, hard)
+        resource.setrlimit(which, (value, hard))
+        previous.append((which, (soft, hard)))
+
+    if limits.get("memory_mb"):
+        lower(resource.RLIMIT_AS, int(limits["memory_mb"]) * 1024 * 1024)
+    if limits.get("cpu_seconds"):
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        lower(resource.RLIMIT_CPU, int(usage.ru_utime + usage.ru_stime) + int(limits["cpu_seconds"]))
+    if limits.get("nice") is not None:
+        try:
+            current = os.getpriority(os.PRIO_PROCESS, 0)
+            os.setpriority(os.PRIO_PROCESS, 0, max(current, int(limits["nice"])))
+        except (OSError, AttributeError):
+            pass
+
+    def restore():
+        for which, value in reversed(previous):
+            try:
+                resource.setrlimit(which, value)
+            except (ValueError, OSError):
+                pass
+
+    return restore
+
+
+def _cpu_limit_exceeded(signum, frame):
+    # SIGXCPU at the soft limit: fail the running code instead of killing the interpreter
+    raise TimeoutError("CPU time limit exceeded")
+
+
+def new_namespace():
+    """Return a fresh ``__main__``-like namespace for user code."""
+    return {"__name__": "__main__", "__builtins__": __builtins__}
+
+
+def serve_stdio():
+    """
+    Serve requests for a single stateful session.
+
+    Protocol: one JSON object per line on stdin (``{"code": ..., "limits": ...}``,
+    see ``apply_limits``) and one JSON response per line on the original stdout.
+    The namespace is kept between requests, so variables, imports and loaded data
+    survive across tool calls.
+    """
+    # Keep a private handle to the protocol pipe and point fd 1 at /dev/null so
+    # that stray writes between requests can never corrupt the protocol stream.
+    proto = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+
+    if hasattr(signal, "SIGXCPU"):
+        signal.signal(signal.SIGXCPU, _cpu_limit_exceeded)
+
+    namespace = new_namespace()
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        restore = apply_limits(request.get("limits"))
+        try:
+            response = execute(request["code"], namespace)
+        finally:
+            restore()
+        proto.write(json.dumps(response) + "\n")
+        proto.flush()
+
+
+def preload(modules):
+    """Import the heavy libraries once and warm the matplotlib font cache."""
+    # Children never show windows, and a GUI backend is not fork-safe
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    loaded = []
+    for name in modules:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except Exception:
+            pass
+
+    if "matplotlib" in sys.modules:
+        try:
+            # Loading fontManager builds (or reads) the font list cache; looking up
+            # the Korean font installed by 0-setup/install_korean_font.sh fills the
+            # findfont cache so children never pay for either.
+            from matplotlib import font_manager
+            font_manager.findfont("NanumGothic", fallback_to_default=True)
+        except Exception:
+            pass
+    return loaded
+
+
+def _serve_forked_child(conn):
+    """Runs in the forked child: execute one request with a clean namespace and exit."""
+    # Every child would otherwise share the zygote's random state
+    random.seed()
+    if "numpy" in sys.modules:
+        sys.modules["numpy"].random.seed()
+
+    stream = conn.makefile("rw", encoding="utf-8")
+    request = json.loads(stream.readline())
+    stream.write(json.dumps({"pid": os.getpid()}) + "\n")
+    stream.flush()
+    if hasattr(signal, "SIGXCPU"):
+        signal.signal(signal.SIGXCPU, _cpu_limit_exceeded)
+    apply_limits(request.get("limits"))
+    response = execute(request["code"], new_namespace())
+    stream.write(json.dumps(response) + "\n")
+    stream.flush()
+
+
+def serve_forkserver(socket_path, modules):
+    """
+    Fork server ("zygote"): preload the scientific stack once, then fork a
+    copy-on-write child per connection. Each child starts from the warm
+    interpreter but executes the request in a fresh namespace.
+
+    Protocol per connection: request ``{"code": ..., "limits": ...}``, then the
+    child answers ``{"pid": ...}`` (so the client can kill it on timeout) and
+    finally the result of ``execute``.
+    """
+    loaded = preload(modules)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen(64)
+
+    # Children are never waited for explicitly; let the kernel reap them
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+    sys.stdout.write(json.dumps({"ready": True, "preloaded": loaded}) + "\n")
+    sys.stdout.flush()
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+
+    while True:
+        conn, _ = server.accept()
+        if os.fork() == 0:
+            server.close()
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            try:
+                _serve_forked_child(conn)
+            finally:
+                os._exit(0)
+        conn.close()
+
+
+if __name__ == "__main__":
+    # Behave like `python -c`: resolve imports relative to the working directory,
+    # not relative to the tools/ folder this file lives in.
+    sys.path[0] = ""
+    if len(sys.argv) >= 3 and sys.argv[1] == "--zygote":
+        serve_forkserver(sys.argv[2], [m for m in sys.argv[3:] if m])
+    else:
+        serve_stdio()
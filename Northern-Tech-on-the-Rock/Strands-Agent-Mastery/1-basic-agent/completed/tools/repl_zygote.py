@@ -0,0 +1,155 @@
+import os
+import sys
+import json
+import time
+import atexit
+import shutil
+import signal
+import socket
+import logging
+import tempfile
+import threading
+import subprocess
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from tools.repl_pool import WORKER_PATH
+
+# Simple logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Scientific stack from pyproject.toml that python_repl_tool code usually imports
+DEFAULT_PRELOAD = (
+    "numpy",
+    "pandas",
+    "matplotlib",
+    "matplotlib.pyplot",
+    "seaborn",
+    "plotly",
+    "plotly.express",
+    "koreanize_matplotlib",
+)
+
+
+class ReplZygote:
+    """
+    Client for the fork server in ``repl_worker.py``.
+
+    The zygote process imports ``preload`` modules once; every ``run`` forks a
+    copy-on-write child from it that executes the code in a clean namespace.
+    Only available where ``os.fork`` and Unix sockets exist (Linux / macOS).
+    ``limits`` (see ``repl_worker.apply_limits``) are applied in every child; note
+    that the memory limit also counts the preloaded libraries.
+    """
+
+    def __init__(self, preload: Optional[Sequence[str]] = None, start_timeout: float = 180.0,
+                 limits: Optional[Dict[str, Any]] = None):
+        if not hasattr(os, "fork"):
+            raise RuntimeError("The zygote REPL mode requires os.fork (Linux / macOS)")
+        self.preload = tuple(preload) if preload is not None else DEFAULT_PRELOAD
+        self.start_timeout = start_timeout
+        self.limits = limits
+        self.preloaded = []
+        self._proc: Optional[subprocess.Popen] = None
+        self._tmpdir: Optional[str] = None
+        self._socket_path: Optional[str] = None
+        self._lock = threading.Lock()
+        atexit.register(self.shutdown)
+
+    def start(self) -> None:
+        """Start the zygote (if needed) and block until its preloading is done."""
+        with self._lock:
+            if self._proc is not None and self._proc.poll() is None:
+                return
+            self._cleanup()
+            self._tmpdir = tempfile.mkdtemp(prefix="repl-zygote-")
+            self._socket_path = os.path.join(self._tmpdir, "zygote.sock")
+
+            started = time.perf_counter()
+            self._proc = subprocess.Popen(
+                [sys.executable, "-u", WORKER_PATH, "--zygote", self._socket_path, *self.preload],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                encoding="utf-8",
+            )
+            ready = self._wait_ready()
+            self.preloaded = ready.get("preloaded", [])
+            logger.info(
+                f"REPL zygote pid={self._proc.pid} ready in {time.perf_counter() - started:.1f}s "
+                f"(preloaded: {', '.join(self.preloaded) or 'nothing'})"
+            )
+
+    def _wait_ready(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {}
+        reader = threading.Thread(target=lambda: result.update(json.loads(self._proc.stdout.readline() or "{}")))
+        reader.daemon = True
+        reader.start()
+        reader.join(self.start_timeout)
+        if not result.get("ready"):
+            self._proc.kill()
+            raise RuntimeError("REPL zygote failed to start")
+        return result
+
+    def run(self, code: str, timeout: float = 600, on_start: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+        """
+        Execute code in a child forked from the warm zygote.
+
+        ``on_start`` is called with the child's pid as soon as it is known, so that
+        callers can kill it from another thread (see ``kill_child``).
+
+        Returns:
+            dict with ``ok``, ``stdout`` and ``stderr`` like ``repl_worker.execute``
+        """
+        self.start()
+        try:
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conn.connect(self._socket_path)
+        except OSError:
+            # The zygote died since the last call; start a new one and retry once
+            self.start()
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conn.connect(self._socket_path)
+
+        pid = None
+        with conn:
+            conn.settimeout(timeout)
+            stream = conn.makefile("rw", encoding="utf-8")
+            try:
+                stream.write(json.dumps({"code": code, "limits": self.limits}) + "\n")
+                stream.flush()
+                pid = json.loads(stream.readline())["pid"]
+                if on_start is not None:
+                    on_start(pid)
+                line = stream.readline()
+            except (socket.timeout, TimeoutError):
+                if pid is not None:
+                    self.kill_child(pid)
+                return {"ok": False, "stdout": "", "stderr": f"Execution timed out after {timeout} seconds"}
+            except (OSError, ValueError, KeyError) as e:
+                return {"ok": False, "stdout": "", "stderr": f"REPL zygote connection failed: {e}"}
+
+        if not line:
+            return {"ok": False, "stdout": "", "stderr": "REPL child process exited before returning a result"}
+        return json.loads(line)
+
+    @staticmethod
+    def kill_child(pid: int) -> None:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def _cleanup(self) -> None:
+        if self._tmpdir:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+            self._tmpdir = None
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._proc is not None and self._proc.poll() is None:
+                self._proc.kill()
+                self._proc.wait()
+            self._proc = None
+            self._cleanup()
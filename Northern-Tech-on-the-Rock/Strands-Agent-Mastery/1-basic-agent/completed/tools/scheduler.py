@@ -0,0 +1,281 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+import contextlib
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+from tools.repl_worker import apply_limits
+from tools.streaming import Cancelled, cancelled, on_cancel
+
+# Simple logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Number of recent calls the wait / run-time percentiles are computed from
+HISTORY = 1000
+# Queue waits longer than this many seconds are logged
+SLOW_WAIT = 5.0
+
+
+class ResourceLimits:
+    """
+    Per-call limits for tool child processes (POSIX only; ignored elsewhere).
+
+    Args:
+        memory_mb: ``RLIMIT_AS`` (address space) in MiB
+        cpu_seconds: ``RLIMIT_CPU`` budget in CPU seconds
+        nice: Niceness the process runs at (higher = lower priority)
+    """
+
+    def __init__(self, memory_mb: Optional[int] = None, cpu_seconds: Optional[int] = None, nice: Optional[int] = None):
+        self.memory_mb = memory_mb
+        self.cpu_seconds = cpu_seconds
+        self.nice = nice
+
+    @classmethod
+    def from_env(cls) -> "ResourceLimits":
+        def number(name):
+            value = os.getenv(name)
+            return int(value) if value else None
+
+        return cls(
+            memory_mb=number("TOOL_RLIMIT_AS_MB"),
+            cpu_seconds=number("TOOL_RLIMIT_CPU_SECONDS"),
+            nice=number("TOOL_NICE"),
+        )
+
+    def to_dict(self, cpu: bool = True) -> Dict[str, Any]:
+        """The limits as sent to ``repl_worker.apply_limits`` (empty when nothing is limited)."""
+        limits = {"memory_mb": self.memory_mb, "cpu_seconds": self.cpu_seconds if cpu else None, "nice": self.nice}
+        return {k: v for k, v in limits.items() if v is not None}
+
+    def popen_kwargs(self, cpu: bool = True) -> Dict[str, Any]:
+        """
+        Extra ``Popen`` / ``create_subprocess_*`` arguments that apply the limits in the child.
+
+        RLIMIT_CPU is per process, so in a shell every command gets its own budget.
+        Pass ``cpu=False`` for long-lived workers, which apply it per call instead.
+        """
+        limits = self.to_dict(cpu)
+        if not limits or os.name != "posix":
+            return {}
+        return {"preexec_fn": lambda: apply_limits(limits)}
+
+
+class _Waiter:
+    def __init__(self, session_id: str, source: str, notify: Callable[[], None]):
+        self.session_id = session_id
+        self.source = source
+        self.notify = notify
+        self.enqueued = time.monotonic()
+        self.granted = False
+
+
+class ExecutionScheduler:
+    """
+    Process-wide admission control for tool executions.
+
+    At most ``max_concurrent`` executions run at once (0 = unlimited); the rest wait
+    in a queue. With ``policy="fifo"`` callers are admitted in arrival order; with
+    ``policy="fair"`` sessions take turns, so one session that queues many calls
+    cannot delay everyone else.
+
+    Use ``slot`` in threads and ``slot_async`` in coroutines::
+
+        with scheduler.slot(session_id, "bash_tool"):
+            run_the_command()
+    """
+
+    POLICIES = ("fifo", "fair")
+
+    def __init__(self, max_concurrent: int = 4, policy: str = "fair"):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown scheduling policy '{policy}', expected one of {self.POLICIES}")
+        self.max_concurrent = max_concurrent
+        self.policy = policy
+        self.running = 0
+        self.admitted = 0
+        self._fifo: "deque[_Waiter]" = deque()
+        self._sessions: "OrderedDict[str, deque[_Waiter]]" = OrderedDict()
+        self._waits: "deque[float]" = deque(maxlen=HISTORY)
+        self._runs: "deque[float]" = deque(maxlen=HISTORY)
+        self._by_source: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def slot(self, session_id: str = "default", source: str = "tool") -> Iterator[None]:
+        """Block the current thread until admitted; the slot is held until the block exits."""
+        admitted = threading.Event()
+        waiter = _Waiter(session_id, source, admitted.set)
+        self._submit(waiter)
+        try:
+            # A cancelled generation stops waiting instead of running the tool later
+            with on_cancel(admitted.set):
+                admitted.wait()
+            if cancelled():
+                raise Cancelled("Cancelled while waiting for an execution slot")
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._finish(waiter, started)
+
+    @contextlib.asynccontextmanager
+    async def slot_async(self, session_id: str = "default", source: str = "tool") -> AsyncIterator[None]:
+        """Like ``slot``, but waits on the event loop instead of blocking a thread."""
+        loop = asyncio.get_running_loop()
+        admitted = loop.create_future()
+
+        def notify():
+            loop.call_soon_threadsafe(lambda: admitted.done() or admitted.set_result(None))
+
+        waiter = _Waiter(session_id, source, notify)
+        self._submit(waiter)
+        try:
+            await admitted
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._finish(waiter, started)
+
+    def _submit(self, waiter: _Waiter) -> None:
+        with self._lock:
+            if self.policy == "fifo":
+                self._fifo.append(waiter)
+            else:
+                self._sessions.setdefault(waiter.session_id, deque()).append(waiter)
+            self._admit()
+
+    def _next(self) -> Optional[_Waiter]:
+        """Pop the next waiter to admit. Caller holds the lock."""
+        if self.policy == "fifo":
+            return self._fifo.popleft() if self._fifo else None
+        if not self._sessions:
+            return None
+        # Round robin: take the oldest call of the session that was served least recently
+        session_id, queue = next(iter(self._sessions.items()))
+        waiter = queue.popleft()
+        if queue:
+            self._sessions.move_to_end(session_id)
+        else:
+            del self._sessions[session_id]
+        return waiter
+
+    def _admit(self) -> None:
+        """Admit waiters while there is room. Caller holds the lock."""
+        while self.max_concurrent <= 0 or self.running < self.max_concurrent:
+            waiter = self._next()
+            if waiter is None:
+                return
+            waiter.granted = True
+            self.running += 1
+            self.admitted += 1
+            wait = time.monotonic() - waiter.enqueued
+            self._waits.append(wait)
+            self._stats_for(waiter.source)["wait"] += wait
+            if wait > SLOW_WAIT:
+                logger.info(f"{waiter.source} call of session '{waiter.session_id}' waited {wait:.1f}s for a free slot")
+            waiter.notify()
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        """The caller stopped waiting (cancelled / interrupted)."""
+        with self._lock:
+            if waiter.granted:
+                self.running -= 1
+                self._admit()
+            elif self.policy == "fifo":
+                self._fifo.remove(waiter)
+            else:
+                queue = self._sessions.get(waiter.session_id)
+                if queue is not None:
+                    queue.remove(waiter)
+                    if not queue:
+                        del self._sessions[waiter.session_id]
+
+    def _finish(self, waiter: _Waiter, started: float) -> None:
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self._runs.append(elapsed)
+            stats = self._stats_for(waiter.source)
+            stats["calls"] += 1
+            stats["run"] += elapsed
+            self.running -= 1
+            self._admit()
+
+    def _stats_for(self, source: str) -> Dict[str, float]:
+        return self._by_source.setdefault(source, {"calls": 0, "wait": 0.0, "run": 0.0})
+
+    @property
+    def queued(self) -> int:
+        with self._lock:
+            return len(self._fifo) + sum(len(q) for q in self._sessions.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue length plus queue-wait and run-time percentiles (milliseconds) of recent calls."""
+
+        def summary(samples):
+            if not samples:
+                return {"count": 0}
+            ordered = sorted(samples)
+            pick = lambda q: ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000
+            return {
+                "count": len(ordered),
+                "mean": sum(ordered) / len(ordered) * 1000,
+                "p50": pick(0.5),
+                "p95": pick(0.95),
+                "max": ordered[-1] * 1000,
+            }
+
+        with self._lock:
+            return {
+                "policy": self.policy,
+                "max_concurrent": self.max_concurrent,
+                "running": self.running,
+                "queued": len(self._fifo) + sum(len(q) for q in self._sessions.values()),
+                "admitted": self.admitted,
+                "queue_wait_ms": summary(self._waits),
+                "run_ms": summary(self._runs),
+                "by_source": {
+                    source: {
+                        "calls": s["calls"],
+                        "mean_wait_ms": s["wait"] / max(1, s["calls"]) * 1000,
+                        "mean_run_ms": s["run"] / max(1, s["calls"]) * 1000,
+                    }
+                    for source, s in self._by_source.items()
+                },
+            }
+
+
+limits = ResourceLimits.from_env()
+
+
+def _default_max_concurrent() -> int:
+    """
+    Most tool calls wait on I/O (network, sleeps, subprocess output), so by default
+    admission is unlimited. Only when resource limits are configured (the operator
+    is budgeting CPU / memory) is it capped at one call per CPU.
+    ``TOOL_MAX_CONCURRENCY`` always wins.
+    """
+    configured = os.getenv("TOOL_MAX_CONCURRENCY")
+    if configured:
+        return int(configured)
+    if limits.to_dict():
+        return os.cpu_count() or 4
+    return 0
+
+
+# Shared by bash_tool and python_repl_tool so the cap covers both
+scheduler = ExecutionScheduler(
+    max_concurrent=_default_max_concurrent(),
+    policy=os.getenv("TOOL_QUEUE_POLICY", "fair"),
+)
@@ -0,0 +1,50 @@
+import os
+import uuid
+import hashlib
+import tempfile
+import threading
+from typing import Any, Dict
+
+# Root folder for per-session tool data (artifacts, ...)
+SESSION_DIR = os.getenv("TOOL_SESSION_DIR", os.path.join(tempfile.gettempdir(), "strands", "sessions"))
+# agent.state key of the id given to an agent's tool session
+STATE_KEY = "tool_session_id"
+
+_lock = threading.Lock()
+
+
+def session_key(invocation_state: Dict[str, Any]) -> str:
+    """
+    Pick the session a tool call belongs to.
+
+    An explicit ``session_id`` passed to the agent call (``agent(prompt, session_id=...)``)
+    wins; otherwise every agent gets its own session, named after its ``agent_id``
+    and a random id kept in ``agent.state`` (unlike ``id(agent)``, never reused by
+    a later agent, and restored with the agent's state).
+    """
+    if invocation_state.get("session_id"):
+        return str(invocation_state["session_id"])
+    agent = invocation_state.get("agent")
+    if agent is None:
+        return "default"
+    with _lock:
+        # Concurrent tool calls of one agent must agree on the id
+        suffix = agent.state.get(STATE_KEY)
+        if suffix is None:
+            suffix = uuid.uuid4().hex[:12]
+            agent.state.set(STATE_KEY, suffix)
+    return f"agent-{agent.agent_id}-{suffix}"
+
+
+def session_dir(session_id: str) -> str:
+    """
+    Folder for one session's data, always a single path component under ``SESSION_DIR``.
+
+    Ids made of letters, digits, ``-``, ``_`` and ``.`` are used as is; any other
+    id (including ``.`` and ``..``) is replaced by a digest, so two ids never
+    share a folder.
+    """
+    safe = session_id
+    if not session_id.strip(".") or any(not (c.isalnum() or c in "-_.") for c in session_id):
+        safe = hashlib.sha256(session_id.encode()).hexdigest()[:32]
+    return os.path.join(SESSION_DIR, safe)
@@ -0,0 +1,358 @@
+import os
+import asyncio
+import codecs
+import signal
+import threading
+import subprocess
+import contextlib
+import contextvars
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Union
+
+# Bytes of output kept from the beginning and the end of each stream
+HEAD_BYTES = int(os.getenv("TOOL_OUTPUT_HEAD_BYTES", "8192"))
+TAIL_BYTES = int(os.getenv("TOOL_OUTPUT_TAIL_BYTES", "8192"))
+
+OutputEvent = Dict[str, Any]
+
+_listener: contextvars.ContextVar[Optional[Callable[[OutputEvent], None]]] = contextvars.ContextVar(
+    "tool_output_listener", default=None
+)
+
+
+@contextlib.contextmanager
+def output_listener(callback: Callable[[OutputEvent], None]) -> Iterator[None]:
+    """
+    Receive partial-output events from tools that run inside this context.
+
+    Each event is a dict: ``{"source": "bash_tool", "stream": "stdout", "text": "..."}``.
+    The callback is invoked from reader threads, so it must be thread-safe
+    (e.g. ``loop.call_soon_threadsafe(queue.put_nowait, event)``).
+
+    Strands runs sync tools with ``asyncio.to_thread``, which copies the current
+    context, so a listener set around ``agent.stream_async(...)`` reaches the tools.
+    """
+    token = _listener.set(callback)
+    try:
+        yield
+    finally:
+        _listener.reset(token)
+
+
+def current_listener() -> Optional[Callable[[OutputEvent], None]]:
+    """The listener set by the innermost ``output_listener`` (read it in the caller's thread)."""
+    return _listener.get()
+
+
+class Cancelled(Exception):
+    """The surrounding ``CancelScope`` was cancelled while a tool waited or ran."""
+
+
+class CancelScope:
+    """
+    Thread-safe cancellation signal for everything started inside ``cancel_scope``.
+
+    Cancelling the asyncio task that runs an agent does not reach sync tools: they
+    run in ``asyncio.to_thread`` workers that keep blocking on their child process.
+    Code that blocks registers a callback with ``on_cancel`` (e.g. killing its child)
+    and ``cancel()`` runs all of them, from any thread.
+    """
+
+    def __init__(self):
+        self.cancelled = False
+        self._callbacks: Dict[int, Callable[[], None]] = {}
+        self._lock = threading.Lock()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def _register(self, callback: Callable[[], None]) -> Optional[int]:
+        with self._lock:
+            if self.cancelled:
+                return None
+            key = id(callback)
+            self._callbacks[key] = callback
+            return key
+
+    def _unregister(self, key: int) -> None:
+        with self._lock:
+            self._callbacks.pop(key, None)
+
+
+_scope: contextvars.ContextVar[Optional[CancelScope]] = contextvars.ContextVar("cancel_scope", default=None)
+
+
+@contextlib.contextmanager
+def cancel_scope(scope: CancelScope) -> Iterator[CancelScope]:
+    """Make ``scope`` the cancellation scope of this context (and of tool threads started from it)."""
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+
+
+@contextlib.contextmanager
+def on_cancel(callback: Callable[[], None]) -> Iterator[None]:
+    """
+    Call ``callback`` if the current ``CancelScope`` is cancelled while the block runs.
+
+    If the scope was already cancelled, the callback runs immediately. Outside of a
+    scope this does nothing.
+    """
+    scope = _scope.get()
+    key = scope._register(callback) if scope is not None else None
+    if scope is not None and key is None:
+        callback()
+    try:
+        yield
+    finally:
+        if key is not None:
+            scope._unregister(key)
+
+
+def cancelled() -> bool:
+    """Whether the current ``CancelScope`` has been cancelled."""
+    scope = _scope.get()
+    return scope is not None and scope.cancelled
+
+
+class BoundedBuffer:
+    """Ring buffer that keeps the first ``head_bytes`` and the last ``tail_bytes`` of a stream."""
+
+    def __init__(self, head_bytes: int = HEAD_BYTES, tail_bytes: int = TAIL_BYTES):
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+
+    def write(self, chunk: bytes) -> None:
+        self.total += len(chunk)
+        room = self.head_bytes - len(self.head)
+        if room > 0:
+            self.head += chunk[:room]
+            chunk = chunk[room:]
+        if chunk:
+            self.tail += chunk
+            overflow = len(self.tail) - self.tail_bytes
+            if overflow > 0:
+                del self.tail[:overflow]
+
+    @property
+    def omitted(self) -> int:
+        return self.total - len(self.head) - len(self.tail)
+
+    def head_text(self) -> str:
+        """The head, without a character cut in half at its end (only when bytes were omitted)."""
+        head = bytes(self.head)
+        return (_trim_end(head) if self.omitted else head).decode("utf-8", errors="replace")
+
+    def tail_text(self) -> str:
+        """The tail, without a character cut in half at its start (only when bytes were omitted)."""
+        tail = bytes(self.tail)
+        return (_trim_start(tail) if self.omitted else tail).decode("utf-8", errors="replace")
+
+    def text(self) -> str:
+        if not self.omitted:
+            # Head and tail are contiguous; a character may straddle the split
+            return (bytes(self.head) + bytes(self.tail)).decode("utf-8", errors="replace")
+        return f"{self.head_text()}\n... [{self.omitted} bytes omitted] ...\n{self.tail_text()}"
+
+
+def _trim_end(data: bytes) -> bytes:
+    """Drop an incomplete UTF-8 sequence at the end of ``data``."""
+    for back in range(1, min(4, len(data)) + 1):
+        byte = data[-back]
+        if byte < 0x80:
+            return data
+        if byte >= 0xC0:
+            # Lead byte: the sequence needs 2, 3 or 4 bytes
+            needed = 2 if byte < 0xE0 else 3 if byte < 0xF0 else 4
+            return data if back >= needed else data[:-back]
+    return data
+
+
+def _trim_start(data: bytes) -> bytes:
+    """Drop the continuation bytes of a character cut off at the start of ``data``."""
+    start = 0
+    while start < min(3, len(data)) and 0x80 <= data[start] < 0xC0:
+        start += 1
+    return data[start:]
+
+
+def bound_text(text: str, head_bytes: int = HEAD_BYTES, tail_bytes: int = TAIL_BYTES) -> str:
+    """Apply the same head/tail limit to output that was not streamed."""
+    buffer = BoundedBuffer(head_bytes, tail_bytes)
+    buffer.write(text.encode("utf-8"))
+    return buffer.text()
+
+
+def _pump(pipe, buffer: BoundedBuffer, source: str, stream: str,
+          listener: Optional[Callable[[OutputEvent], None]], sink: Optional[Any]) -> None:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    with pipe:
+        while True:
+            chunk = pipe.read1(65536)
+            if not chunk:
+                break
+            buffer.write(chunk)
+            if sink is not None:
+                sink.write(chunk)
+            if listener is not None:
+                text = decoder.decode(chunk)
+                if text:
+                    listener({"source": source, "stream": stream, "text": text})
+
+
+def stream_process(
+    args: Union[str, Sequence[str]],
+    source: str,
+    shell: bool = False,
+    timeout: Optional[float] = None,
+    popen_kwargs: Optional[Dict[str, Any]] = None,
+    sinks: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Run a child process while reading stdout and stderr incrementally.
+
+    Output is forwarded to the current ``output_listener`` as it arrives and only
+    a bounded head/tail of each stream is kept in memory. ``sinks`` optionally maps
+    "stdout" / "stderr" to objects with a ``write(bytes)`` method that receive the
+    complete stream (e.g. an ``ArtifactWriter``).
+
+    Returns:
+        dict with ``returncode``, ``stdout`` / ``stderr`` (``BoundedBuffer``) and ``timed_out``
+    """
+    listener = _listener.get()
+    proc = subprocess.Popen(
+        args,
+        shell=shell,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        # Own process group, so a timeout also kills grandchildren started by the shell
+        start_new_session=(os.name == "posix"),
+        **(popen_kwargs or {}),
+    )
+    sinks = sinks or {}
+    stdout, stderr = BoundedBuffer(), BoundedBuffer()
+    readers = [
+        threading.Thread(target=_pump, args=(proc.stdout, stdout, source, "stdout", listener, sinks.get("stdout")), daemon=True),
+        threading.Thread(target=_pump, args=(proc.stderr, stderr, source, "stderr", listener, sinks.get("stderr")), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+
+    timed_out = False
+    try:
+        # A cancelled generation kills the child; the wait then returns right away
+        with on_cancel(lambda: kill_process_tree(proc)):
+            proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        timed_out = True
+        kill_process_tree(proc)
+        proc.wait()
+    except BaseException:
+        kill_process_tree(proc)
+        proc.wait()
+        raise
+    finally:
+        for reader in readers:
+            reader.join()
+
+    return {"returncode": proc.returncode, "stdout": stdout, "stderr": stderr, "timed_out": timed_out}
+
+
+async def _pump_async(reader: asyncio.StreamReader, buffer: BoundedBuffer, source: str, stream: str,
+                      listener: Optional[Callable[[OutputEvent], None]], sink: Optional[Any]) -> None:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while True:
+        chunk = await reader.read(65536)
+        if not chunk:
+            break
+        buffer.write(chunk)
+        if sink is not None:
+            sink.write(chunk)
+        if listener is not None:
+            text = decoder.decode(chunk)
+            if text:
+                listener({"source": source, "stream": stream, "text": text})
+
+
+async def stream_process_async(
+    args: Union[str, Sequence[str]],
+    source: str,
+    shell: bool = False,
+    timeout: Optional[float] = None,
+    popen_kwargs: Optional[Dict[str, Any]] = None,
+    sinks: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    asyncio version of ``stream_process`` built on ``asyncio.create_subprocess_*``.
+
+    No thread is blocked while the child runs. If the awaiting task is cancelled,
+    the child and everything it spawned are killed before ``CancelledError`` propagates.
+    """
+    listener = _listener.get()
+    kwargs = dict(
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=(os.name == "posix"),
+        **(popen_kwargs or {}),
+    )
+    if shell:
+        proc = await asyncio.create_subprocess_shell(args, **kwargs)
+    else:
+        proc = await asyncio.create_subprocess_exec(*args, **kwargs)
+
+    sinks = sinks or {}
+    stdout, stderr = BoundedBuffer(), BoundedBuffer()
+    readers = asyncio.gather(
+        _pump_async(proc.stdout, stdout, source, "stdout", listener, sinks.get("stdout")),
+        _pump_async(proc.stderr, stderr, source, "stderr", listener, sinks.get("stderr")),
+    )
+
+    timed_out = False
+    try:
+        await asyncio.wait_for(proc.wait(), timeout)
+    except asyncio.TimeoutError:
+        timed_out = True
+        kill_process_tree(proc)
+        await proc.wait()
+    except BaseException:
+        # Cancelled: do not leave the child running
+        kill_process_tree(proc)
+        await asyncio.shield(proc.wait())
+        readers.cancel()
+        raise
+    await readers
+
+    return {"returncode": proc.returncode, "stdout": stdout, "stderr": stderr, "timed_out": timed_out}
+
+
+def kill_process_tree(proc: Any) -> None:
+    """
+    Kill a child started by ``stream_process`` / ``stream_process_async``
+    together with everything it spawned.
+    """
+    returncode = proc.poll() if hasattr(proc, "poll") else proc.returncode
+    if returncode is not None:
+        return
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
@@ -1,9 +1,40 @@
 import os
+import sys
 from strands import Agent, tool
 from strands_tools import file_write
 
+# 공용 모듈(shared/) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.prompt_cache import print_cache_usage
+from shared.subagent_pool import SubAgentPool, shared_model
+
+# 하위 에이전트는 호출마다 새로 만들지 않고 미리 등록해 두었다가 재사용 (모델 클라이언트는 모델 ID별로 하나만 공유)
+# 동시에 호출되면 각 호출이 별도 인스턴스를 빌려 쓰고, 반납할 때 대화 기록/상태를 초기화
+# 도구는 async 함수: 한 턴에 함께 요청된 도구는 Strands 기본 실행기(ConcurrentToolExecutor)가 원래도 동시에 실행하지만,
+# 동기 도구는 호출마다 to_thread 워커와 agent(query) 의 스레드/asyncio.run 을 새로 쓰므로 기본 스레드 풀(CPU 수 + 4) 크기에 묶임
+# async 도구는 오케스트레이터의 이벤트 루프에서 invoke_async 로 바로 실행 (bench_fanout.py)
+subagents = SubAgentPool()
+subagents.register(
+    "research_assistant",
+    system_prompt="""당신은 전문 리서치 어시스턴트입니다.
+            연구 질문에 대해 사실적이고 출처가 명확한 정보만 제공하는 데 집중하세요.
+            가능한 한 항상 출처를 인용하세요.""",
+)
+subagents.register(
+    "product_recommendation_assistant",
+    model_id="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
+    system_prompt="""당신은 전문 제품 추천 어시스턴트입니다.
+            사용자의 선호도를 바탕으로 개인화된 제품 제안을 제공하세요. 항상 출처를 인용하세요.""",
+)
+subagents.register(
+    "trip_planning_assistant",
+    model_id="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
+    system_prompt="""당신은 전문 여행 계획 어시스턴트입니다.
+            사용자의 선호도를 바탕으로 상세한 여행 일정을 작성하세요.""",
+)
+
 @tool
-def research_assistant(query: str) -> str:
+async def research_assistant(query: str) -> str:
     """
     연구 관련 쿼리를 처리하고 응답합니다.
 
@@ -14,18 +45,14 @@ def research_assistant(query: str) -> str:
         인용이 포함된 상세한 연구 답변
     """
     try:
-        research_agent = Agent(
-            system_prompt="""당신은 전문 리서치 어시스턴트입니다.
-            연구 질문에 대해 사실적이고 출처가 명확한 정보만 제공하는 데 집중하세요.
-            가능한 한 항상 출처를 인용하세요.""",
-        )
-        response = research_agent(query)
-        return str(response)
+        async with subagents.lease_async("research_assistant") as research_agent:
+            response = await research_agent.invoke_async(query)
+            return str(response)
     except Exception as e:
         return f"Error in research assistant: {str(e)}"
 
 @tool
-def product_recommendation_assistant(query: str) -> str:
+async def product_recommendation_assistant(query: str) -> str:
     """
     적절한 제품을 제안하여 제품 추천 쿼리를 처리합니다.
 
@@ -36,18 +63,14 @@ def product_recommendation_assistant(query: str) -> str:
         추론이 포함된 개인화된 제품 추천
     """
     try:
-        product_agent = Agent(
-            model="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
-            system_prompt="""당신은 전문 제품 추천 어시스턴트입니다.
-            사용자의 선호도를 바탕으로 개인화된 제품 제안을 제공하세요. 항상 출처를 인용하세요.""",
-        )
-        response = product_agent(query)
-        return str(response)
+        async with subagents.lease_async("product_recommendation_assistant") as product_agent:
+            response = await product_agent.invoke_async(query)
+            return str(response)
     except Exception as e:
         return f"Error in product recommendation: {str(e)}"
 
 @tool
-def trip_planning_assistant(query: str) -> str:
+async def trip_planning_assistant(query: str) -> str:
     """
     여행 일정을 작성하고 여행 조언을 제공합니다.
 
@@ -58,13 +81,9 @@ def trip_planning_assistant(query: str) -> str:
         상세한 여행 일정 또는 여행 조언
     """
     try:
-        travel_agent = Agent(
-            model="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
-            system_prompt="""당신은 전문 여행 계획 어시스턴트입니다.
-            사용자의 선호도를 바탕으로 상세한 여행 일정을 작성하세요.""",
-        )
-        response = travel_agent(query)
-        return str(response)
+        async with subagents.lease_async("trip_planning_assistant") as travel_agent:
+            response = await travel_agent.invoke_async(query)
+            return str(response)
     except Exception as e:
         return f"Error in trip planning: {str(e)}"
 
@@ -78,9 +97,13 @@ if __name__ == "__main__":
     - 특화된 지식이 필요하지 않은 간단한 질문을 위해 → 직접 답변하세요
 
     항상 사용자의 쿼리에 따라 가장 적절한 도구를 선택하세요.
+    서로의 결과가 필요 없는 요청(예: 리서치와 여행 계획)은 한 번의 응답에서 여러 도구를 함께 호출하세요. 함께 호출한 도구는 동시에 실행됩니다.
+    다른 도구의 결과가 필요한 작업(예: 계획을 파일로 저장)은 그 결과를 받은 뒤에 호출하세요.
     """
 
+    # 긴 시스템 프롬프트와 도구 명세는 매 턴 다시 전송되므로 프롬프트 캐시 지점을 자동으로 추가 (PROMPT_CACHE=0 으로 끄기)
     orchestrator = Agent(
+        model=shared_model(),
         system_prompt=MAIN_SYSTEM_PROMPT,
         tools=[
             research_assistant,
@@ -94,4 +117,10 @@ if __name__ == "__main__":
     customer_query = "스페인 국가에 대해서 리서치 좀 해줄 수 있니? 그리고 부모님과 그곳으로 7일 여행 가려고 하는데 계획 세우는 걸 좀 도와줘. 너가 세운 계획은 plan.md 파일로 저장해줘."
 
     response = orchestrator(customer_query)
+
+    # 오케스트레이터의 토큰 사용량과 프롬프트 캐시 읽기/쓰기 토큰
+    print_cache_usage(response)
+
+    # 하위 에이전트 재사용 현황 (created: 새로 만든 인스턴스, reused: 재사용한 횟수)
+    print(f"Sub-agents: {subagents.stats()}")
     
\ No newline at end of file
@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+import argparse
+import threading
+from strands import Agent, tool
+
+# 하위 에이전트는 create_model 로 만들어지므로 모의 모델을 환경 변수로 지정 (shared.mock_model import 전에)
+os.environ.setdefault("MOCK_MODEL", "1")
+
+# 공용 모듈(shared/) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.mock_model import MockModel, MOCK_TTFT, MOCK_OUTPUT_TOKENS, MOCK_TOKENS_PER_SECOND
+from shared.subagent_pool import SubAgentPool
+
+# agents_as_tools.py 와 같은 구조: 오케스트레이터가 한 턴에 여러 하위 에이전트를 함께 요청
+subagents = SubAgentPool(max_idle=64)
+subagents.register("research_assistant", system_prompt="리서치 어시스턴트")
+
+# 호출 중 생긴 스레드 수 (동기 도구는 호출마다 to_thread 워커 + run_async 스레드/이벤트 루프를 사용)
+peak_threads = 0
+
+def record_threads():
+    global peak_threads
+    peak_threads = max(peak_threads, threading.active_count())
+
+# 기존 방식: 동기 도구 → Strands 가 asyncio.to_thread 로 실행하고, agent(query) 가 다시 스레드와 asyncio.run 을 생성
+@tool
+def research_sync(query: str) -> str:
+    """리서치 질문에 답합니다."""
+    record_threads()
+    with subagents.lease("research_assistant") as agent:
+        return str(agent(query))
+
+# 새 방식: async 도구 → 오케스트레이터의 이벤트 루프에서 바로 invoke_async
+@tool
+async def research_async(query: str) -> str:
+    """리서치 질문에 답합니다."""
+    record_threads()
+    async with subagents.lease_async("research_assistant") as agent:
+        return str(await agent.invoke_async(query))
+
+def run(tool_fn, fanout):
+    global peak_threads
+    peak_threads = 0
+    script = [
+        {"tool_use": [{"name": tool_fn.tool_name, "input": {"query": f"주제 {i}"}} for i in range(fanout)]},
+        "정리했습니다.",
+    ]
+    # 오케스트레이터는 기본 tool_executor (Strands 1.14: ConcurrentToolExecutor) 그대로 사용
+    orchestrator = Agent(model=MockModel(script, ttft=0.0, tokens_per_second=0), tools=[tool_fn], callback_handler=None)
+    start = time.perf_counter()
+    orchestrator("여러 주제를 리서치해줘")
+    return time.perf_counter() - start, peak_threads
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fanout", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=3)
+
+    args = parser.parse_args()
+
+    sub_agent_seconds = MOCK_TTFT + MOCK_OUTPUT_TOKENS / MOCK_TOKENS_PER_SECOND
+    print(f"한 턴에 하위 에이전트 {args.fanout}개 호출 (각각 약 {sub_agent_seconds:.2f}s, MOCK_TTFT / MOCK_TOKENS_PER_SECOND 로 조절)")
+    print("============================================================")
+    # 워밍업: 풀에 인스턴스를 미리 만들어 두어 생성 비용이 섞이지 않게 함
+    run(research_async, args.fanout)
+    for name, tool_fn in (("동기 도구 (기존)", research_sync), ("async 도구", research_async)):
+        results = [run(tool_fn, args.fanout) for _ in range(args.repeat)]
+        wall = min(r[0] for r in results)
+        print(f"{name:>12}: 최소 {wall:.3f}s  (가장 느린 하나 대비 +{(wall - sub_agent_seconds) * 1000:6.1f}ms)  "
+              f"최대 스레드 {max(r[1] for r in results)}개")
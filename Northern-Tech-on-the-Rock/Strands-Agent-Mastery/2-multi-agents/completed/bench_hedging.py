@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import statistics
+
+# 공용 모듈(shared/) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.mock_model import MockModel
+from shared.resilient_model import ResilientModel
+
+MESSAGES = [{"role": "user", "content": [{"text": "신규 AI 고객 서비스 플랫폼의 3년 ROI 를 평가해주세요."}]}]
+
+# 대부분은 빠르지만 일부 요청만 느린 모델 (스로틀링 / 혼잡한 리전 흉내)
+class TailModel(MockModel):
+    def __init__(self, slow_ratio, slow_ttft, seed, **kwargs):
+        super().__init__(seed=seed, **kwargs)
+        self.slow_ratio = slow_ratio
+        self.slow_ttft = slow_ttft
+        self.fast_ttft = self.config["ttft"]
+        self._tail = random.Random(seed)
+
+    async def stream(self, *args, **kwargs):
+        self.config["ttft"] = self.slow_ttft if self._tail.random() < self.slow_ratio else self.fast_ttft
+        async for event in super().stream(*args, **kwargs):
+            yield event
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+async def run(model, calls):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        async for _ in model.stream(MESSAGES):
+            pass
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--ttft", type=float, default=0.1)
+    parser.add_argument("--slow-ttft", type=float, default=1.5)
+    parser.add_argument("--slow-ratio", type=float, default=0.05)
+    parser.add_argument("--tps", type=float, default=500.0)
+
+    args = parser.parse_args()
+
+    def tail_model(seed):
+        return TailModel(args.slow_ratio, args.slow_ttft, seed, ttft=args.ttft, tokens_per_second=args.tps)
+
+    print(f"꼬리 지연 모의 모델 (TTFT={args.ttft}s, {args.slow_ratio:.0%} 확률로 {args.slow_ttft}s), {args.calls}회 호출")
+    print("============================================================")
+    plain = asyncio.run(run(tail_model(1), args.calls))
+    hedged_model = ResilientModel(tail_model(1), backup=tail_model(2), hedge_after=args.ttft * 3)
+    hedged = asyncio.run(run(hedged_model, args.calls))
+    for name, latencies in (("헤징 없음", plain), ("헤징", hedged)):
+        print(f"{name:>8}: p50={statistics.median(latencies) * 1000:7.1f}ms  p95={percentile(latencies, 0.95) * 1000:7.1f}ms  "
+              f"p99={percentile(latencies, 0.99) * 1000:7.1f}ms")
+    stats = hedged_model.stats()
+    print(f"헤지 요청 {stats['hedges']}회 ({stats['hedges'] / args.calls:.1%}), 백업 승리 {stats['hedge_wins']}회")
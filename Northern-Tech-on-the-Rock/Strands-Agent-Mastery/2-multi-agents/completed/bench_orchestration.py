@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+from strands import Agent
+from strands.multiagent import GraphBuilder
+
+# 공용 모듈(shared/) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.mock_model import MockModel
+
+# graph_parallel.py 와 같은 구조: finance -> (tech, market) -> risk
+NODES = ["finance_expert", "tech_expert", "market_expert", "risk_analyst"]
+EDGES = [
+    ("finance_expert", "tech_expert"),
+    ("finance_expert", "market_expert"),
+    ("tech_expert", "risk_analyst"),
+    ("market_expert", "risk_analyst"),
+]
+# 가장 긴 경로의 노드 (tech/market 은 병렬)
+CRITICAL_PATH = ["finance_expert", "tech_expert", "risk_analyst"]
+
+def build_graph(args):
+    models = {
+        name: MockModel(ttft=args.ttft, tokens_per_second=args.tps, jitter=args.jitter, output_tokens=args.tokens, seed=i)
+        for i, name in enumerate(NODES)
+    }
+    builder = GraphBuilder()
+    for name in NODES:
+        builder.add_node(Agent(name=name, model=models[name], callback_handler=None), name)
+    for source, target in EDGES:
+        builder.add_edge(source, target)
+    builder.set_entry_point("finance_expert")
+    builder.set_max_node_executions(len(NODES))
+    return builder.build(), models
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ttft", type=float, default=0.2)
+    parser.add_argument("--tps", type=float, default=200.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=5)
+
+    args = parser.parse_args()
+
+    print(f"모의 모델로 그래프 실행 (TTFT={args.ttft}s, {args.tps:.0f} tokens/s, jitter={args.jitter}, 응답 {args.tokens} 토큰)")
+    print("============================================================")
+    walls, overheads = [], []
+    for _ in range(args.repeat):
+        graph, models = build_graph(args)
+        start = time.perf_counter()
+        result = graph("신규 AI 고객 서비스 플랫폼의 3년 ROI 를 평가해주세요.")
+        wall = time.perf_counter() - start
+        # 모델 대기 시간을 빼면 남는 것이 그래프/에이전트/스트리밍 처리 등 우리 코드의 오버헤드
+        model_time = sum(models[name].model_seconds for name in CRITICAL_PATH)
+        walls.append(wall)
+        overheads.append(wall - model_time)
+    print(f"실행 {args.repeat}회: 전체 p50={statistics.median(walls) * 1000:7.1f}ms  "
+          f"모델 제외 오버헤드 p50={statistics.median(overheads) * 1000:6.1f}ms  최대={max(overheads) * 1000:6.1f}ms")
+    print(f"완료 노드 {result.completed_nodes}/{result.total_nodes}, 모델 호출 {sum(m.calls for m in models.values())}회")
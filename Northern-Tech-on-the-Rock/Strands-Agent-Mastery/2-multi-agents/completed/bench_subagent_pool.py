@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+import concurrent.futures
+from strands import Agent
+from strands.models import BedrockModel
+
+# 공용 모듈(shared/) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.subagent_pool import SubAgentPool
+
+MODEL_ID = "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
+SYSTEM_PROMPT = "당신은 전문 여행 계획 어시스턴트입니다. 사용자의 선호도를 바탕으로 상세한 여행 일정을 작성하세요."
+
+# 기존 방식: 위임 호출마다 Agent 와 모델 클라이언트(boto3)를 새로 생성
+def fresh():
+    start = time.perf_counter()
+    Agent(model=BedrockModel(model_id=MODEL_ID), system_prompt=SYSTEM_PROMPT, callback_handler=None)
+    return time.perf_counter() - start
+
+# 풀 방식: 미리 만든 인스턴스를 빌렸다가 초기화해서 반납
+def pooled(pool):
+    start = time.perf_counter()
+    with pool.lease("travel") as agent:
+        agent.messages.append({"role": "user", "content": [{"text": "3일 여행"}]})
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=8)
+
+    args = parser.parse_args()
+
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    pool = SubAgentPool()
+    pool.register("travel", system_prompt=SYSTEM_PROMPT, model_id=MODEL_ID)
+
+    print(f"하위 에이전트 준비 비용 ({args.calls}회 위임 호출, 모델 호출 제외)")
+    print("============================================================")
+    fresh_times = [fresh() for _ in range(args.calls)]
+    pooled_times = [pooled(pool) for _ in range(args.calls)]
+    print(f"매번 생성: p50={statistics.median(fresh_times) * 1000:7.2f}ms  합계={sum(fresh_times) * 1000:8.1f}ms")
+    print(f"풀 재사용: p50={statistics.median(pooled_times) * 1000:7.2f}ms  합계={sum(pooled_times) * 1000:8.1f}ms")
+
+    # 동시에 빌려도 인스턴스가 겹치지 않는지 확인
+    with concurrent.futures.ThreadPoolExecutor(args.threads) as executor:
+        list(executor.map(lambda _: pooled(pool), range(args.calls)))
+    print(f"동시 {args.threads}개 스레드 후 풀 상태: {pool.stats()['travel']}")
+    print("(매번 생성하면 새 HTTP 연결 풀이라 첫 요청마다 TLS 핸드셰이크도 추가됨; 풀은 연결을 유지)")
@@ -1,23 +1,39 @@
-import os, argparse
+import os, sys, argparse
 from strands import Agent
 from strands.multiagent import GraphBuilder
 from strands_tools import file_write
 
+# 공용 모듈(shared/) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.tracing import setup_tracing
+from shared.mock_model import create_model
+from shared.rate_limiter import limiter
+
+# TRACE_FILE 환경 변수를 지정하면 모델 요청/도구 호출/노드별 실행 구간(span)을 파일로 저장
+# 분석: uv run shared/trace_report.py <TRACE_FILE>
+setup_tracing()
+
+# MOCK_MODEL 환경 변수를 지정하면 Bedrock 대신 오프라인 모의 모델 사용 (shared/mock_model.py)
+# 보고서 생성은 배치 작업: 같은 프로세스의 대화형 요청이 모델 요청 한도를 먼저 받음 (shared/rate_limiter.py)
+
 os.environ['BYPASS_TOOL_CONSENT'] = 'true' # file_write 확인 프롬프트 비활성화
 
 classifier = Agent(
     name="classifier", 
+    model=create_model("classifier", priority="batch"),
     system_prompt="당신은 보고서 요청을 분류하는 에이전트입니다. Technical 또는 Business 분류만 반환하세요."
     )
 
 technical_report = Agent(
     name="technical_expert", 
+    model=create_model("technical_expert", priority="batch"),
     system_prompt="당신은 기술적 관점에서 보고서를 작성하는 기술 전문가입니다. 보고서는 technical_report.md 로 저장합니다.",
     tools=[file_write]
     )
     
 business_report = Agent(
     name="business_expert", 
+    model=create_model("business_expert", priority="batch"),
     system_prompt="당신은  비즈니스 관점에서 보고서를 작성하는 비즈니스 전문가입니다. 보고서는 business_report.md 로 저장합니다.",
     tools=[file_write]
     )
@@ -81,4 +97,5 @@ if __name__ == "__main__":
     print(f"Failed nodes: {result.failed_nodes}")
     print(f"Execution time: {result.execution_time}ms")
     print(f"Token usage: {result.accumulated_usage}")
+    print(f"Rate limiter: {limiter.stats()}")
     print("\n============================================================\n")
@@ -1,10 +1,24 @@
+import os
+import sys
 from strands import Agent
 from strands.multiagent import GraphBuilder
 
-financial_advisor = Agent(name="financial_advisor", system_prompt="당신은 비용 편익 분석, 예산 영향, ROI 계산에 집중하는 재무 고문입니다. 다른 전문가들과 협력하여 포괄적인 재무 관점을 구축하세요.")
-technical_architect = Agent(name="technical_architect", system_prompt="당신은 실현 가능성, 구현 과제, 기술적 위험을 평가하는 기술 설계자입니다. 다른 전문가들과 협력하여 기술적 타당성을 확보하세요.")
-market_researcher = Agent(name="market_researcher", system_prompt="당신은 시장 상황, 사용자 요구, 경쟁 환경을 분석하는 시장 조사원입니다. 다른 전문가들과 협력하여 시장 기회를 검증하세요.")
-risk_analyst = Agent(name="risk_analyst", system_prompt="당신은 잠재적 위험, 완화 전략, 규정 준수 문제를 식별하는 위험 분석가입니다. 다른 전문가들과 협력하여 포괄적인 위험 평가를 보장하세요.")
+# 공용 모듈(shared/) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.tracing import setup_tracing
+from shared.mock_model import create_model
+from shared.prompt_cache import print_cache_usage
+
+# TRACE_FILE 환경 변수를 지정하면 모델 요청/도구 호출/노드별 실행 구간(span)을 파일로 저장
+# 분석: uv run shared/trace_report.py <TRACE_FILE>
+setup_tracing()
+
+# MOCK_MODEL 환경 변수를 지정하면 Bedrock 대신 오프라인 모의 모델 사용 (shared/mock_model.py)
+
+financial_advisor = Agent(name="financial_advisor", model=create_model("financial_advisor"), system_prompt="당신은 비용 편익 분석, 예산 영향, ROI 계산에 집중하는 재무 고문입니다. 다른 전문가들과 협력하여 포괄적인 재무 관점을 구축하세요.")
+technical_architect = Agent(name="technical_architect", model=create_model("technical_architect"), system_prompt="당신은 실현 가능성, 구현 과제, 기술적 위험을 평가하는 기술 설계자입니다. 다른 전문가들과 협력하여 기술적 타당성을 확보하세요.")
+market_researcher = Agent(name="market_researcher", model=create_model("market_researcher"), system_prompt="당신은 시장 상황, 사용자 요구, 경쟁 환경을 분석하는 시장 조사원입니다. 다른 전문가들과 협력하여 시장 기회를 검증하세요.")
+risk_analyst = Agent(name="risk_analyst", model=create_model("risk_analyst"), system_prompt="당신은 잠재적 위험, 완화 전략, 규정 준수 문제를 식별하는 위험 분석가입니다. 다른 전문가들과 협력하여 포괄적인 위험 평가를 보장하세요.")
 
 builder = GraphBuilder()
 
@@ -34,6 +48,9 @@ print(f"Total nodes: {result.total_nodes}")
 print(f"Completed nodes: {result.completed_nodes}")
 print(f"Execution time: {result.execution_time}ms")
 
+# 노드별 토큰 사용량과 프롬프트 캐시 읽기/쓰기 토큰
+print_cache_usage(result)
+
 print("Financial Advisor:")
 print(result.results["finance_expert"].result)
 print("============================================================\n")
@@ -1,10 +1,20 @@
 import os
+import sys
 import logging
 from strands import Agent
 from strands.multiagent import Swarm
-from strands.models import BedrockModel
 from strands_tools import file_write
 
+# 공용 모듈(shared/) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.tracing import setup_tracing
+from shared.mock_model import create_model
+from shared.prompt_cache import print_cache_usage
+
+# TRACE_FILE 환경 변수를 지정하면 모델 요청/도구 호출/노드별 실행 구간(span)을 파일로 저장
+# 분석: uv run shared/trace_report.py <TRACE_FILE>
+setup_tracing()
+
 os.environ['BYPASS_TOOL_CONSENT'] = 'true' # file_write 확인 프롬프트 비활성화
 
 logging.getLogger("strands.multiagent").setLevel(logging.DEBUG)
@@ -13,7 +23,8 @@ logging.basicConfig(
     handlers=[logging.StreamHandler()]
 )
 
-model = BedrockModel(
+# MOCK_MODEL 환경 변수를 지정하면 Bedrock 대신 오프라인 모의 모델 사용 (shared/mock_model.py)
+model = create_model(
     model_id="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
     max_tokens=64000
 )
@@ -83,3 +94,6 @@ print(f"Final result: {result.results}")
 print(f"Total iterations: {result.execution_count}")
 print(f"Execution time: {result.execution_time}ms")
 print(f"Token usage: {result.accumulated_usage}")
+
+# 에이전트(노드)별 프롬프트 캐시 읽기/쓰기 토큰: 긴 시스템 프롬프트와 도구 명세는 핸드오프마다 캐시에서 읽음
+print_cache_usage(result)
@@ -0,0 +1,301 @@
+"""
+Offline model provider for the workshop examples.
+
+``MockModel`` plugs in wherever a ``BedrockModel`` does and streams scripted or
+recorded responses (text, reasoning and tool-use blocks) with a configurable
+time-to-first-token, tokens/second and jitter, so the orchestration overhead of
+our own code (agents, graphs, swarms, tools, UI) can be measured deterministically
+on a machine without network access or AWS credentials.
+
+Every example picks its model through ``create_model``; set ``MOCK_MODEL`` to use
+the mock instead of Bedrock::
+
+    MOCK_MODEL=1 uv run 2-multi-agents/completed/graph_parallel.py
+    MOCK_MODEL=script.json MOCK_TTFT=0.5 MOCK_TOKENS_PER_SECOND=80 uv run ...
+
+A script is a JSON list of responses (or a JSONL file, one response per line),
+or a JSON object mapping agent names to such lists (``"default"`` for the rest).
+A response is one of:
+
+- a string: the text of the answer
+- ``{"text": ..., "reasoning": ..., "tool_use": {"name": ..., "input": {...}}}``
+  (``tool_use`` may be a list; the answer then stops with ``tool_use``)
+- ``{"events": [...]}``: raw stream events recorded with ``RecordingModel``
+
+When the script runs out (or there is none), a generated answer of
+``output_tokens`` tokens is streamed.
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+from typing import Any, AsyncGenerator, AsyncIterable, Dict, List, Optional, Type, TypeVar, Union
+
+from pydantic import BaseModel
+from strands.models import Model
+from strands.types.content import Messages
+from strands.types.streaming import StreamEvent
+from strands.types.tools import ToolSpec
+
+# Simple logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+T = TypeVar("T", bound=BaseModel)
+
+# "1" / "true" = generated answers, otherwise the path of a script file
+MOCK_MODEL = os.getenv("MOCK_MODEL")
+MOCK_TTFT = float(os.getenv("MOCK_TTFT", "0.3"))
+MOCK_TOKENS_PER_SECOND = float(os.getenv("MOCK_TOKENS_PER_SECOND", "60"))
+MOCK_JITTER = float(os.getenv("MOCK_JITTER", "0"))
+MOCK_OUTPUT_TOKENS = int(os.getenv("MOCK_OUTPUT_TOKENS", "60"))
+MOCK_SEED = int(os.getenv("MOCK_SEED", "0"))
+
+# Characters streamed per token, and used to estimate input tokens
+CHARS_PER_TOKEN = 4
+FILLER = "This is a scripted answer from the offline mock model. "
+
+Response = Union[str, Dict[str, Any]]
+
+
+def load_script(path: str, name: Optional[str] = None) -> List[Response]:
+    """Responses for agent ``name`` from a JSON / JSONL script file (see the module docstring)."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    try:
+        script = json.loads(text)
+    except json.JSONDecodeError:
+        script = [json.loads(line) for line in text.splitlines() if line.strip()]
+    if isinstance(script, dict) and "events" not in script:
+        script = script.get(name, script.get("default", [])) if name else script.get("default", [])
+    return script if isinstance(script, list) else [script]
+
+
+def _estimate_tokens(messages: Messages, system_prompt: Optional[str]) -> int:
+    size = len(json.dumps(messages, default=str)) + len(system_prompt or "")
+    return max(1, size // CHARS_PER_TOKEN)
+
+
+def _chunks(text: str) -> List[str]:
+    return [text[i:i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)]
+
+
+class MockModel(Model):
+    """
+    Model provider that replays scripted responses with simulated latency.
+
+    Args:
+        script: responses, consumed in order (see the module docstring)
+        ttft: seconds until the first token of each response
+        tokens_per_second: generation speed after the first token
+        jitter: relative spread applied per call to both (0.2 = +/-20%)
+        output_tokens: length of the generated answer once the script runs out
+        seed: seed of the jitter, so runs are repeatable
+    """
+
+    def __init__(
+        self,
+        script: Optional[List[Response]] = None,
+        ttft: float = MOCK_TTFT,
+        tokens_per_second: float = MOCK_TOKENS_PER_SECOND,
+        jitter: float = MOCK_JITTER,
+        output_tokens: int = MOCK_OUTPUT_TOKENS,
+        seed: int = MOCK_SEED,
+        model_id: str = "mock",
+    ):
+        self.script = list(script or [])
+        self.config = {
+            "model_id": model_id,
+            "ttft": ttft,
+            "tokens_per_second": tokens_per_second,
+            "jitter": jitter,
+            "output_tokens": output_tokens,
+        }
+        self._random = random.Random(seed)
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        # Simulated seconds spent waiting for the "model", for separating it from our own overhead
+        self.model_seconds = 0.0
+
+    @classmethod
+    def from_file(cls, path: str, name: Optional[str] = None, **kwargs: Any) -> "MockModel":
+        return cls(load_script(path, name), **kwargs)
+
+    def update_config(self, **model_config: Any) -> None:
+        self.config.update(model_config)
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.config
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "model_seconds": self.model_seconds,
+        }
+
+    def _next_response(self) -> Response:
+        if self.calls < len(self.script):
+            return self.script[self.calls]
+        words = (FILLER * (self.config["output_tokens"] * CHARS_PER_TOKEN // len(FILLER) + 1))
+        return f"[mock {self.calls + 1}] " + words[:self.config["output_tokens"] * CHARS_PER_TOKEN].rstrip()
+
+    def _events(self, response: Response) -> List[StreamEvent]:
+        """Stream events of one response, one content delta per token."""
+        if isinstance(response, dict) and "events" in response:
+            return response["events"]
+        if isinstance(response, str):
+            response = {"text": response}
+
+        events: List[StreamEvent] = [{"messageStart": {"role": "assistant"}}]
+        index = 0
+        if response.get("reasoning"):
+            for chunk in _chunks(response["reasoning"]):
+                events.append({"contentBlockDelta": {"contentBlockIndex": index, "delta": {"reasoningContent": {"text": chunk}}}})
+            events.append({"contentBlockDelta": {"contentBlockIndex": index, "delta": {"reasoningContent": {"signature": "mock"}}}})
+            events.append({"contentBlockStop": {"contentBlockIndex": index}})
+            index += 1
+        if response.get("text"):
+            for chunk in _chunks(response["text"]):
+                events.append({"contentBlockDelta": {"contentBlockIndex": index, "delta": {"text": chunk}}})
+            events.append({"contentBlockStop": {"contentBlockIndex": index}})
+            index += 1
+        tool_uses = response.get("tool_use") or []
+        if isinstance(tool_uses, dict):
+            tool_uses = [tool_uses]
+        for number, tool_use in enumerate(tool_uses):
+            tool_use_id = tool_use.get("toolUseId", f"mock-{self.calls + 1}-{number}")
+            events.append({"contentBlockStart": {"contentBlockIndex": index, "start": {"toolUse": {"toolUseId": tool_use_id, "name": tool_use["name"]}}}})
+            events.append({"contentBlockDelta": {"contentBlockIndex": index, "delta": {"toolUse": {"input": json.dumps(tool_use.get("input", {}))}}}})
+            events.append({"contentBlockStop": {"contentBlockIndex": index}})
+            index += 1
+        stop_reason = response.get("stop_reason", "tool_use" if tool_uses else "end_turn")
+        events.append({"messageStop": {"stopReason": stop_reason}})
+        return events
+
+    async def stream(
+        self,
+        messages: Messages,
+        tool_specs: Optional[List[ToolSpec]] = None,
+        system_prompt: Optional[str] = None,
+        *,
+        tool_choice: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterable[StreamEvent]:
+        events = self._events(self._next_response())
+        self.calls += 1
+        input_tokens = _estimate_tokens(messages, system_prompt)
+        factor = 1 + self._random.uniform(-1, 1) * self.config["jitter"]
+        ttft = max(0.0, self.config["ttft"] * factor)
+        interval = factor / self.config["tokens_per_second"] if self.config["tokens_per_second"] > 0 else 0.0
+
+        start = time.perf_counter()
+        # Tokens follow an absolute schedule, so the sleeps do not add up drift
+        deadline = start + ttft
+        output_tokens = 0
+        for event in events:
+            if "contentBlockDelta" in event or "contentBlockStart" in event:
+                delay = deadline - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                deadline += interval
+                output_tokens += 1
+            elif "metadata" in event:
+                # Recorded responses carry their original usage; report the replayed one
+                continue
+            yield event
+        elapsed = time.perf_counter() - start
+
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        self.model_seconds += elapsed
+        yield {
+            "metadata": {
+                "usage": {"inputTokens": input_tokens, "outputTokens": output_tokens, "totalTokens": input_tokens + output_tokens},
+                "metrics": {"latencyMs": int(elapsed * 1000)},
+            }
+        }
+
+    async def structured_output(
+        self, output_model: Type[T], prompt: Messages, system_prompt: Optional[str] = None, **kwargs: Any
+    ) -> AsyncGenerator[Dict[str, Union[T, Any]], None]:
+        response = self._next_response()
+        self.calls += 1
+        await asyncio.sleep(self.config["ttft"])
+        if isinstance(response, dict) and "output" in response:
+            yield {"output": output_model(**response["output"])}
+        else:
+            yield {"output": output_model.model_validate_json(response if isinstance(response, str) else response.get("text", "{}"))}
+
+
+class RecordingModel(Model):
+    """
+    Wrap a real model and append every streamed response to a JSONL file as
+    ``{"events": [...]}``, ready to be replayed with ``MockModel.from_file``.
+    """
+
+    def __init__(self, model: Model, path: str):
+        self.model = model
+        self.path = path
+
+    def update_config(self, **model_config: Any) -> None:
+        self.model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.model.get_config()
+
+    async def stream(self, messages: Messages, tool_specs: Optional[List[ToolSpec]] = None,
+                     system_prompt: Optional[str] = None, **kwargs: Any) -> AsyncIterable[StreamEvent]:
+        events = []
+        async for event in self.model.stream(messages, tool_specs, system_prompt, **kwargs):
+            events.append(event)
+            yield event
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"events": events}, ensure_ascii=False, default=str) + "\n")
+
+    def structured_output(self, output_model: Type[T], prompt: Messages, system_prompt: Optional[str] = None,
+                          **kwargs: Any) -> AsyncGenerator[Dict[str, Union[T, Any]], None]:
+        return self.model.structured_output(output_model, prompt, system_prompt, **kwargs)
+
+
+def create_model(name: Optional[str] = None, priority: Optional[str] = None, **bedrock_kwargs: Any) -> Model:
+    """
+    The model for an example agent: a ``BedrockModel(**bedrock_kwargs)``, or a
+    ``MockModel`` when ``MOCK_MODEL`` is set (with the script of agent ``name``).
+    Bedrock requests get prompt-cache points (``shared/prompt_cache.py``) unless
+    ``PROMPT_CACHE=0``, wait for the process-wide rate limiter with ``priority``
+    (``shared/rate_limiter.py``) and get jittered throttling backoff / hedging from a
+    ``ResilientModel`` (``shared/resilient_model.py``); a throttled request is
+    retried only by the agent's event loop. With ``MODEL_CACHE`` set the model is wrapped in a
+    ``CachingModel`` (``shared/model_cache.py``).
+    """
+    from shared.model_cache import cache_from_env
+
+    if not MOCK_MODEL:
+        from botocore.config import Config as BotocoreConfig
+        from strands.models import BedrockModel
+        from strands.models.bedrock import DEFAULT_READ_TIMEOUT
+        from shared.prompt_cache import PROMPT_CACHE_ENABLED, PromptCachingBedrockModel
+        from shared.rate_limiter import MODEL_PRIORITY, RateLimitedModel
+        from shared.resilient_model import resilient_from_env
+
+        model_class = PromptCachingBedrockModel if PROMPT_CACHE_ENABLED else BedrockModel
+        # Every attempt (retries and hedged requests too) goes through the limiter;
+        # ResilientModel waits for admission before it starts the hedge clock
+        def limited(**kwargs: Any) -> Model:
+            return RateLimitedModel(model_class(**kwargs), priority=priority or MODEL_PRIORITY)
+
+        # botocore would retry a throttled request up to 4 more times on its own, under the
+        # agent's retries: throttling is left to the agent loop, and ResilientModel retries
+        # 5xx / timeouts / dropped connections itself (see shared/resilient_model.py)
+        bedrock_kwargs.setdefault("boto_client_config", BotocoreConfig(
+            read_timeout=DEFAULT_READ_TIMEOUT, retries={"total_max_attempts": 1}
+        ))
+        return cache_from_env(resilient_from_env(limited, **bedrock_kwargs))
+    if MOCK_MODEL.lower() in ("1", "true", "yes"):
+        return cache_from_env(MockModel())
+    return cache_from_env(MockModel.from_file(MOCK_MODEL, name))
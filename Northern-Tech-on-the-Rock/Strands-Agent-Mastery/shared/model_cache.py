@@ -0,0 +1,305 @@
+"""
+Exact-match response cache for model calls.
+
+The workshop and regression prompts are sent over and over with the same system
+prompt and tools. ``CachingModel`` wraps any Strands model (usually a
+``BedrockModel``) and replays the recorded stream of an identical earlier request
+instead of calling the model again::
+
+    model = CachingModel(BedrockModel(model_id=...), disk=True)
+    agent = Agent(model=model)
+    ...
+    print(model.info())   # hits, misses, hit_rate, ...
+
+A request is identical when the canonical JSON of the model class, its whole
+config (model id, ``max_tokens``, ``additional_request_fields`` such as the
+``thinking`` budget, ...), the system prompt, the tool specs, the tool choice and
+the messages hashes to the same SHA-256. Only complete responses are stored (a
+stream that fails or is cancelled midway is not).
+
+Entries live in a memory LRU in front of an optional SQLite file that is shared
+between processes and evicts the least recently used entries once it grows
+beyond ``max_disk_mb``. ``create_model`` (``shared/mock_model.py``) wraps every
+example model in one when ``MODEL_CACHE`` is set.
+"""
+import os
+import json
+import time
+import base64
+import sqlite3
+import atexit
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, AsyncGenerator, AsyncIterable, Dict, List, Optional, Type, TypeVar, Union
+
+from pydantic import BaseModel
+from strands.models import Model
+from strands.types.content import Messages
+from strands.types.streaming import StreamEvent
+from strands.types.tools import ToolSpec
+
+# Simple logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+T = TypeVar("T", bound=BaseModel)
+
+# "1" / "true" = the default file, otherwise the path of the SQLite file (unset = no caching)
+MODEL_CACHE = os.getenv("MODEL_CACHE")
+MODEL_CACHE_PATH = os.path.join(tempfile.gettempdir(), "strands", "model_cache.sqlite")
+# Size of the SQLite file's entries above which the least recently used are evicted, in MiB
+MODEL_CACHE_MAX_MB = float(os.getenv("MODEL_CACHE_MAX_MB", "200"))
+# Responses kept in memory
+MODEL_CACHE_MAXSIZE = int(os.getenv("MODEL_CACHE_MAXSIZE", "256"))
+
+_MISSING = object()
+
+
+def _json_default(value: Any) -> Any:
+    # Images, documents and redacted reasoning are raw bytes
+    if isinstance(value, (bytes, bytearray)):
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _json_object_hook(value: Dict[str, Any]) -> Any:
+    if len(value) == 1 and "__bytes__" in value:
+        return base64.b64decode(value["__bytes__"])
+    return value
+
+
+def request_key(model: Model, messages: Messages, tool_specs: Optional[List[ToolSpec]],
+                system_prompt: Optional[str], tool_choice: Any = None) -> Optional[str]:
+    """
+    Canonical hash of one model request, or None when it cannot be serialized
+    (such requests are not cached).
+    """
+    request = {
+        "model": f"{type(model).__module__}.{type(model).__qualname__}",
+        "config": model.get_config(),
+        "system_prompt": system_prompt,
+        "tool_specs": tool_specs or [],
+        "tool_choice": tool_choice,
+        "messages": messages,
+    }
+    try:
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False, default=_json_default)
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskTier:
+    """
+    SQLite store of cached responses with least-recently-used eviction by size.
+
+    One connection per instance guarded by a lock; WAL mode lets several processes
+    read and write the same file.
+    """
+
+    def __init__(self, path: str = MODEL_CACHE_PATH, max_bytes: int = int(MODEL_CACHE_MAX_MB * 1024 * 1024)):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS model_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS model_cache_lru ON model_cache (last_used)")
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM model_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return _MISSING
+            self._conn.execute("UPDATE model_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0], object_hook=_json_object_hook)
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            data = json.dumps(value, ensure_ascii=False, default=_json_default)
+        except (TypeError, ValueError):
+            return
+        size = len(data.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO model_cache (key, value, size, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, data, size, now, now),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the total size fits. Caller holds the lock."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM model_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM model_cache ORDER BY last_used").fetchall()
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM model_cache WHERE key = ?", stale)
+        self.evictions += len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM model_cache")
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM model_cache").fetchone()
+        return {"path": self.path, "entries": entries, "bytes": size, "max_bytes": self.max_bytes, "evictions": self.evictions}
+
+
+class CachingModel(Model):
+    """
+    Model wrapper that replays cached streams of identical requests.
+
+    Args:
+        model: the model that serves cache misses
+        maxsize: responses kept in the memory LRU
+        disk: ``True`` for ``MODEL_CACHE_PATH``, a path for another SQLite file,
+            or ``False`` for memory only
+        max_disk_mb: size of the disk tier above which old entries are evicted
+    """
+
+    def __init__(self, model: Model, maxsize: int = MODEL_CACHE_MAXSIZE, disk: Union[bool, str] = False,
+                 max_disk_mb: float = MODEL_CACHE_MAX_MB):
+        self.model = model
+        self.maxsize = maxsize
+        self.disk = DiskTier(MODEL_CACHE_PATH if disk is True else disk, int(max_disk_mb * 1024 * 1024)) if disk else None
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.uncacheable = 0
+        # Model time and output tokens that hits did not have to pay for
+        self.saved_seconds = 0.0
+        self.saved_output_tokens = 0
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update_config(self, **model_config: Any) -> None:
+        self.model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.model.get_config()
+
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return entry
+        entry = self.disk.get(key) if self.disk is not None else _MISSING
+        if entry is _MISSING:
+            return None
+        with self._lock:
+            self.disk_hits += 1
+            self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def stream(
+        self,
+        messages: Messages,
+        tool_specs: Optional[List[ToolSpec]] = None,
+        system_prompt: Optional[str] = None,
+        *,
+        tool_choice: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterable[StreamEvent]:
+        key = request_key(self.model, messages, tool_specs, system_prompt, tool_choice)
+        entry = self._lookup(key) if key is not None else None
+        if entry is not None:
+            with self._lock:
+                self.hits += 1
+                self.saved_seconds += entry["seconds"]
+                self.saved_output_tokens += entry["output_tokens"]
+            for event in entry["events"]:
+                if "metadata" in event:
+                    # Same usage as the original response, but it took no model time
+                    event = {"metadata": {**event["metadata"], "metrics": {"latencyMs": 0}}}
+                yield event
+            return
+
+        with self._lock:
+            if key is None:
+                self.uncacheable += 1
+            else:
+                self.misses += 1
+        events = []
+        complete = False
+        started = time.perf_counter()
+        async for event in self.model.stream(messages, tool_specs, system_prompt, tool_choice=tool_choice, **kwargs):
+            events.append(event)
+            complete = complete or "messageStop" in event
+            yield event
+        if key is None or not complete:
+            return
+
+        output_tokens = sum(event["metadata"].get("usage", {}).get("outputTokens", 0) for event in events if "metadata" in event)
+        entry = {"events": events, "seconds": time.perf_counter() - started, "output_tokens": output_tokens}
+        with self._lock:
+            self._remember(key, entry)
+        if self.disk is not None:
+            self.disk.set(key, entry)
+
+    def structured_output(self, output_model: Type[T], prompt: Messages, system_prompt: Optional[str] = None,
+                          **kwargs: Any) -> AsyncGenerator[Dict[str, Union[T, Any]], None]:
+        # Parsed pydantic objects are not replayable events; always ask the model
+        return self.model.structured_output(output_model, prompt, system_prompt, **kwargs)
+
+    def clear(self) -> None:
+        """Drop every cached response (memory and disk)."""
+        with self._lock:
+            self._entries.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            info = {
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "uncacheable": self.uncacheable,
+                "hit_rate": self.hits / total if total else 0.0,
+                "saved_seconds": self.saved_seconds,
+                "saved_output_tokens": self.saved_output_tokens,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+        info["disk"] = self.disk.info() if self.disk is not None else None
+        return info
+
+
+def cache_from_env(model: Model) -> Model:
+    """Wrap ``model`` in a ``CachingModel`` with a disk tier when ``MODEL_CACHE`` is set."""
+    if not MODEL_CACHE:
+        return model
+    disk = True if MODEL_CACHE.lower() in ("1", "true", "yes") else MODEL_CACHE
+    cached = CachingModel(model, disk=disk)
+    atexit.register(lambda: logger.info(f"Model cache: {cached.info()}"))
+    return cached
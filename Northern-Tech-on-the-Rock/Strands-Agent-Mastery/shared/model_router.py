@@ -0,0 +1,300 @@
+"""
+Adaptive model cascade: send each request to the cheapest model that can answer it.
+
+``models.py`` pins every request to Claude Sonnet 4 with an 8000-token thinking
+budget, even for "80 / 4 * 5 의 제곱근은?". ``RoutingModel`` sits where the
+``BedrockModel`` was and picks one of several routes per request, ordered from
+cheapest to most capable (e.g. Haiku -> Sonnet -> Sonnet with thinking):
+
+1. ``estimate_complexity`` scores the request from 0 to 1 (length and kind of the
+   question, how deep the current tool plan already is); the first route whose
+   ``max_complexity`` covers the score is used. A tool plan of
+   ``deep_tool_cycles`` or more model calls in one turn goes to the last route.
+   Analytical prompts (three or more ``COMPLEX_WORDS``) score above
+   ``ROUTER_STANDARD_MAX`` on their own and start on the thinking route.
+2. A route with ``verify=True`` is buffered instead of streamed, and if the answer
+   looks unreliable (cut off at ``max_tokens``, empty, or hedging) the request is
+   escalated to the next route. Only cheap, fast routes should verify.
+
+Thinking can only be switched on at the start of a turn: in the middle of a tool
+loop Claude requires the pending tool use to start with a thinking block, so
+thinking routes are skipped there unless the turn was already thinking. A turn
+that reaches ``deep_tool_cycles`` without thinking therefore marks the *next* turn
+for the last route instead. Reasoning blocks are removed from the history sent to
+routes without thinking.
+
+``stats()`` reports calls, escalations, latency and tokens per route, so the
+thresholds (``ROUTER_FAST_MAX`` / ``ROUTER_STANDARD_MAX``) can be tuned.
+"""
+import os
+import re
+import time
+import logging
+import threading
+import statistics
+from collections import deque
+from typing import Any, AsyncGenerator, AsyncIterable, Dict, List, Optional, Type, TypeVar, Union
+
+from pydantic import BaseModel
+from strands.models import Model
+from strands.types.content import Messages
+from strands.types.streaming import StreamEvent
+from strands.types.tools import ToolSpec
+
+# Simple logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+T = TypeVar("T", bound=BaseModel)
+
+# Complexity up to which the fast / standard route answers
+ROUTER_FAST_MAX = float(os.getenv("ROUTER_FAST_MAX", "0.25"))
+ROUTER_STANDARD_MAX = float(os.getenv("ROUTER_STANDARD_MAX", "0.6"))
+# Model calls in one turn after which the most capable route takes over
+ROUTER_DEEP_TOOL_CYCLES = int(os.getenv("ROUTER_DEEP_TOOL_CYCLES", "4"))
+FAST_MODEL_ID = os.getenv("ROUTER_FAST_MODEL_ID", "us.anthropic.claude-3-5-haiku-20241022-v1:0")
+# Latencies kept per route for the percentiles
+HISTORY = 1000
+
+# Score per COMPLEX_WORDS match (at most three count): three matches alone exceed ROUTER_STANDARD_MAX
+COMPLEX_WORD_WEIGHT = float(os.getenv("ROUTER_COMPLEX_WORD_WEIGHT", "0.22"))
+# Words that mark analysis, planning or code rather than a lookup / calculation
+COMPLEX_WORDS = (
+    "분석", "비교", "설계", "계획", "전략", "평가", "리서치", "조사", "보고서", "최적화", "장단점", "왜", "코드", "디버그",
+    "analy", "compare", "design", "plan", "strategy", "evaluate", "research", "report", "optimi",
+    "trade-off", "why", "code", "debug", "step by step", "prove",
+)
+# Phrases of an answer the fast route was not sure about
+HEDGES = re.compile(r"잘 모르|확실하지 않|알 수 없|I'm not sure|I am not sure|I don't know|cannot determine", re.IGNORECASE)
+
+
+def _turn_start(messages: Messages) -> int:
+    """Index of the user message that started the current turn (not a tool result)."""
+    for index in range(len(messages) - 1, -1, -1):
+        message = messages[index]
+        if message["role"] == "user" and not any("toolResult" in block for block in message["content"]):
+            return index
+    return 0
+
+
+def tool_cycles(messages: Messages) -> int:
+    """Model calls already made in the current turn (assistant tool uses since the prompt)."""
+    return sum(1 for message in messages[_turn_start(messages):] if message["role"] == "assistant")
+
+
+def estimate_complexity(messages: Messages) -> float:
+    """
+    Cheap 0..1 estimate of how hard the current request is, from the prompt that
+    started the turn and the tool calls made since.
+    """
+    if not messages:
+        return 0.0
+    prompt = " ".join(block.get("text", "") for block in messages[_turn_start(messages)]["content"]).lower()
+    score = min(len(prompt) / 600, 1.0) * 0.35
+    score += min(sum(1 for word in COMPLEX_WORDS if word in prompt), 3) * COMPLEX_WORD_WEIGHT
+    if prompt.count("?") + prompt.count("\n") > 2 or "```" in prompt:
+        score += 0.1
+    score += tool_cycles(messages) * 0.1
+    return min(score, 1.0)
+
+
+def _without_reasoning(messages: Messages) -> Messages:
+    """Copy of the messages without reasoning blocks (signatures only verify on the model that made them)."""
+    cleaned = []
+    for message in messages:
+        content = [block for block in message["content"] if "reasoningContent" not in block]
+        if len(content) != len(message["content"]):
+            message = {**message, "content": content or [{"text": "..."}]}
+        cleaned.append(message)
+    return cleaned
+
+
+def _in_tool_loop_without_thinking(messages: Messages) -> bool:
+    """The last assistant message of this turn is a tool use without a thinking block."""
+    for message in reversed(messages[_turn_start(messages):]):
+        if message["role"] == "assistant":
+            return not any("reasoningContent" in block for block in message["content"])
+    return False
+
+
+def _confident(events: List[StreamEvent]) -> bool:
+    stop_reason = next((e["messageStop"].get("stopReason") for e in events if "messageStop" in e), None)
+    if stop_reason == "max_tokens":
+        return False
+    text = "".join(e["contentBlockDelta"]["delta"].get("text", "") for e in events if "contentBlockDelta" in e)
+    uses_tools = any("toolUse" in e.get("contentBlockStart", {}).get("start", {}) for e in events)
+    if not text.strip() and not uses_tools:
+        return False
+    return not HEDGES.search(text)
+
+
+class Route:
+    """
+    One model of the cascade.
+
+    Args:
+        name: shown in ``stats()``
+        model: any Strands model
+        max_complexity: highest ``estimate_complexity`` score this route takes
+        thinking: the model has extended thinking enabled
+        verify: buffer the answer and escalate if it looks unreliable
+    """
+
+    def __init__(self, name: str, model: Model, max_complexity: float = 1.0, thinking: bool = False, verify: bool = False):
+        self.name = name
+        self.model = model
+        self.max_complexity = max_complexity
+        self.thinking = thinking
+        self.verify = verify
+        self.calls = 0
+        self.escalated = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.ttft: "deque[float]" = deque(maxlen=HISTORY)
+        self.latency: "deque[float]" = deque(maxlen=HISTORY)
+
+
+class RoutingModel(Model):
+    """
+    Model that routes every request to one of ``routes`` (cheapest first); see the module docstring.
+    """
+
+    def __init__(self, routes: List[Route], deep_tool_cycles: int = ROUTER_DEEP_TOOL_CYCLES):
+        if not routes:
+            raise ValueError("RoutingModel needs at least one route")
+        self.routes = routes
+        self.deep_tool_cycles = deep_tool_cycles
+        # Set when a turn needed the last route but could not switch to thinking mid-loop
+        self._deep_next_turn = False
+        self._lock = threading.Lock()
+
+    # The last route is the reference configuration (what the agent would use without routing)
+    def update_config(self, **model_config: Any) -> None:
+        self.routes[-1].model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.routes[-1].model.get_config()
+
+    def choose(self, messages: Messages) -> int:
+        """Index of the route for a request before any escalation."""
+        score = estimate_complexity(messages)
+        index = next((i for i, route in enumerate(self.routes) if score <= route.max_complexity), len(self.routes) - 1)
+        cycles = tool_cycles(messages)
+        if cycles >= self.deep_tool_cycles:
+            index = len(self.routes) - 1
+        elif cycles == 0:
+            with self._lock:
+                if self._deep_next_turn:
+                    # The previous turn turned out to be a deep tool plan
+                    self._deep_next_turn = False
+                    index = len(self.routes) - 1
+        chosen = self._next_route(index, messages)
+        if chosen is None:
+            # Only thinking routes are left, but thinking cannot start in the middle of a plain tool loop
+            plain = [i for i, route in enumerate(self.routes) if not route.thinking]
+            chosen = plain[-1] if plain else index
+            with self._lock:
+                self._deep_next_turn = True
+        return chosen
+
+    def _next_route(self, index: int, messages: Messages) -> Optional[int]:
+        """The first route from ``index`` on that may take the request, if any."""
+        mid_loop = _in_tool_loop_without_thinking(messages)
+        for candidate in range(index, len(self.routes)):
+            if not (mid_loop and self.routes[candidate].thinking):
+                return candidate
+        return None
+
+    async def stream(
+        self,
+        messages: Messages,
+        tool_specs: Optional[List[ToolSpec]] = None,
+        system_prompt: Optional[str] = None,
+        *,
+        tool_choice: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterable[StreamEvent]:
+        index = self.choose(messages)
+        while True:
+            route = self.routes[index]
+            next_index = self._next_route(index + 1, messages)
+            # The last possible route always streams; nothing could replace its answer
+            verify = route.verify and next_index is not None
+            logger.debug(f"Routing request to '{route.name}' (complexity {estimate_complexity(messages):.2f})")
+
+            events = []
+            usage: Dict[str, Any] = {}
+            first_token = None
+            started = time.perf_counter()
+            request_messages = messages if route.thinking else _without_reasoning(messages)
+            async for event in route.model.stream(request_messages, tool_specs, system_prompt, tool_choice=tool_choice, **kwargs):
+                if first_token is None and "contentBlockDelta" in event:
+                    first_token = time.perf_counter() - started
+                if "metadata" in event:
+                    usage = event["metadata"].get("usage", {})
+                if verify:
+                    events.append(event)
+                else:
+                    yield event
+            self._record(route, first_token, time.perf_counter() - started, usage)
+
+            if not verify or _confident(events):
+                for event in events:
+                    yield event
+                return
+            with self._lock:
+                route.escalated += 1
+            logger.info(f"Escalating from '{route.name}' to '{self.routes[next_index].name}': answer looked unreliable")
+            index = next_index
+
+    def _record(self, route: Route, first_token: Optional[float], elapsed: float, usage: Dict[str, Any]) -> None:
+        with self._lock:
+            route.calls += 1
+            route.input_tokens += usage.get("inputTokens", 0)
+            route.output_tokens += usage.get("outputTokens", 0)
+            route.latency.append(elapsed)
+            if first_token is not None:
+                route.ttft.append(first_token)
+
+    async def structured_output(
+        self, output_model: Type[T], prompt: Messages, system_prompt: Optional[str] = None, **kwargs: Any
+    ) -> AsyncGenerator[Dict[str, Union[T, Any]], None]:
+        route = self.routes[self.choose(prompt)]
+        request_messages = prompt if route.thinking else _without_reasoning(prompt)
+        async for event in route.model.structured_output(output_model, request_messages, system_prompt, **kwargs):
+            yield event
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per route: calls, escalations away from it, p50 time-to-first-token / latency and tokens."""
+        with self._lock:
+            return {
+                route.name: {
+                    "calls": route.calls,
+                    "escalated": route.escalated,
+                    "ttft_p50": statistics.median(route.ttft) if route.ttft else None,
+                    "latency_p50": statistics.median(route.latency) if route.latency else None,
+                    "input_tokens": route.input_tokens,
+                    "output_tokens": route.output_tokens,
+                }
+                for route in self.routes
+            }
+
+
+def thinking_cascade(model_id: str, budget_tokens: int, fast_model_id: str = FAST_MODEL_ID, **bedrock_kwargs: Any) -> RoutingModel:
+    """
+    Three routes for a thinking model: ``fast_model_id`` without thinking (verified),
+    ``model_id`` without thinking, and ``model_id`` with ``budget_tokens`` of
+    interleaved thinking. Models come from ``create_model``, so ``MOCK_MODEL``,
+    prompt caching and ``MODEL_CACHE`` apply to every route.
+    """
+    from shared.mock_model import create_model
+
+    thinking_fields = {
+        "anthropic_beta": ["interleaved-thinking-2025-05-14"],
+        "thinking": {"type": "enabled", "budget_tokens": budget_tokens},
+    }
+    return RoutingModel([
+        Route("fast", create_model("fast", model_id=fast_model_id, **bedrock_kwargs), ROUTER_FAST_MAX, verify=True),
+        Route("standard", create_model("standard", model_id=model_id, **bedrock_kwargs), ROUTER_STANDARD_MAX),
+        Route("thinking", create_model("thinking", model_id=model_id, additional_request_fields=thinking_fields, **bedrock_kwargs), thinking=True),
+    ])
@@ -0,0 +1,149 @@
+"""
+Prompt-prefix caching for Bedrock requests.
+
+Long fixed system prompts and tool specs are sent again on every turn, every
+agent loop cycle and every Swarm handoff. Bedrock can cache a request prefix up
+to a ``cachePoint``; a later request with the same prefix reads it from the
+cache, which cuts time-to-first-token and bills those tokens at the cache-read
+rate.
+
+``PromptCachingBedrockModel`` places the cache points automatically on every
+request. The prefix is ordered tools -> system prompt -> messages, and each point
+caches everything before it:
+
+- after the tool specs and after the system prompt (stable for the whole session)
+- after the last message and after the previous request's last message, so the
+  conversation so far is written once and read on the next cycle / turn
+
+A point is only placed once the prefix in front of it reaches ``min_tokens`` (the
+model's minimum cacheable prefix), and at most ``MAX_CACHE_POINTS`` are used.
+``cache_usage`` / ``print_cache_usage`` report the cache read/write tokens of an
+agent, graph or swarm result next to its ``accumulated_usage``.
+"""
+import os
+import json
+import logging
+from typing import Any, Dict
+
+from strands.models import BedrockModel
+
+# Simple logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Set PROMPT_CACHE=0 to send requests without cache points
+PROMPT_CACHE_ENABLED = os.getenv("PROMPT_CACHE", "1") != "0"
+# Smallest prefix Bedrock caches (1024 for Claude Sonnet / Opus, 2048 for Claude Haiku)
+PROMPT_CACHE_MIN_TOKENS = int(os.getenv("PROMPT_CACHE_MIN_TOKENS", "1024"))
+# Bedrock accepts at most four cache points per request
+MAX_CACHE_POINTS = 4
+# Model families that support cachePoint blocks
+CACHING_MODELS = ("anthropic.claude", "amazon.nova")
+# UTF-8 bytes per token; counting bytes keeps Korean text (3 bytes per character) from being underestimated
+BYTES_PER_TOKEN = 4
+
+CACHE_POINT = {"cachePoint": {"type": "default"}}
+
+
+def _tokens(value: Any) -> int:
+    return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8")) // BYTES_PER_TOKEN
+
+
+def supports_prompt_caching(model_id: str) -> bool:
+    return any(family in model_id for family in CACHING_MODELS)
+
+
+class PromptCachingBedrockModel(BedrockModel):
+    """
+    ``BedrockModel`` that adds cache points to every request (see the module docstring).
+
+    Args:
+        min_tokens: smallest prefix a cache point is placed after
+        cache_history: also cache the conversation, not only tools and system prompt
+        **model_config: passed to ``BedrockModel``
+    """
+
+    def __init__(self, *, min_tokens: int = PROMPT_CACHE_MIN_TOKENS, cache_history: bool = True, **model_config: Any):
+        super().__init__(**model_config)
+        self.min_tokens = min_tokens
+        self.cache_history = cache_history
+
+    def format_request(self, messages, tool_specs=None, system_prompt=None, tool_choice=None) -> Dict[str, Any]:
+        request = super().format_request(messages, tool_specs, system_prompt, tool_choice)
+        if supports_prompt_caching(self.config["model_id"]):
+            self.add_cache_points(request)
+        return request
+
+    def add_cache_points(self, request: Dict[str, Any]) -> int:
+        """Insert cache points into a Converse request in place; returns how many were added."""
+        # Points the caller configured (cache_prompt / cache_tools) count towards the limit
+        placed = sum(1 for block in request.get("system", []) if "cachePoint" in block)
+        tools = request.get("toolConfig", {}).get("tools", [])
+        placed += sum(1 for tool in tools if "cachePoint" in tool)
+        prefix = 0
+
+        if tools:
+            prefix += _tokens(tools)
+            if prefix >= self.min_tokens and placed < MAX_CACHE_POINTS and "cachePoint" not in tools[-1]:
+                tools.append(CACHE_POINT)
+                placed += 1
+
+        system = request.get("system", [])
+        if system:
+            prefix += _tokens(system)
+            if prefix >= self.min_tokens and placed < MAX_CACHE_POINTS and "cachePoint" not in system[-1]:
+                system.append(CACHE_POINT)
+                placed += 1
+
+        messages = request["messages"]
+        if self.cache_history and messages:
+            # The last message of this request and of the previous one (the user message
+            # before the last assistant message): the first is written, the second read
+            targets = [len(messages) - 1]
+            previous = next(
+                (i for i in range(len(messages) - 3, -1, -1) if messages[i]["role"] == "user"), None
+            )
+            if previous is not None:
+                targets.append(previous)
+            cumulative = prefix
+            boundaries = {}
+            for index, message in enumerate(messages):
+                cumulative += _tokens(message["content"])
+                boundaries[index] = cumulative
+            for index in sorted(targets):
+                if placed >= MAX_CACHE_POINTS:
+                    break
+                if boundaries[index] >= self.min_tokens:
+                    messages[index]["content"].append(CACHE_POINT)
+                    placed += 1
+        return placed
+
+
+def cache_usage(result: Any) -> Dict[str, Dict[str, int]]:
+    """
+    Token usage including cache reads/writes per node of a graph or swarm result
+    (``"total"`` for the whole run), or of a single agent result.
+    """
+    def usage_of(usage: Dict[str, Any]) -> Dict[str, int]:
+        return {
+            "input": usage.get("inputTokens", 0),
+            "output": usage.get("outputTokens", 0),
+            "cache_read": usage.get("cacheReadInputTokens", 0),
+            "cache_write": usage.get("cacheWriteInputTokens", 0),
+        }
+
+    if hasattr(result, "metrics") and hasattr(result.metrics, "accumulated_usage"):
+        return {"total": usage_of(result.metrics.accumulated_usage)}
+    report = {node_id: usage_of(node.accumulated_usage) for node_id, node in getattr(result, "results", {}).items()}
+    report["total"] = usage_of(result.accumulated_usage)
+    return report
+
+
+def print_cache_usage(result: Any) -> None:
+    for name, usage in cache_usage(result).items():
+        prompt = usage["input"] + usage["cache_read"] + usage["cache_write"]
+        ratio = usage["cache_read"] / prompt if prompt else 0.0
+        print(
+            f"{name:>24}: input={usage['input']:>7,}  cache_read={usage['cache_read']:>7,}  "
+            f"cache_write={usage['cache_write']:>7,}  output={usage['output']:>6,}  (prompt read from cache {ratio:.0%})"
+        )
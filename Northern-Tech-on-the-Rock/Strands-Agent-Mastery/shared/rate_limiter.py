@@ -0,0 +1,386 @@
+"""
+Process-wide rate limiter for model requests.
+
+When many chatbot sessions and graph jobs share one process they all hit the
+model endpoint at once; Bedrock throttles them, every caller retries at the same
+moment, and the next wave is throttled again. ``RateLimiter`` keeps the whole
+process under the account quota instead:
+
+- two token buckets refilled continuously: requests per minute and tokens per
+  minute. A request reserves its estimated input tokens plus the average output
+  of recent answers (at most its ``max_tokens``), and the difference is settled
+  with the actual usage once the answer is done. Reserving the whole
+  ``max_tokens`` (64000 in ``swarms.py``) would cap the process at a handful of
+  requests in flight.
+- a priority queue in front of the buckets: ``interactive`` requests (a user is
+  watching, e.g. ``streamlit_app.py``) go before ``default`` ones, which go before
+  ``batch`` jobs (e.g. ``graph_condition.py``); within a class arrival order is
+  kept, and a large request is not overtaken by smaller ones of the same class
+- when a request is throttled anyway, both buckets are emptied, so the whole
+  process pauses briefly instead of sending a 429 cascade
+
+``RateLimitedModel`` sends any model's requests through a limiter (the
+process-wide ``limiter`` by default); ``create_model`` (``shared/mock_model.py``)
+wraps every Bedrock model in one, with its ``priority``::
+
+    model = create_model("classifier", priority="batch")
+    ...
+    print(limiter.stats())   # queued per priority, wait-time percentiles, ...
+
+The limits should match the account's Bedrock quotas for the model
+(``MODEL_RPM`` / ``MODEL_TPM``; 0 = unlimited). The limiter only covers one
+process; separate processes each need their own share of the quota.
+"""
+import os
+import json
+import time
+import heapq
+import asyncio
+import logging
+import threading
+import itertools
+from collections import deque
+from typing import Any, AsyncGenerator, AsyncIterable, Dict, List, Optional, Type, TypeVar, Union
+
+from pydantic import BaseModel
+from strands.models import Model
+from strands.types.content import Messages
+from strands.types.exceptions import ModelThrottledException
+from strands.types.streaming import StreamEvent
+from strands.types.tools import ToolSpec
+
+# Simple logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+T = TypeVar("T", bound=BaseModel)
+
+# Requests / tokens per minute for the whole process (0 = unlimited)
+MODEL_RPM = float(os.getenv("MODEL_RPM", "100"))
+MODEL_TPM = float(os.getenv("MODEL_TPM", "400000"))
+# Priority of models created without one
+MODEL_PRIORITY = os.getenv("MODEL_PRIORITY", "default")
+# Lower value = served first
+PRIORITIES = {"interactive": 0, "default": 1, "batch": 2}
+# Output tokens reserved until the output of a few real answers is known
+DEFAULT_OUTPUT_RESERVE = 1000
+# Answers the output estimate is averaged over
+OUTPUT_HISTORY = 50
+# UTF-8 bytes per token (as in shared/prompt_cache.py)
+BYTES_PER_TOKEN = 4
+# Recent waits kept per priority for the percentiles
+HISTORY = 1000
+# Queue waits longer than this many seconds are logged
+SLOW_WAIT = 5.0
+
+
+def estimate_tokens(messages: Messages, tool_specs: Optional[List[ToolSpec]] = None, system_prompt: Optional[str] = None) -> int:
+    """Rough input-token count of a request, from its UTF-8 size."""
+    size = len(json.dumps([messages, tool_specs or [], system_prompt or ""], ensure_ascii=False, default=str).encode("utf-8"))
+    return size // BYTES_PER_TOKEN
+
+
+class TokenBucket:
+    """
+    ``per_minute`` units per minute, refilled continuously, holding at most one
+    minute's worth. The level may go negative when actual usage exceeds what was
+    reserved; later requests then wait for it to recover.
+    """
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.level = per_minute
+        self._updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.per_minute <= 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.per_minute, self.level + (now - self._updated) * self.per_minute / 60)
+        self._updated = now
+
+    def cost(self, amount: float) -> float:
+        # A request larger than the whole bucket would wait forever; let it drain the bucket instead
+        return min(amount, self.per_minute)
+
+    def delay(self, amount: float) -> float:
+        """Seconds until ``amount`` is available (0 = now)."""
+        if self.unlimited:
+            return 0.0
+        self._refill()
+        missing = self.cost(amount) - self.level
+        return max(0.0, missing * 60 / self.per_minute)
+
+    def take(self, amount: float) -> None:
+        if not self.unlimited:
+            self._refill()
+            self.level -= self.cost(amount)
+
+    def give_back(self, amount: float) -> None:
+        """Settle a reservation: positive returns unused units, negative charges extra."""
+        if not self.unlimited:
+            self._refill()
+            self.level = min(self.per_minute, self.level + amount)
+
+    def available(self) -> float:
+        if not self.unlimited:
+            self._refill()
+        return self.level
+
+    def drain(self) -> None:
+        if not self.unlimited:
+            self._refill()
+            self.level = min(self.level, 0.0)
+
+
+class _Waiter:
+    def __init__(self, priority: int, tokens: int):
+        self.priority = priority
+        self.tokens = tokens
+        self.enqueued = time.monotonic()
+        self.abandoned = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._future: Optional["asyncio.Future[None]"] = None
+
+    def arm(self) -> "asyncio.Future[None]":
+        self._loop = asyncio.get_running_loop()
+        self._future = self._loop.create_future()
+        return self._future
+
+    def wake(self) -> None:
+        # Callers run on different event loops (one per Agent call thread)
+        future, loop = self._future, self._loop
+        if future is not None and loop is not None:
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits with priority classes (see
+    the module docstring). Use ``acquire`` before a request and ``settle`` after.
+    """
+
+    def __init__(self, rpm: float = MODEL_RPM, tpm: float = MODEL_TPM):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._queue: List[Any] = []
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._waits: Dict[str, "deque[float]"] = {name: deque(maxlen=HISTORY) for name in PRIORITIES}
+        self._outputs: "deque[int]" = deque(maxlen=OUTPUT_HISTORY)
+        self.admitted = 0
+        self.throttled = 0
+        self.reserved_tokens = 0
+        self.used_tokens = 0
+
+    @staticmethod
+    def _priority(name: str) -> int:
+        if name not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{name}', expected one of {tuple(PRIORITIES)}")
+        return PRIORITIES[name]
+
+    def _head(self) -> Optional[_Waiter]:
+        """First waiter still waiting. Caller holds the lock."""
+        while self._queue and self._queue[0][2].abandoned:
+            heapq.heappop(self._queue)
+        return self._queue[0][2] if self._queue else None
+
+    def expected_output(self) -> int:
+        """Output tokens to reserve for a request: the mean of recent answers."""
+        with self._lock:
+            return int(sum(self._outputs) / len(self._outputs)) if self._outputs else DEFAULT_OUTPUT_RESERVE
+
+    def try_acquire(self, priority: str = "default", tokens: int = 0) -> bool:
+        """Admit a request only if nobody is waiting and the buckets have room now (used for optional requests)."""
+        self._priority(priority)
+        with self._lock:
+            if self._head() is not None or max(self.requests.delay(1), self.tokens.delay(tokens)) > 0:
+                return False
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self.admitted += 1
+            self.reserved_tokens += tokens
+            self._waits[priority].append(0.0)
+            return True
+
+    async def acquire(self, priority: str = "default", tokens: int = 0) -> None:
+        """Wait until this request (``tokens`` estimated tokens) may be sent."""
+        waiter = _Waiter(self._priority(priority), tokens)
+        with self._lock:
+            heapq.heappush(self._queue, (waiter.priority, next(self._order), waiter))
+        try:
+            while True:
+                future = waiter.arm()
+                with self._lock:
+                    delay = None
+                    if self._head() is waiter:
+                        delay = max(self.requests.delay(1), self.tokens.delay(tokens))
+                        if delay == 0:
+                            heapq.heappop(self._queue)
+                            self.requests.take(1)
+                            self.tokens.take(tokens)
+                            self.admitted += 1
+                            self.reserved_tokens += tokens
+                            self._record_wait(waiter, priority)
+                            head = self._head()
+                            if head is not None:
+                                head.wake()
+                            return
+                # Only the head polls the buckets; the others wait until they move up
+                try:
+                    await asyncio.wait_for(future, timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            with self._lock:
+                waiter.abandoned = True
+                head = self._head()
+                if head is not None:
+                    head.wake()
+            raise
+
+    def _record_wait(self, waiter: _Waiter, priority: str) -> None:
+        wait = time.monotonic() - waiter.enqueued
+        self._waits[priority].append(wait)
+        if wait > SLOW_WAIT:
+            logger.info(f"{priority} model request waited {wait:.1f}s for the rate limit")
+
+    def settle(self, reserved: int, used: Optional[int], output: Optional[int] = None) -> None:
+        """
+        Replace a request's reservation with its actual token usage (None = unknown,
+        keep it); ``output`` feeds the output estimate of later reservations.
+        """
+        if used is None:
+            return
+        with self._lock:
+            self.tokens.give_back(self.tokens.cost(reserved) - used)
+            self.used_tokens += used
+            if output is not None:
+                self._outputs.append(output)
+            head = self._head()
+        if head is not None:
+            head.wake()
+
+    def throttle(self) -> None:
+        """The endpoint throttled us anyway: stop everyone until the buckets refill."""
+        with self._lock:
+            self.throttled += 1
+            self.requests.drain()
+            self.tokens.drain()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth per priority, queue-wait percentiles (milliseconds) and bucket levels."""
+
+        def summary(samples):
+            if not samples:
+                return {"count": 0}
+            ordered = sorted(samples)
+            pick = lambda q: ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000
+            return {"count": len(ordered), "p50": pick(0.5), "p95": pick(0.95), "max": ordered[-1] * 1000}
+
+        with self._lock:
+            queued = {name: 0 for name in PRIORITIES}
+            by_value = {value: name for name, value in PRIORITIES.items()}
+            for priority, _, waiter in self._queue:
+                if not waiter.abandoned:
+                    queued[by_value[priority]] += 1
+            return {
+                "rpm": self.requests.per_minute,
+                "tpm": self.tokens.per_minute,
+                "queued": queued,
+                "admitted": self.admitted,
+                "throttled": self.throttled,
+                "requests_available": self.requests.available(),
+                "tokens_available": self.tokens.available(),
+                "reserved_tokens": self.reserved_tokens,
+                "used_tokens": self.used_tokens,
+                "queue_wait_ms": {name: summary(waits) for name, waits in self._waits.items()},
+            }
+
+
+# Shared by every model created with create_model
+limiter = RateLimiter()
+
+
+class RateLimitedModel(Model):
+    """
+    Model whose requests wait for a ``RateLimiter`` first.
+
+    Args:
+        model: the model to limit
+        priority: ``"interactive"``, ``"default"`` or ``"batch"``
+        rate_limiter: the limiter to go through (the process-wide ``limiter`` by default)
+    """
+
+    def __init__(self, model: Model, priority: str = MODEL_PRIORITY, rate_limiter: Optional[RateLimiter] = None):
+        RateLimiter._priority(priority)
+        self.model = model
+        self.priority = priority
+        self.limiter = rate_limiter or limiter
+
+    def update_config(self, **model_config: Any) -> None:
+        self.model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.model.get_config()
+
+    def _reserve(self, messages: Messages, tool_specs: Optional[List[ToolSpec]], system_prompt: Optional[str]) -> int:
+        config = self.get_config()
+        max_tokens = config.get("max_tokens") if isinstance(config, dict) else None
+        output = self.limiter.expected_output()
+        return estimate_tokens(messages, tool_specs, system_prompt) + (min(output, max_tokens) if max_tokens else output)
+
+    async def admit(self, messages: Messages, tool_specs: Optional[List[ToolSpec]] = None,
+                    system_prompt: Optional[str] = None) -> int:
+        """
+        Wait for the limiter and return the reservation, to pass to ``stream(admission=...)``.
+        Lets a caller (``ResilientModel``) time the request from admission, not from queueing.
+        """
+        reserved = self._reserve(messages, tool_specs, system_prompt)
+        await self.limiter.acquire(self.priority, reserved)
+        return reserved
+
+    def try_admit(self, messages: Messages, tool_specs: Optional[List[ToolSpec]] = None,
+                  system_prompt: Optional[str] = None) -> Optional[int]:
+        """Like ``admit``, but None instead of waiting when the limiter has no room right now."""
+        reserved = self._reserve(messages, tool_specs, system_prompt)
+        return reserved if self.limiter.try_acquire(self.priority, reserved) else None
+
+    async def stream(
+        self,
+        messages: Messages,
+        tool_specs: Optional[List[ToolSpec]] = None,
+        system_prompt: Optional[str] = None,
+        *,
+        tool_choice: Any = None,
+        admission: Optional[int] = None,
+        **kwargs: Any,
+    ) -> AsyncIterable[StreamEvent]:
+        # ``admission``: reservation from ``admit`` / ``try_admit`` (the request was already admitted)
+        reserved = admission if admission is not None else await self.admit(messages, tool_specs, system_prompt)
+        used, output = None, None
+        try:
+            async for event in self.model.stream(messages, tool_specs, system_prompt, tool_choice=tool_choice, **kwargs):
+                if "metadata" in event and "usage" in event["metadata"]:
+                    usage = event["metadata"]["usage"]
+                    output = usage.get("outputTokens", 0)
+                    used = usage.get("inputTokens", 0) + output + usage.get("cacheWriteInputTokens", 0)
+                yield event
+        except ModelThrottledException:
+            self.limiter.throttle()
+            raise
+        finally:
+            self.limiter.settle(reserved, used, output)
+
+    async def structured_output(
+        self, output_model: Type[T], prompt: Messages, system_prompt: Optional[str] = None, **kwargs: Any
+    ) -> AsyncGenerator[Dict[str, Union[T, Any]], None]:
+        await self.limiter.acquire(self.priority, self._reserve(prompt, None, system_prompt))
+        try:
+            async for event in self.model.structured_output(output_model, prompt, system_prompt, **kwargs):
+                yield event
+        except ModelThrottledException:
+            self.limiter.throttle()
+            raise
@@ -0,0 +1,395 @@
+"""
+Throttling-aware retries and hedged requests for model calls.
+
+Under load, Bedrock throttling and the occasional slow stream make up most of the
+latency tail, and the only cap we had was the coarse ``node_timeout`` of a Swarm
+or graph node. ``ResilientModel`` wraps any Strands model:
+
+- **Retries**: the agent's event loop already retries a ``ModelThrottledException``
+  (``AGENT_ATTEMPTS`` = 6 attempts in Strands 1.14, fixed delays of 4s, 8s, ...),
+  so by default ``stream`` does not retry on its own (``MODEL_RETRIES=0``).
+  Before it passes the error up, it sleeps a "full jitter" backoff (a random delay between
+  0 and ``base_delay * 2**n``, capped at ``max_delay``, ``n`` = throttles in a
+  row), so clients throttled together do not come back together on the agent's
+  fixed schedule. Every retry here multiplies with the agent's attempts: one model
+  call sends up to ``AGENT_ATTEMPTS * (1 + retries)`` requests to the primary
+  (6 by default), plus at most one hedged request per attempt, and each throttled
+  request also pauses the rate limiter. ``structured_output`` is not retried by
+  the agent, so it retries ``structured_retries`` times itself.
+- **Transient errors**: the agent does not retry anything but throttling, and
+  ``create_model`` turns botocore's own retries off (they would retry throttling
+  too). A 5xx / ``ServiceUnavailableException``, a read timeout or a dropped
+  connection before the first event is therefore retried here, up to
+  ``transient_retries`` times (``MODEL_TRANSIENT_RETRIES``, 2 like botocore's
+  standard mode) with the same jittered backoff.
+- **Hedging** (only with a ``backup`` model, e.g. another region or model id):
+  when the primary has not produced its first token after the ``percentile`` of
+  its recent time-to-first-token (first content event; ``hedge_after`` until ``min_samples`` calls are
+  known), the same request is sent to the backup. Whichever stream starts first
+  is used and the other one is cancelled. A primary that is throttled outright is
+  hedged immediately.
+
+With a ``RateLimitedModel`` inside (``shared/rate_limiter.py``), the request is
+admitted by the limiter *before* the hedge clock and the time-to-first-token
+sample start, so waiting in the limiter queue is neither hedged nor counted as
+model latency. A hedge is only sent when the backup's limiter has room right
+away; otherwise it is skipped (``hedges_skipped``) instead of taking a slot from
+the requests still queued.
+
+::
+
+    model = ResilientModel(
+        BedrockModel(model_id=MODEL_ID),
+        backup=BedrockModel(model_id=MODEL_ID, region_name="us-west-2"),
+    )
+    ...
+    print(model.stats())   # retries, hedges, hedge_wins, ttft_p50 / p95, ...
+
+Cancelling the loser stops its events from being consumed; a ``BedrockModel``
+worker thread still reads the rest of its response in the background, so hedged
+requests do cost the extra tokens. ``create_model`` (``shared/mock_model.py``)
+wraps every Bedrock model in one; set ``HEDGE_REGION`` and/or ``HEDGE_MODEL_ID``
+to enable hedging.
+"""
+import os
+import time
+import atexit
+import random
+import asyncio
+import logging
+import threading
+import statistics
+from collections import deque
+from typing import Any, AsyncGenerator, AsyncIterable, AsyncIterator, Callable, Dict, List, Optional, Type, TypeVar, Union
+
+from botocore.exceptions import ClientError, ConnectionError as BotocoreConnectionError, HTTPClientError
+from pydantic import BaseModel
+from strands.event_loop.event_loop import MAX_ATTEMPTS
+from strands.models import Model
+from strands.types.content import Messages
+from strands.types.exceptions import ModelThrottledException
+from strands.types.streaming import StreamEvent
+from strands.types.tools import ToolSpec
+
+# Simple logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+T = TypeVar("T", bound=BaseModel)
+
+# Attempts the agent's event loop makes for a throttled model call
+AGENT_ATTEMPTS = MAX_ATTEMPTS
+# Retries per stream call after throttling (on top of AGENT_ATTEMPTS), retries of
+# structured_output (nothing else retries it), and the jittered backoff (seconds)
+MODEL_RETRIES = int(os.getenv("MODEL_RETRIES", "0"))
+STRUCTURED_OUTPUT_RETRIES = int(os.getenv("STRUCTURED_OUTPUT_RETRIES", "3"))
+# Retries per call after a transient service or connection error (nothing else retries them)
+MODEL_TRANSIENT_RETRIES = int(os.getenv("MODEL_TRANSIENT_RETRIES", "2"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "8"))
+# Region / model id of the backup request (neither set = no hedging)
+HEDGE_REGION = os.getenv("HEDGE_REGION")
+HEDGE_MODEL_ID = os.getenv("HEDGE_MODEL_ID")
+# Time-to-first-token percentile of the primary after which the backup is sent
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.95"))
+# Threshold until MIN_SAMPLES time-to-first-token values are known (seconds)
+HEDGE_AFTER = float(os.getenv("HEDGE_AFTER", "3"))
+MIN_SAMPLES = 20
+# Time-to-first-token values kept for the percentile
+HISTORY = 200
+
+# Error codes of a request that may succeed when sent again (besides throttling)
+TRANSIENT_CODES = {
+    "ServiceUnavailableException", "ServiceUnavailable", "InternalServerException", "InternalFailure",
+    "ModelStreamErrorException", "ModelNotReadyException", "RequestTimeout", "RequestTimeoutException",
+}
+
+
+def is_transient(error: BaseException) -> bool:
+    """A service-side or connection error worth retrying (read timeouts, dropped connections, 5xx)."""
+    if isinstance(error, (HTTPClientError, BotocoreConnectionError)):
+        return True
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code")
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 0
+        return code in TRANSIENT_CODES or status >= 500
+    return False
+
+
+async def _cancel(stream: AsyncIterator[StreamEvent], pending: Optional["asyncio.Future[Any]"]) -> None:
+    """Stop a stream that lost the race (or whose caller went away)."""
+    if pending is not None and not pending.done():
+        pending.cancel()
+        try:
+            await pending
+        except BaseException:
+            pass
+    try:
+        await stream.aclose()
+    except Exception as e:
+        logger.debug(f"Ignoring error while closing a cancelled stream: {e}")
+
+
+async def _first_content(stream: AsyncIterator[StreamEvent]) -> List[StreamEvent]:
+    """Events up to and including the first content event (``messageStart`` comes before the model answers)."""
+    events = []
+    async for event in stream:
+        events.append(event)
+        if "contentBlockDelta" in event or "contentBlockStart" in event:
+            break
+    return events
+
+
+class ResilientModel(Model):
+    """
+    Model with jittered retries on throttling and optional hedging to a backup
+    model (see the module docstring).
+
+    Args:
+        model: the primary model
+        backup: model the hedged request goes to (None = no hedging)
+        retries: retries of a stream after throttling before the error is raised
+            (each multiplies with the agent's ``AGENT_ATTEMPTS``)
+        structured_retries: retries of ``structured_output`` after throttling
+        transient_retries: retries after a transient service or connection error
+        base_delay: backoff of the first retry (upper bound of the jitter)
+        max_delay: largest backoff
+        percentile: time-to-first-token percentile after which the backup is sent
+        hedge_after: threshold until ``min_samples`` values are known
+        min_samples: values needed before the percentile is used
+    """
+
+    def __init__(
+        self,
+        model: Model,
+        backup: Optional[Model] = None,
+        retries: int = MODEL_RETRIES,
+        structured_retries: int = STRUCTURED_OUTPUT_RETRIES,
+        transient_retries: int = MODEL_TRANSIENT_RETRIES,
+        base_delay: float = RETRY_BASE_DELAY,
+        max_delay: float = RETRY_MAX_DELAY,
+        percentile: float = HEDGE_PERCENTILE,
+        hedge_after: float = HEDGE_AFTER,
+        min_samples: int = MIN_SAMPLES,
+    ):
+        self.model = model
+        self.backup = backup
+        self.retries = retries
+        self.structured_retries = structured_retries
+        self.transient_retries = transient_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.percentile = percentile
+        self.hedge_after = hedge_after
+        self.min_samples = min_samples
+        self._ttft: "deque[float]" = deque(maxlen=HISTORY)
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        self.calls = 0
+        self.retried = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.hedges_skipped = 0
+        # Throttled attempts in a row, for the jitter before the agent retries
+        self._throttle_streak = 0
+
+    def update_config(self, **model_config: Any) -> None:
+        self.model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.model.get_config()
+
+    def hedge_threshold(self) -> float:
+        """Seconds without a first token after which the backup request is sent."""
+        with self._lock:
+            samples = sorted(self._ttft)
+        if len(samples) < self.min_samples:
+            return self.hedge_after
+        return samples[min(int(len(samples) * self.percentile), len(samples) - 1)]
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry ``attempt`` (0-based)."""
+        return self._random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def attempts_per_call(self) -> int:
+        """Most requests one agent model call can send to the primary (hedges not counted)."""
+        return AGENT_ATTEMPTS * (1 + self.retries + self.transient_retries)
+
+    async def stream(
+        self,
+        messages: Messages,
+        tool_specs: Optional[List[ToolSpec]] = None,
+        system_prompt: Optional[str] = None,
+        *,
+        tool_choice: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterable[StreamEvent]:
+        with self._lock:
+            self.calls += 1
+        attempt, failed = 0, 0
+        while True:
+            started = False
+            try:
+                async for event in self._hedged(messages, tool_specs, system_prompt, tool_choice, kwargs):
+                    if not started:
+                        started = True
+                        with self._lock:
+                            self._throttle_streak = 0
+                    yield event
+                return
+            except ModelThrottledException:
+                # Once events reached the agent the answer cannot be restarted here
+                if started:
+                    raise
+                if attempt >= self.retries:
+                    # The agent's event loop retries after its fixed delay; spread the callers first
+                    with self._lock:
+                        streak = self._throttle_streak
+                        self._throttle_streak += 1
+                    await asyncio.sleep(self.backoff(streak))
+                    raise
+                delay = self.backoff(attempt)
+                attempt += 1
+                logger.info(f"Model throttled, retry {attempt}/{self.retries} in {delay:.2f}s")
+            except Exception as e:
+                if started or not is_transient(e) or failed >= self.transient_retries:
+                    raise
+                delay = self.backoff(failed)
+                failed += 1
+                logger.info(f"Model request failed ({type(e).__name__}), retry {failed}/{self.transient_retries} in {delay:.2f}s")
+            with self._lock:
+                self.retried += 1
+            await asyncio.sleep(delay)
+
+    async def _hedged(self, messages, tool_specs, system_prompt, tool_choice, kwargs) -> AsyncIterable[StreamEvent]:
+        """One attempt: the primary stream, raced against the backup once it is late."""
+        def open_stream(model: Model, **admission: Any) -> AsyncIterator[StreamEvent]:
+            return model.stream(messages, tool_specs, system_prompt, tool_choice=tool_choice, **admission, **kwargs)
+
+        # Wait for the primary's limiter first: queueing is not a slow model
+        admission = {}
+        if hasattr(self.model, "admit"):
+            admission["admission"] = await self.model.admit(messages, tool_specs, system_prompt)
+        start = time.perf_counter()
+        primary = open_stream(self.model, **admission)
+        streams = {primary: asyncio.ensure_future(_first_content(primary))}
+        winner, first, error = None, None, None
+        try:
+            if self.backup is not None:
+                threshold = self.hedge_threshold()
+                done, _ = await asyncio.wait(set(streams.values()), timeout=threshold)
+                throttled = bool(done) and isinstance(streams[primary].exception(), ModelThrottledException)
+                if throttled:
+                    error = streams.pop(primary).exception()
+                    await _cancel(primary, None)
+                if not done or throttled:
+                    # A limited backup only gets the request if it can go out now
+                    backup_admission = {}
+                    if hasattr(self.backup, "try_admit"):
+                        backup_admission["admission"] = self.backup.try_admit(messages, tool_specs, system_prompt)
+                    reason = "was throttled" if throttled else f"is slow (no first token after {threshold:.2f}s)"
+                    if backup_admission.get("admission", 0) is None:
+                        with self._lock:
+                            self.hedges_skipped += 1
+                        logger.info(f"Primary model {reason}, but the backup's rate limit is full: not hedging")
+                    else:
+                        with self._lock:
+                            self.hedges += 1
+                        logger.info(f"Primary model {reason}, sending hedged request to the backup")
+                        backup = open_stream(self.backup, **backup_admission)
+                        streams[backup] = asyncio.ensure_future(_first_content(backup))
+
+            # First stream to produce an event wins; a failed stream drops out of the race
+            while winner is None and streams:
+                done, _ = await asyncio.wait(set(streams.values()), return_when=asyncio.FIRST_COMPLETED)
+                for stream, pending in list(streams.items()):
+                    if pending not in done:
+                        continue
+                    if pending.exception() is not None:
+                        error = pending.exception()
+                        del streams[stream]
+                        await _cancel(stream, None)
+                    elif winner is None:
+                        winner, first = stream, pending.result()
+            if winner is None:
+                raise error
+        finally:
+            for stream, pending in list(streams.items()):
+                if stream is not winner:
+                    await _cancel(stream, pending)
+
+        ttft = time.perf_counter() - start
+        with self._lock:
+            # When the backup wins, the primary's time-to-first-token is at least this long
+            self._ttft.append(ttft)
+            if winner is not primary:
+                self.hedge_wins += 1
+        if winner is not primary:
+            logger.info(f"Hedged request won ({ttft:.2f}s to first token)")
+
+        try:
+            for event in first:
+                yield event
+            async for event in winner:
+                yield event
+        finally:
+            await _cancel(winner, None)
+
+    async def structured_output(
+        self, output_model: Type[T], prompt: Messages, system_prompt: Optional[str] = None, **kwargs: Any
+    ) -> AsyncGenerator[Dict[str, Union[T, Any]], None]:
+        # Structured output is a single result, so only the retries apply (the agent does not retry it)
+        attempt, failed = 0, 0
+        while True:
+            try:
+                async for event in self.model.structured_output(output_model, prompt, system_prompt, **kwargs):
+                    yield event
+                return
+            except ModelThrottledException:
+                if attempt >= self.structured_retries:
+                    raise
+                delay = self.backoff(attempt)
+                attempt += 1
+            except Exception as e:
+                if not is_transient(e) or failed >= self.transient_retries:
+                    raise
+                delay = self.backoff(failed)
+                failed += 1
+            with self._lock:
+                self.retried += 1
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """Calls, retries, hedges fired, won and skipped, and the time-to-first-token after admission."""
+        with self._lock:
+            samples = list(self._ttft)
+            return {
+                "calls": self.calls,
+                "attempts_per_call": self.attempts_per_call(),
+                "retried": self.retried,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "hedge_win_rate": self.hedge_wins / self.hedges if self.hedges else 0.0,
+                "hedges_skipped": self.hedges_skipped,
+                "ttft_p50": statistics.median(samples) if samples else None,
+                "ttft_p95": sorted(samples)[min(int(len(samples) * 0.95), len(samples) - 1)] if samples else None,
+            }
+
+
+def resilient_from_env(factory: Callable[..., Model], **bedrock_kwargs: Any) -> ResilientModel:
+    """
+    ``factory(**bedrock_kwargs)`` with retries, and a backup in ``HEDGE_REGION``
+    / with ``HEDGE_MODEL_ID`` when either is set.
+    """
+    backup = None
+    if HEDGE_REGION or HEDGE_MODEL_ID:
+        backup_kwargs = dict(bedrock_kwargs)
+        if HEDGE_REGION:
+            backup_kwargs["region_name"] = HEDGE_REGION
+        if HEDGE_MODEL_ID:
+            backup_kwargs["model_id"] = HEDGE_MODEL_ID
+        backup = factory(**backup_kwargs)
+    model = ResilientModel(factory(**bedrock_kwargs), backup=backup)
+    if backup is not None:
+        atexit.register(lambda: logger.info(f"Hedged model calls: {model.stats()}"))
+    return model
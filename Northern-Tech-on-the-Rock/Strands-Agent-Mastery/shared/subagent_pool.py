@@ -0,0 +1,164 @@
+"""
+Warm, reusable sub-agents for the agents-as-tools pattern.
+
+Building an ``Agent`` per delegated call also builds a new model client (a boto3
+client with its own HTTP connection pool), so every call pays for client setup
+and a fresh TLS handshake, and throws both away afterwards. ``SubAgentPool``
+keeps:
+
+- one model client per model id (``shared_model``), shared by every sub-agent
+  using that model; boto3 clients are thread-safe and keep their connections alive
+- idle sub-agent instances per registered spec, leased one caller at a time and
+  reset (messages, state, metrics) when they come back
+
+Concurrent callers of the same spec (e.g. the orchestrator running two research
+calls in parallel) get separate instances, so no agent ever runs twice at once.
+Async tools use ``lease_async`` and ``invoke_async``, so sub-agents called in the
+same model turn run concurrently on the orchestrator's event loop::
+
+    subagents = SubAgentPool()
+    subagents.register("research", system_prompt="...")
+
+    @tool
+    async def research_assistant(query: str) -> str:
+        async with subagents.lease_async("research") as agent:
+            return str(await agent.invoke_async(query))
+"""
+import time
+import asyncio
+import logging
+import threading
+import contextlib
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from strands import Agent
+from strands.agent.state import AgentState
+from strands.models import Model
+from strands.telemetry.metrics import EventLoopMetrics
+
+# Simple logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Idle instances kept per spec; more concurrent callers still work, the extra instances are dropped afterwards
+MAX_IDLE = 4
+
+_models: Dict[Tuple[Optional[str], str], Model] = {}
+_models_lock = threading.Lock()
+
+
+def shared_model(model_id: Optional[str] = None, **model_config: Any) -> Model:
+    """
+    One model client per model id and config for the whole process (built with
+    ``create_model``, so ``MOCK_MODEL``, prompt caching and ``MODEL_CACHE`` apply).
+    """
+    from shared.mock_model import create_model
+
+    key = (model_id, repr(sorted(model_config.items())))
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            model = _models[key] = create_model(**({"model_id": model_id} if model_id else {}), **model_config)
+        return model
+
+
+class _Spec:
+    def __init__(self, name: str, system_prompt: Optional[str], model_id: Optional[str],
+                 tools: Optional[List[Any]], agent_kwargs: Dict[str, Any]):
+        self.name = name
+        self.system_prompt = system_prompt
+        self.model_id = model_id
+        self.tools = tools
+        self.agent_kwargs = agent_kwargs
+        self.idle: List[Agent] = []
+        self.created = 0
+        self.reused = 0
+        self.in_use = 0
+
+
+class SubAgentPool:
+    """Pool of reusable sub-agent instances per registered spec (see the module docstring)."""
+
+    def __init__(self, max_idle: int = MAX_IDLE):
+        self.max_idle = max_idle
+        self._specs: Dict[str, _Spec] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, system_prompt: Optional[str] = None, model_id: Optional[str] = None,
+                 tools: Optional[List[Any]] = None, **agent_kwargs: Any) -> None:
+        """Describe a sub-agent; instances are only built when first leased."""
+        with self._lock:
+            self._specs[name] = _Spec(name, system_prompt, model_id, tools, {"callback_handler": None, **agent_kwargs})
+
+    def _build(self, spec: _Spec) -> Agent:
+        started = time.perf_counter()
+        agent = Agent(
+            name=spec.name,
+            model=shared_model(spec.model_id),
+            system_prompt=spec.system_prompt,
+            tools=spec.tools,
+            **spec.agent_kwargs,
+        )
+        logger.debug(f"Built sub-agent '{spec.name}' in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return agent
+
+    @staticmethod
+    def _reset(agent: Agent) -> None:
+        """Forget everything one delegated call left behind."""
+        agent.messages = []
+        agent.state = AgentState()
+        agent.event_loop_metrics = EventLoopMetrics()
+        agent.conversation_manager.removed_message_count = 0
+
+    def _checkout(self, name: str) -> Tuple[_Spec, Optional[Agent]]:
+        with self._lock:
+            spec = self._specs[name]
+            agent = spec.idle.pop() if spec.idle else None
+            spec.in_use += 1
+            if agent is None:
+                spec.created += 1
+            else:
+                spec.reused += 1
+        return spec, agent
+
+    def _checkin(self, spec: _Spec, agent: Optional[Agent]) -> None:
+        broken = agent is None
+        if not broken:
+            try:
+                self._reset(agent)
+            except Exception as e:
+                logger.warning(f"Dropping sub-agent '{spec.name}' that could not be reset: {e}")
+                broken = True
+        with self._lock:
+            spec.in_use -= 1
+            if not broken and len(spec.idle) < self.max_idle:
+                spec.idle.append(agent)
+
+    @contextlib.contextmanager
+    def lease(self, name: str) -> Iterator[Agent]:
+        """Borrow an idle instance of spec ``name`` (or a new one) for the duration of the block."""
+        spec, agent = self._checkout(name)
+        try:
+            if agent is None:
+                agent = self._build(spec)
+            yield agent
+        finally:
+            self._checkin(spec, agent)
+
+    @contextlib.asynccontextmanager
+    async def lease_async(self, name: str) -> AsyncIterator[Agent]:
+        """Like ``lease``, but a new instance is built off the event loop, so concurrent tools keep running."""
+        spec, agent = self._checkout(name)
+        try:
+            if agent is None:
+                agent = await asyncio.to_thread(self._build, spec)
+            yield agent
+        finally:
+            self._checkin(spec, agent)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {
+                name: {"created": spec.created, "reused": spec.reused, "in_use": spec.in_use, "idle": len(spec.idle)}
+                for name, spec in self._specs.items()
+            }
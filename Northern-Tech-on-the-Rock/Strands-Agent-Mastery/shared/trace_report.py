@@ -0,0 +1,241 @@
+"""
+Latency report for traces written by ``shared/tracing.py`` (or any OTLP/JSON file).
+
+For every trace it prints:
+
+- the critical path: the chain of spans that actually determined the wall time
+  (parallel branches that finished earlier are not on it),
+- a per-stage breakdown of the critical path (model time to first token, model
+  generation, each tool, orchestration overhead),
+- a per-node table for Graph/Swarm runs (one row per ``invoke_agent`` span).
+
+Usage::
+
+    uv run shared/trace_report.py traces.jsonl [--last] [--trace-id ID]
+"""
+import sys
+import json
+import argparse
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class Span:
+    def __init__(self, data: Dict[str, Any]):
+        self.trace_id = data["traceId"]
+        self.span_id = data["spanId"]
+        self.parent_id = data.get("parentSpanId") or None
+        self.name = data["name"]
+        self.start = int(data["startTimeUnixNano"]) / 1e9
+        self.end = int(data["endTimeUnixNano"]) / 1e9
+        self.attributes = {a["key"]: _value(a["value"]) for a in data.get("attributes", [])}
+        self.error = data.get("status", {}).get("code") == 2
+        self.children: List["Span"] = []
+        self.parent: Optional["Span"] = None
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    @property
+    def ttft(self) -> Optional[float]:
+        value = self.attributes.get("gen_ai.server.time_to_first_token")
+        return float(value) / 1000 if value else None
+
+    def label(self) -> str:
+        agent = self.attributes.get("gen_ai.agent.name")
+        if self.name == "invoke_agent" and agent:
+            return f"invoke_agent {agent}"
+        return self.name
+
+
+def _value(value: Dict[str, Any]) -> Any:
+    if "stringValue" in value:
+        return value["stringValue"]
+    if "intValue" in value:
+        return int(value["intValue"])
+    if "doubleValue" in value:
+        return float(value["doubleValue"])
+    if "boolValue" in value:
+        return value["boolValue"]
+    if "arrayValue" in value:
+        return [_value(v) for v in value["arrayValue"].get("values", [])]
+    return None
+
+
+def load_spans(paths: Iterable[str]) -> List[Span]:
+    spans = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                for resource in json.loads(line).get("resourceSpans", []):
+                    for scope in resource.get("scopeSpans", []):
+                        spans.extend(Span(data) for data in scope.get("spans", []))
+    return spans
+
+
+def build_traces(spans: List[Span]) -> Dict[str, List[Span]]:
+    """Link parents and children; returns the root spans of every trace (in start order)."""
+    by_id = {(s.trace_id, s.span_id): s for s in spans}
+    roots: Dict[str, List[Span]] = defaultdict(list)
+    for span in spans:
+        parent = by_id.get((span.trace_id, span.parent_id)) if span.parent_id else None
+        if parent is None:
+            roots[span.trace_id].append(span)
+        else:
+            span.parent = parent
+            parent.children.append(span)
+    for span in spans:
+        span.children.sort(key=lambda s: s.start)
+    return dict(sorted(roots.items(), key=lambda item: min(s.start for s in item[1])))
+
+
+def critical_path(span: Span, end: Optional[float] = None) -> List[Tuple[Span, float, float]]:
+    """
+    Segments ``(span, start, end)`` that make up the critical path of ``span``.
+
+    Walking backwards from the end, the child that finished last is on the path;
+    before it started, the child that finished last before that, and so on. Gaps
+    between those children are the parent's own time.
+    """
+    end = span.end if end is None else min(end, span.end)
+    segments = []
+    cursor = end
+    for child in sorted(span.children, key=lambda c: c.end, reverse=True):
+        if child.start >= cursor:
+            continue
+        child_end = min(child.end, cursor)
+        if child_end < cursor:
+            segments.append((span, child_end, cursor))
+        segments.extend(reversed(critical_path(child, child_end)))
+        cursor = child.start
+        if cursor <= span.start:
+            break
+    if cursor > span.start:
+        segments.append((span, span.start, cursor))
+    return list(reversed(segments))
+
+
+def stage(span: Span) -> str:
+    name = span.name
+    if name == "chat":
+        return "model"
+    if name.startswith("execute_tool"):
+        return "tool: " + name[len("execute_tool"):].strip()
+    if name in ("invoke_graph", "invoke_swarm"):
+        return f"orchestration ({name[len('invoke_'):]})"
+    if name.startswith("invoke_agent"):
+        return "agent overhead"
+    if name == "execute_event_loop_cycle":
+        return "event loop overhead"
+    return name
+
+
+def breakdown(segments: List[Tuple[Span, float, float]]) -> Dict[str, float]:
+    totals: Dict[str, float] = defaultdict(float)
+    for span, start, end in segments:
+        label = stage(span)
+        if label == "model":
+            # Split a model request into waiting for the first token and generating the rest
+            ttft = span.ttft
+            if ttft is not None:
+                first_token = span.start + ttft
+                totals["model: time to first token"] += max(0.0, min(end, first_token) - start)
+                totals["model: generation"] += max(0.0, end - max(start, first_token))
+                continue
+            label = "model: request"
+        totals[label] += end - start
+    return totals
+
+
+def path_of(span: Span) -> str:
+    names = []
+    while span is not None:
+        names.append(span.label())
+        span = span.parent
+    return " > ".join(reversed(names))
+
+
+def descendants(span: Span) -> Iterable[Span]:
+    for child in span.children:
+        yield child
+        yield from descendants(child)
+
+
+def print_trace(trace_id: str, roots: List[Span], top: int, min_ms: float) -> None:
+    origin = min(r.start for r in roots)
+    wall = max(r.end for r in roots) - origin
+    print(f"Trace {trace_id}  ({', '.join(r.label() for r in roots)})  wall time {wall:.2f}s")
+    print("============================================================")
+
+    segments = [seg for root in sorted(roots, key=lambda r: r.start) for seg in critical_path(root)]
+
+    # Merge consecutive segments of the same span for readability
+    merged: List[List[Any]] = []
+    for span, start, end in segments:
+        if merged and merged[-1][0] is span and abs(merged[-1][2] - start) < 1e-6:
+            merged[-1][2] = end
+        else:
+            merged.append([span, start, end])
+    print("Critical path:")
+    # List the longest segments, in the order they happened
+    candidates = [m for m in merged if (m[2] - m[1]) * 1000 >= min_ms]
+    shown = {id(m) for m in sorted(candidates, key=lambda m: m[2] - m[1], reverse=True)[:top]}
+    for segment in merged:
+        span, start, end = segment
+        if id(segment) in shown:
+            marker = "  [error]" if span.error else ""
+            print(f"  +{start - origin:7.2f}s  {end - start:7.2f}s  {path_of(span)}{marker}")
+    hidden = [m for m in merged if id(m) not in shown]
+    if hidden:
+        print(f"  ... {len(hidden)} shorter segments ({sum(m[2] - m[1] for m in hidden):.2f}s in total) not shown (--top / --min-ms)")
+
+    print("\nPer-stage breakdown (critical path):")
+    totals = breakdown(segments)
+    for label, seconds in sorted(totals.items(), key=lambda item: item[1], reverse=True):
+        print(f"  {label:<36} {seconds:8.2f}s  {seconds / wall * 100 if wall else 0:5.1f}%")
+
+    agents = [s for root in roots for s in [root, *descendants(root)] if s.name.startswith("invoke_agent")]
+    if len(agents) > 1:
+        print("\nPer node:")
+        print(f"  {'node':<24} {'start':>8} {'duration':>9} {'model':>8} {'ttft':>7} {'tools':>8} {'calls':>6}")
+        for agent in sorted(agents, key=lambda s: s.start):
+            inner = list(descendants(agent))
+            models = [s for s in inner if s.name == "chat"]
+            tools = [s for s in inner if s.name.startswith("execute_tool")]
+            ttfts = [s.ttft for s in models if s.ttft is not None]
+            name = agent.attributes.get("gen_ai.agent.name", agent.name)
+            print(
+                f"  {str(name)[:24]:<24} {agent.start - origin:7.2f}s {agent.duration:8.2f}s "
+                f"{sum(s.duration for s in models):7.2f}s "
+                f"{(sum(ttfts) / len(ttfts)) if ttfts else 0:6.2f}s "
+                f"{sum(s.duration for s in tools):7.2f}s {len(models):>3}/{len(tools):<3}"
+            )
+        print("  (ttft = mean time to first token per model request; calls = model requests/tool calls)")
+    print()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Critical path and per-stage latency breakdown of traces")
+    parser.add_argument("files", nargs="+", help="OTLP-JSON trace files (e.g. written with TRACE_FILE=...)")
+    parser.add_argument("--trace-id", type=str, default=None, help="Only report this trace")
+    parser.add_argument("--last", action="store_true", help="Only report the most recent trace")
+    parser.add_argument("--top", type=int, default=40, help="Longest critical-path segments to list")
+    parser.add_argument("--min-ms", type=float, default=5.0, help="Hide critical-path segments shorter than this")
+
+    args = parser.parse_args()
+
+    traces = build_traces(load_spans(args.files))
+    if args.trace_id:
+        traces = {k: v for k, v in traces.items() if k == args.trace_id}
+    elif args.last and traces:
+        last = list(traces)[-1]
+        traces = {last: traces[last]}
+    if not traces:
+        print("No spans found.")
+        sys.exit(1)
+    for trace_id, roots in traces.items():
+        print_trace(trace_id, roots, args.top, args.min_ms)
@@ -0,0 +1,150 @@
+"""
+Tracing setup shared by the workshop examples.
+
+Strands already creates OpenTelemetry spans for every agent turn once a tracer
+provider exists: ``invoke_graph`` / ``invoke_swarm``, ``invoke_agent <name>`` for
+each agent (= each Graph/Swarm node), ``execute_event_loop_cycle``, ``chat`` for
+each model request (with ``gen_ai.server.time_to_first_token``) and
+``execute_tool <name>`` for each tool call. ``setup_tracing`` creates that
+provider and writes the spans to a local OTLP-JSON file, which
+``shared/trace_report.py`` turns into a latency breakdown::
+
+    TRACE_FILE=traces.jsonl uv run 2-multi-agents/completed/graph_parallel.py
+    uv run shared/trace_report.py traces.jsonl
+"""
+import os
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+
+# Simple logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Spans are appended to this file when it is set (see setup_tracing)
+TRACE_FILE = os.getenv("TRACE_FILE")
+
+_telemetry = None
+_lock = threading.Lock()
+
+
+def _any_value(value: Any) -> Dict[str, Any]:
+    """OTLP ``AnyValue`` in its JSON encoding (64-bit integers are strings)."""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_any_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+
+def _attributes(attributes: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _any_value(value)} for key, value in (attributes or {}).items()]
+
+
+def _span(span: ReadableSpan) -> Dict[str, Any]:
+    encoded = {
+        "traceId": format(span.context.trace_id, "032x"),
+        "spanId": format(span.context.span_id, "016x"),
+        "name": span.name,
+        # OTLP numbers span kinds from 1 (INTERNAL); the Python enum starts at 0
+        "kind": span.kind.value + 1,
+        "startTimeUnixNano": str(span.start_time),
+        "endTimeUnixNano": str(span.end_time),
+        "attributes": _attributes(span.attributes),
+        "events": [
+            {"timeUnixNano": str(event.timestamp), "name": event.name, "attributes": _attributes(event.attributes)}
+            for event in span.events
+        ],
+        "status": {"code": span.status.status_code.value},
+    }
+    if span.parent is not None:
+        encoded["parentSpanId"] = format(span.parent.span_id, "016x")
+    if span.status.description:
+        encoded["status"]["message"] = span.status.description
+    return encoded
+
+
+class OTLPJsonFileExporter(SpanExporter):
+    """
+    Appends spans to a file in the OTLP/JSON encoding, one ``{"resourceSpans": [...]}``
+    export request per line (the format of the OpenTelemetry Collector file exporter).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        resources: Dict[Any, Dict[str, Any]] = {}
+        for span in spans:
+            resource = resources.setdefault(id(span.resource), {"resource": span.resource, "scopes": {}})
+            scope = span.instrumentation_scope
+            key = (scope.name, scope.version) if scope is not None else ("", None)
+            resource["scopes"].setdefault(key, []).append(_span(span))
+
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": _attributes(dict(entry["resource"].attributes))},
+                    "scopeSpans": [
+                        {"scope": {"name": name, **({"version": version} if version else {})}, "spans": encoded}
+                        for (name, version), encoded in entry["scopes"].items()
+                    ],
+                }
+                for entry in resources.values()
+            ]
+        }
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(request, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.error(f"Failed to write spans to {self.path}: {e}")
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+
+def setup_tracing(path: Optional[str] = None, console: bool = False):
+    """
+    Create the global tracer provider (once per process) and export spans.
+
+    Args:
+        path: OTLP-JSON file to append spans to (default: the TRACE_FILE
+            environment variable). Without a path and without ``console`` nothing
+            is set up, so calling this in the examples costs nothing by default.
+        console: Also print spans to the console
+
+    Returns:
+        The ``StrandsTelemetry`` instance, or None when tracing stays off
+    """
+    global _telemetry
+    path = path or TRACE_FILE
+    if not path and not console:
+        return None
+
+    with _lock:
+        if _telemetry is None:
+            from strands.telemetry import StrandsTelemetry
+
+            _telemetry = StrandsTelemetry()
+            if os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+                _telemetry.setup_otlp_exporter()
+        if console:
+            _telemetry.setup_console_exporter()
+        if path:
+            # Batched so that writing the file never sits on the agent's hot path;
+            # the provider flushes the remaining spans at interpreter exit
+            _telemetry.tracer_provider.add_span_processor(BatchSpanProcessor(OTLPJsonFileExporter(path)))
+            logger.info(f"Writing traces to {path}")
+    return _telemetry
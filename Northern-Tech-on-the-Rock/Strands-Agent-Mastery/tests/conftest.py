@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The examples import their modules as `tools.*` (1-basic-agent/completed) and `shared.*` (repo root)
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "1-basic-agent", "completed"))
@@ -0,0 +1,84 @@
+import threading
+
+import pytest
+
+from shared.mock_model import MockModel
+from tools import agent_pool
+from tools.agent_pool import AgentPool, SessionBusy, estimate_size
+from tools.conversation_store import ConversationStore
+
+
+def _pool(tmp_path, budget_mb=256):
+    model = MockModel(ttft=0, tokens_per_second=0, jitter=0, output_tokens=50)
+    return AgentPool(model=model, memory_budget_mb=budget_mb, store=ConversationStore(str(tmp_path / "db.sqlite")))
+
+
+def test_size_is_tracked_without_serializing_the_conversation(tmp_path, monkeypatch):
+    pool = _pool(tmp_path)
+    with pool.session("s1") as agent:
+        agent("안녕")
+    calls = []
+    original = agent_pool._serialized_size
+    monkeypatch.setattr(agent_pool, "_serialized_size", lambda value: calls.append(value) or original(value))
+    with pool.session("s1") as agent:
+        agent("다음 질문")
+    # Only the new messages and the (small) state were serialized, never the whole history
+    assert all(value is not agent.messages for value in calls)
+    # Same as a full measurement, up to the separators between the parts
+    assert abs(pool.stats()["memory_bytes"] - estimate_size(agent)) < 0.1 * estimate_size(agent)
+
+
+def test_over_budget_re_measures_before_evicting(tmp_path):
+    pool = _pool(tmp_path, budget_mb=0.0001)
+    with pool.session("s1") as agent:
+        agent("안녕")
+        # The conversation manager may shrink messages after they were counted
+        del agent.messages[:]
+    entry = pool._entries.get("s1")
+    assert entry is None or entry.size <= estimate_size(agent)
+    with pool.session("s2") as agent:
+        for _ in range(3):
+            agent("질문")
+    assert pool.stats()["evictions"] >= 1
+
+
+
+def test_stale_idle_sessions_are_re_measured_before_evicting(tmp_path):
+    pool = _pool(tmp_path, budget_mb=0)
+    with pool.session("s1") as first:
+        for _ in range(3):
+            first("질문")
+        # Shrunk after counting; with no budget set, nothing re-measures it at the end of the lease
+        del first.messages[:]
+    stale = pool._entries["s1"].size
+    assert stale > estimate_size(first) + 100
+    with pool.session("s2") as second:
+        second("안녕")
+        # Over the budget by the counted sizes, within it by the real ones
+        pool.memory_budget = estimate_size(first) + estimate_size(second) + 100
+    assert "s1" in pool._entries and pool._entries["s1"].measured
+    assert pool.stats()["evictions"] == 0
+
+def test_one_turn_per_session_at_a_time(tmp_path):
+    pool = _pool(tmp_path)
+    entered = threading.Event()
+    release = threading.Event()
+
+    def first_tab():
+        with pool.session("shared"):
+            entered.set()
+            release.wait()
+
+    thread = threading.Thread(target=first_tab)
+    thread.start()
+    entered.wait()
+    assert pool.busy("shared")
+    with pytest.raises(SessionBusy):
+        with pool.session("shared", timeout=0.1):
+            pass
+    # The second tab queues until the first turn ends
+    threading.Timer(0.2, release.set).start()
+    with pool.session("shared", timeout=5):
+        assert release.is_set()
+    thread.join()
+    assert not pool.busy("shared") and pool.stats()["leased"] == 0
@@ -0,0 +1,61 @@
+import os
+import time
+import importlib
+
+import pytest
+
+
+@pytest.fixture
+def bash_tool(monkeypatch, tmp_path):
+    monkeypatch.setenv("BASH_TOOL_MODE", "subprocess")
+    monkeypatch.setenv("TOOL_SESSION_DIR", str(tmp_path))
+    monkeypatch.setenv("TOOL_ARTIFACT_THRESHOLD", "100")
+    import tools.session
+    import tools.artifacts
+    import tools.bash_tool
+    importlib.reload(tools.session)
+    importlib.reload(tools.artifacts)
+    return importlib.reload(tools.bash_tool)
+
+
+def _files(bash_tool, session_id):
+    root = bash_tool.get_store(session_id).root
+    return sorted(os.listdir(root)) if os.path.isdir(root) else []
+
+
+def test_only_referenced_streams_are_stored(bash_tool):
+    # stderr of a successful command is not part of the result
+    result = bash_tool._run("seq 1 1000 >&2; echo ok", "referenced")
+    assert result == "seq 1 1000 >&2; echo ok||ok\n\n"
+    assert _files(bash_tool, "referenced") == []
+
+    result = bash_tool._run("seq 1 1000; exit 1", "referenced")
+    assert "Stored as artifact" in result
+    # Only the stdout artifact; the short stderr and the temporary files are gone
+    files = _files(bash_tool, "referenced")
+    assert len(files) == 1 and files[0].endswith(".txt")
+
+
+def test_failed_run_leaves_no_partial_files(bash_tool, monkeypatch):
+    def broken(*args, **kwargs):
+        raise OSError("cannot start")
+
+    monkeypatch.setattr(bash_tool, "stream_process", broken)
+    assert bash_tool._run("echo hi", "broken").startswith("Error executing command")
+    assert _files(bash_tool, "broken") == []
+
+
+def test_store_is_pruned_by_age_and_size(tmp_path):
+    from tools.artifacts import ArtifactStore
+
+    store = ArtifactStore(str(tmp_path), max_age=3600, max_bytes=2500)
+    first = store.put("a" * 1000)["id"]
+    old = time.time() - 7200
+    os.utime(store.path(first), (old, old))
+    second = store.put("b" * 1000)["id"]
+    assert not os.path.exists(store.path(first))
+
+    third = store.put("c" * 1000)["id"]
+    fourth = store.put("d" * 1000)["id"]
+    assert not os.path.exists(store.path(second))
+    assert os.path.exists(store.path(third)) and os.path.exists(store.path(fourth))
@@ -0,0 +1,64 @@
+import os
+import sys
+import asyncio
+import importlib
+
+import pytest
+
+from tools import bash_session
+
+# Prints forever until interrupted (a separate process, so SIGINT stops it and the shell survives)
+PRINT_LOOP = f"{sys.executable} -c 'import time\nwhile True:\n    print(\"tick\", flush=True)\n    time.sleep(0.01)'"
+
+
+@pytest.fixture
+def bash_tool(monkeypatch, tmp_path):
+    monkeypatch.setenv("BASH_TOOL_MODE", "session")
+    monkeypatch.setenv("TOOL_SESSION_DIR", str(tmp_path))
+    monkeypatch.setattr(bash_session, "INTERRUPT_GRACE", 1.0)
+    import tools.session
+    import tools.artifacts
+    import tools.bash_tool
+    importlib.reload(tools.session)
+    importlib.reload(tools.artifacts)
+    module = importlib.reload(tools.bash_tool)
+    yield module
+    module.sessions.shutdown()
+
+
+async def cancel_then_run(bash_tool, first, second, session_id):
+    task = asyncio.ensure_future(bash_tool._run_async(first, session_id))
+    await asyncio.sleep(0.5)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    return await bash_tool._run_async(second, session_id)
+
+
+def test_cancelled_command_does_not_leak_into_next(bash_tool):
+    result = asyncio.run(cancel_then_run(bash_tool, PRINT_LOOP, "echo hi", "cancel-next"))
+    assert "__STRANDS_" not in result
+    assert result == "echo hi||hi\n\n"
+
+
+def test_shell_killed_on_cancel_is_restarted_with_notice(bash_tool):
+    # A shell-builtin loop survives SIGINT (the shell traps it), so the shell is killed
+    result = asyncio.run(cancel_then_run(bash_tool, "while true; do :; done", "echo hi", "cancel-kill"))
+    assert "Command failed" not in result
+    assert "shell state was reset" in result
+    assert result.rstrip().endswith("hi")
+
+
+def test_failing_sink_still_reads_to_sentinel(tmp_path):
+    class BrokenSink:
+        def write(self, chunk):
+            raise ValueError("I/O operation on closed file")
+
+    session = bash_session.BashSession("broken-sink", cwd=str(tmp_path))
+    try:
+        first = session.run("seq 1 1000", sinks={"stdout": BrokenSink()})
+        assert first["returncode"] == 0
+        second = session.run("echo hi")
+        assert second["stdout"].text() == "hi\n"
+    finally:
+        session.kill()
@@ -0,0 +1,26 @@
+from tools.streaming import BoundedBuffer
+
+
+def feed(text, head_bytes, tail_bytes, chunk=7):
+    buffer = BoundedBuffer(head_bytes, tail_bytes)
+    data = text.encode("utf-8")
+    for i in range(0, len(data), chunk):
+        buffer.write(data[i:i + chunk])
+    return buffer
+
+
+def test_korean_output_within_limits_is_intact():
+    # 3-byte characters; the head/tail split lands inside one
+    text = "안녕하세요 세계\n" * 700
+    buffer = feed(text, head_bytes=8 * 1024, tail_bytes=8 * 1024)
+    assert buffer.omitted == 0
+    assert buffer.text() == text
+
+
+def test_omitted_output_has_no_broken_characters():
+    text = "가나다라마바사\n" * 3000
+    for head_bytes in range(100, 104):
+        for tail_bytes in range(100, 104):
+            result = feed(text, head_bytes, tail_bytes).text()
+            assert "�" not in result
+            assert "bytes omitted" in result
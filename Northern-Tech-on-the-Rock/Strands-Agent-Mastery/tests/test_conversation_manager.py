@@ -0,0 +1,94 @@
+import time
+
+from strands import Agent
+
+from shared.mock_model import MockModel
+from tools.conversation_manager import (
+    CANCELLED_NOTE, CANCELLED_RESULT, CHARS_PER_TOKEN, DIGEST_HEADER, DIGEST_TRIMMED, TokenBudgetConversationManager,
+    close_interrupted_turn,
+)
+from tools.conversation_store import ConversationStore
+
+
+def _agent_with_pending_tool_use():
+    agent = Agent(model=MockModel(), callback_handler=None)
+    agent.messages.append({"role": "user", "content": [{"text": "파일 목록"}]})
+    agent.messages.append({"role": "assistant", "content": [{"toolUse": {"toolUseId": "t1", "name": "bash_tool", "input": {}}}]})
+    return agent
+
+
+def test_user_stop_is_recorded_as_cancelled():
+    agent = _agent_with_pending_tool_use()
+    result, answer = close_interrupted_turn(agent, "일부 답")
+    assert result["content"][0]["toolResult"]["content"][0]["text"] == CANCELLED_RESULT
+    assert answer["content"][0]["text"] == f"일부 답\n\n{CANCELLED_NOTE}"
+
+
+def test_error_is_not_recorded_as_a_user_stop():
+    agent = _agent_with_pending_tool_use()
+    result, answer = close_interrupted_turn(agent, error=RuntimeError("model unavailable"))
+    assert "RuntimeError: model unavailable" in result["content"][0]["toolResult"]["content"][0]["text"]
+    assert "RuntimeError: model unavailable" in answer["content"][0]["text"]
+    assert CANCELLED_NOTE not in answer["content"][0]["text"]
+
+
+def test_extractive_digest_stays_within_budget():
+    manager = TokenBudgetConversationManager(max_tokens=1000)
+    for turn in range(200):
+        messages = [
+            {"role": "user", "content": [{"text": f"질문 {turn} " + "가" * 150}]},
+            {"role": "assistant", "content": [{"text": f"답변 {turn} " + "나" * 150}]},
+        ]
+        manager.digest = manager._extractive_digest(messages)
+    assert len(manager.digest) <= 1000 * manager.digest_ratio * CHARS_PER_TOKEN
+    assert manager.digest.startswith(DIGEST_TRIMMED)
+    assert manager.digest.count(DIGEST_TRIMMED) == 1
+    # The most recent turn is kept
+    assert "답변 199" in manager.digest
+
+
+def _long_conversation(turns=8):
+    messages = []
+    for turn in range(turns):
+        tool_use = {"toolUseId": f"t{turn}", "name": "bash_tool", "input": {"cmd": "cat log"}}
+        messages += [
+            {"role": "user", "content": [{"text": f"질문 {turn}"}]},
+            {"role": "assistant", "content": [{"toolUse": tool_use}]},
+            {"role": "user", "content": [{"toolResult": {"toolUseId": f"t{turn}", "content": [{"text": "x" * 2000}]}}]},
+            {"role": "assistant", "content": [{"text": f"답변 {turn} " + "나" * 400}]},
+        ]
+    return messages
+
+
+def test_compaction_never_waits_for_the_summarizer():
+    summarizer = Agent(model=MockModel(["요약된 내용"], ttft=1.0, tokens_per_second=0, jitter=0), callback_handler=None)
+    manager = TokenBudgetConversationManager(max_tokens=1000, summarization_agent=summarizer)
+    agent = Agent(model=MockModel(), messages=_long_conversation(), conversation_manager=manager, callback_handler=None)
+    started = time.monotonic()
+    manager.apply_management(agent)
+    assert time.monotonic() - started < 0.5
+    # Folded turns are kept as an extractive digest until the summary is ready
+    assert agent.messages[0]["content"][0]["text"].startswith(DIGEST_HEADER)
+    assert "User asked" in manager.digest
+    assert not manager.refresh_digest(agent)
+
+    manager._pending[1].result(timeout=10)
+    assert manager.refresh_digest(agent)
+    assert manager.digest == "요약된 내용"
+    assert agent.messages[0]["content"][0]["text"] == f"{DIGEST_HEADER}\n요약된 내용"
+
+
+def test_stubbed_results_survive_a_restore(tmp_path):
+    store = ConversationStore(str(tmp_path / "db.sqlite"))
+    manager = TokenBudgetConversationManager(max_tokens=3000, preserve_recent_messages=4)
+    agent = Agent(model=MockModel(), messages=_long_conversation(), conversation_manager=manager,
+                  session_manager=store.session_manager("s1"), callback_handler=None)
+    manager.apply_management(agent)
+    agent._session_manager.sync_agent(agent)
+    # Some of the stubbed results were folded into the digest, the later ones are still in the history
+    assert manager.reports[-1]["stubbed_results"] and manager.reports[-1]["summarized_messages"]
+    assert any("elided" in str(message) for message in agent.messages)
+
+    restored = Agent(model=MockModel(), conversation_manager=TokenBudgetConversationManager(max_tokens=3000),
+                     session_manager=store.session_manager("s1"), callback_handler=None)
+    assert restored.messages == agent.messages
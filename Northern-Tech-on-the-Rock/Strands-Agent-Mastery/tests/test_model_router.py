@@ -0,0 +1,63 @@
+import asyncio
+
+from shared.mock_model import MockModel
+from shared.model_router import ROUTER_FAST_MAX, ROUTER_STANDARD_MAX, Route, RoutingModel
+
+
+def _router(fast_script=None):
+    mock = dict(ttft=0, tokens_per_second=0, jitter=0)
+    return RoutingModel([
+        Route("fast", MockModel(fast_script or ["[fast]"], **mock), ROUTER_FAST_MAX, verify=True),
+        Route("standard", MockModel(["[standard]"], **mock), ROUTER_STANDARD_MAX),
+        Route("thinking", MockModel([{"reasoning": "생각 중", "text": "[thinking]"}], **mock), thinking=True),
+    ])
+
+
+def _prompt(text):
+    return [{"role": "user", "content": [{"text": text}]}]
+
+
+def _answer(router, messages):
+    async def main():
+        return [event async for event in router.stream(messages)]
+
+    events = asyncio.run(main())
+    return "".join(e["contentBlockDelta"]["delta"].get("text", "") for e in events if "contentBlockDelta" in e)
+
+
+def test_fast_route():
+    router = _router()
+    assert _answer(router, _prompt("80 / 4 * 5 의 제곱근은?")) == "[fast]"
+
+
+def test_fast_route_escalates_when_unsure():
+    router = _router(fast_script=["잘 모르겠습니다."])
+    assert _answer(router, _prompt("80 / 4 * 5 의 제곱근은?")) == "[standard]"
+    assert router.stats()["fast"]["escalated"] == 1
+
+
+def test_standard_route():
+    router = _router()
+    assert _answer(router, _prompt("PostgreSQL 과 MySQL 을 비교하고 장단점을 알려줘")) == "[standard]"
+
+
+def test_thinking_route():
+    router = _router()
+    prompt = _prompt("지난 분기 매출 데이터를 분석해서 성장 전략을 설계하고 보고서로 정리해줘")
+    assert _answer(router, prompt) == "[thinking]"
+
+
+def test_deep_tool_loop_marks_next_turn_for_thinking():
+    router = _router()
+    messages = _prompt("파일 목록을 보여줘")
+    for number in range(router.deep_tool_cycles):
+        tool_use = {"toolUseId": f"t{number}", "name": "bash_tool", "input": {"cmd": "ls"}}
+        messages.append({"role": "assistant", "content": [{"toolUse": tool_use}]})
+        messages.append({"role": "user", "content": [{"toolResult": {"toolUseId": f"t{number}", "content": [{"text": "a"}]}}]})
+    # Thinking cannot start in the middle of this plain tool loop
+    assert router.routes[router.choose(messages)].name == "standard"
+    messages.append({"role": "assistant", "content": [{"text": "완료"}]})
+    messages += _prompt("다음 파일도")
+    assert router.routes[router.choose(messages)].name == "thinking"
+    # Only the one turn after the deep loop
+    assert router.routes[router.choose(_prompt("다음 파일도"))].name == "fast"
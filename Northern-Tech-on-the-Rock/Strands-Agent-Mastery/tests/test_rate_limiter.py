@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+from botocore.exceptions import ClientError
+from strands import Agent
+from strands.event_loop import event_loop
+from strands.types.exceptions import ModelThrottledException
+
+from shared.mock_model import MockModel
+from shared.rate_limiter import DEFAULT_OUTPUT_RESERVE, RateLimitedModel, RateLimiter, estimate_tokens
+from shared.resilient_model import AGENT_ATTEMPTS, ResilientModel
+
+MESSAGES = [{"role": "user", "content": [{"text": "안녕"}]}]
+
+
+async def _call(model):
+    return [event async for event in model.stream(MESSAGES)]
+
+
+def test_queue_wait_is_not_hedged():
+    # 2 requests per second, bucket empty: the 4 calls wait 0.5s .. 2s for admission
+    limiter = RateLimiter(rpm=120, tpm=0)
+    limiter.requests.drain()
+    primary = RateLimitedModel(MockModel(ttft=0.05, tokens_per_second=0, jitter=0), rate_limiter=limiter)
+    backup = RateLimitedModel(MockModel(ttft=0.05, tokens_per_second=0, jitter=0), rate_limiter=limiter)
+    model = ResilientModel(primary, backup=backup, hedge_after=0.3)
+
+    async def main():
+        await asyncio.gather(*(_call(model) for _ in range(4)))
+
+    asyncio.run(main())
+    stats = model.stats()
+    assert stats["hedges"] == 0
+    assert stats["ttft_p95"] < 0.3
+
+
+def test_slow_primary_hedges_only_when_backup_has_room():
+    limiter = RateLimiter(rpm=0, tpm=0)
+    primary = RateLimitedModel(MockModel(ttft=1.0, tokens_per_second=0, jitter=0), rate_limiter=limiter)
+    backup = RateLimitedModel(MockModel(ttft=0.01, tokens_per_second=0, jitter=0), rate_limiter=limiter)
+    model = ResilientModel(primary, backup=backup, hedge_after=0.1)
+    asyncio.run(_call(model))
+    assert model.stats()["hedge_wins"] == 1
+
+    full = RateLimiter(rpm=60, tpm=0)
+    full.requests.drain()
+    backup = RateLimitedModel(MockModel(ttft=0.01, tokens_per_second=0, jitter=0), rate_limiter=full)
+    model = ResilientModel(primary, backup=backup, hedge_after=0.1)
+    asyncio.run(_call(model))
+    assert model.stats()["hedges"] == 0
+    assert model.stats()["hedges_skipped"] == 1
+
+
+def test_reserves_expected_output_not_max_tokens():
+    limiter = RateLimiter(rpm=0, tpm=0)
+    model = RateLimitedModel(MockModel(ttft=0, tokens_per_second=0, output_tokens=20), rate_limiter=limiter)
+    model.update_config(max_tokens=64000)
+    prompt = estimate_tokens(MESSAGES, None, None)
+    assert model._reserve(MESSAGES, None, None) == prompt + DEFAULT_OUTPUT_RESERVE
+
+    asyncio.run(_call(model))
+    # The estimate follows the actual answers, still capped by max_tokens
+    assert limiter.expected_output() < 100
+    model.update_config(max_tokens=5)
+    assert model._reserve(MESSAGES, None, None) == prompt + 5
+
+
+class ThrottledModel(MockModel):
+    async def stream(self, *args, **kwargs):
+        self.calls += 1
+        raise ModelThrottledException("ThrottlingException")
+        yield
+
+
+def test_throttled_call_is_retried_by_the_agent_only(monkeypatch):
+    monkeypatch.setattr(event_loop, "INITIAL_DELAY", 0)
+    inner = ThrottledModel()
+    model = ResilientModel(RateLimitedModel(inner, rate_limiter=RateLimiter(rpm=0, tpm=0)), base_delay=0)
+    agent = Agent(model=model, callback_handler=None)
+    with pytest.raises(ModelThrottledException):
+        agent("안녕")
+    assert inner.calls == AGENT_ATTEMPTS * (1 + model.retries) == AGENT_ATTEMPTS
+
+
+class FlakyModel(MockModel):
+    """Fails its first request with a 503, like a Bedrock ServiceUnavailableException."""
+
+    async def stream(self, *args, **kwargs):
+        self.attempts = getattr(self, "attempts", 0) + 1
+        if self.attempts == 1:
+            raise ClientError(
+                {"Error": {"Code": "ServiceUnavailableException", "Message": "try again"},
+                 "ResponseMetadata": {"HTTPStatusCode": 503}},
+                "ConverseStream",
+            )
+        async for event in super().stream(*args, **kwargs):
+            yield event
+
+
+def test_single_503_does_not_reach_the_agent():
+    inner = FlakyModel(["괜찮습니다."], ttft=0, tokens_per_second=0)
+    model = ResilientModel(RateLimitedModel(inner, rate_limiter=RateLimiter(rpm=0, tpm=0)), base_delay=0)
+    agent = Agent(model=model, callback_handler=None)
+    assert str(agent("안녕")).strip() == "괜찮습니다."
+    assert inner.attempts == 2 and model.stats()["retried"] == 1
+
+
+def test_other_errors_are_not_retried():
+    inner = MockModel()
+    model = ResilientModel(inner, base_delay=0)
+
+    async def failing(*args, **kwargs):
+        raise ValueError("bad request")
+        yield
+
+    inner.stream = failing
+    with pytest.raises(ValueError):
+        asyncio.run(_call(model))
+    assert model.stats()["retried"] == 0
@@ -0,0 +1,36 @@
+import pytest
+
+from tools.bash_tool import is_read_only
+
+
+@pytest.mark.parametrize("cmd", [
+    "ls -la data | head",
+    "find . -name '*.py' -print",
+    "sort -k2 -n data.csv | uniq -c",
+    "tree -L 2",
+    "uniq data.txt",
+    "file -b data.bin",
+])
+def test_read_only(cmd):
+    assert is_read_only(cmd)
+
+
+@pytest.mark.parametrize("cmd", [
+    "find . -delete",
+    "find . -exec rm {} +",
+    "find . -fprint out.txt",
+    "find . -fprintf out.txt '%p'",
+    "find . -fls out.txt",
+    "sort -o out.txt data.txt",
+    "sort -uo out.txt data.txt",
+    "sort --output=out.txt data.txt",
+    "tree -o out.txt",
+    "tree -R -H . -L 1",
+    "uniq data.txt out.txt",
+    "file -C -m magic",
+    "cat data > out.txt",
+    "ls\nrm -rf x",
+    "ls\rrm -rf x",
+])
+def test_writes_are_not_read_only(cmd):
+    assert not is_read_only(cmd)
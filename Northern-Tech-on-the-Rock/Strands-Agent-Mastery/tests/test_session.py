@@ -0,0 +1,33 @@
+import os
+
+from strands import Agent
+
+from shared.mock_model import MockModel
+from tools.session import STATE_KEY, session_key, session_dir
+
+
+def test_explicit_session_id_wins():
+    assert session_key({"session_id": "chat-1", "agent": Agent(model=MockModel())}) == "chat-1"
+    assert session_key({}) == "default"
+
+
+def test_agent_session_is_stable_and_not_reused():
+    agent = Agent(model=MockModel(), agent_id="researcher", callback_handler=None)
+    key = session_key({"agent": agent})
+    assert key.startswith("agent-researcher-")
+    assert session_key({"agent": agent}) == key
+    assert agent.state.get(STATE_KEY) in key
+
+    # A new agent never inherits the session of one that was garbage-collected
+    keys = {session_key({"agent": Agent(model=MockModel(), agent_id="researcher")}) for _ in range(20)}
+    assert len(keys) == 20 and key not in keys
+    assert session_dir(key).endswith(key)
+
+
+def test_session_dir_stays_inside_the_root():
+    root = os.path.dirname(session_dir("x"))
+    for session_id in ["", ".", "..", "...", "../etc", "a/b", "a_b"]:
+        path = session_dir(session_id)
+        assert os.path.dirname(path) == root and os.path.basename(path).strip(".")
+    # Sanitized ids do not collide with ids that are already safe
+    assert session_dir("a/b") != session_dir("a_b")
@@ -0,0 +1,33 @@
+import io
+import contextlib
+
+from tools import decorators, python_repl_tool
+from tools.decorators import ToolCache, tool_metrics
+
+
+def test_failed_repl_code_is_counted_as_error():
+    before = tool_metrics.summary().get("python_repl_tool", {}).get("errors", 0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = python_repl_tool.handle_python_repl_tool("1/0")
+    assert python_repl_tool.is_error(result)
+    assert tool_metrics.summary()["python_repl_tool"]["errors"] == before + 1
+
+
+def test_repl_output_is_not_an_error():
+    assert not python_repl_tool.is_error("Successfully executed:\n||print('ok')||ok\n")
+    assert python_repl_tool.is_error("Successfully executed:\n||1/0||Error: Traceback ...")
+    assert python_repl_tool.is_error("Successfully executed:\n||x||Exception: Execution timed out after 600 seconds")
+
+
+def test_disk_hit_keeps_its_expiry(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.sqlite")
+    now = 1000.0
+    monkeypatch.setattr(decorators.time, "time", lambda: now)
+    ToolCache("ttl", ttl=60, disk=path).set("k", "v")
+    now = 1050.0
+    fresh = ToolCache("ttl", ttl=60, disk=path)
+    assert fresh.get("k") == "v" and fresh.disk_hits == 1
+    # Promoted to memory with the expiry of the disk row (1060), not 1050 + 60
+    assert fresh._entries["k"] == ("v", 1060.0)
+    now = 1070.0
+    assert fresh.get("k") is decorators._MISSING